@@ -0,0 +1,251 @@
+"""
+Benchmarks for the public functions of loading, cleaning, transformation, validation and anomaly.
+
+Synthetic UIDAI-shaped shards are generated once per size (see synthetic.py) and
+every function is timed on them. Each result records the best wall time over
+--repeat runs, throughput in rows per second and peak resident memory. Results can
+be saved as baselines and later runs are compared against them; a run exits with
+status 1 when a function got slower or hungrier than its baseline allows.
+
+Plotting (plot_state_enrolment_heatmap, render_*) is not benchmarked: it needs
+GeoJSON files and its cost depends on the geometry, not on the number of rows.
+
+Usage:
+    python -m benchmarks.run_benchmarks --rows 100000 1000000
+    python -m benchmarks.run_benchmarks --rows 100000 --save-baseline
+    python -m benchmarks.run_benchmarks --rows 50000000 --only loading cleaning
+"""
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import shutil
+import tempfile
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings as config
+
+from benchmarks.synthetic import dataset_dir, write_shards
+from src.data_processing import anomaly, loading, cleaning, transformation, validation
+from src.utils.instrumentation import current_rss_mb, peak_rss_mb, reset_peak_rss
+
+AGE_COLUMNS = ['age_0_5', 'age_5_17', 'age_18_greater']
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+def _quiet(func, *args, **kwargs):
+    # The loaders print progress per shard; keep the benchmark output readable
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return func(*args, **kwargs)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+def prepare_context(n_rows: int, data_dir: str, shard_rows: int, seed: int = 0) -> dict:
+    """Generate (or reuse) the shards for `n_rows` and build the frames the benchmarks start from."""
+    output_dir = dataset_dir(data_dir, n_rows, seed, shard_rows, pincode_regions=config.PINCODE_REGIONS)
+    paths = write_shards(output_dir, n_rows, config.STATE_MAPPING, config.STATE_CONFIGS,
+                         shard_rows=shard_rows, seed=seed, pincode_regions=config.PINCODE_REGIONS)
+    raw = _quiet(loading.load_data, paths, config.ENROLMENT_SCHEMA)
+
+    cleaned = transformation.date_format_change(raw.copy(), 'enrolment_date')
+    cleaned = cleaning.clean_name(cleaned, 'state', config.STATE_MAPPING, 'state_cleaned')
+    cleaned = cleaning.clean_district_names(cleaned, config.STATE_CONFIGS)
+    state = transformation.filter_by_state(cleaned, 'West Bengal').copy()
+    integrity = validation.PincodeDistrictIntegrity(state, AGE_COLUMNS)
+    return {
+        'paths': paths,
+        'raw': raw,
+        'cleaned': cleaned,
+        'state': state,
+        'problem_pins': integrity.problem_pins(),
+        'cache_dir': tempfile.mkdtemp(prefix='uidai_bench_cache_')
+    }
+
+def _cached_load_setup(ctx):
+    # First call fills the cache, so the timed call only reads Feather files
+    _quiet(loading.load_data, ctx['paths'], config.ENROLMENT_SCHEMA, cache_dir=ctx['cache_dir'])
+    return (ctx['paths'], config.ENROLMENT_SCHEMA), {'cache_dir': ctx['cache_dir']}
+
+# name -> (rows key, setup(ctx) -> (args, kwargs), call(*args, **kwargs)).
+# 'rows' is the frame whose length is used for throughput; setup runs untimed before every repeat.
+BENCHMARKS = {
+    'loading.read_shard': ('shard', lambda ctx: ((ctx['paths'][0], config.ENROLMENT_SCHEMA), {}), loading.read_shard),
+    'loading.combine_shards': ('raw', lambda ctx: (([ctx['raw'].iloc[i::4].copy() for i in range(4)],), {}), loading.combine_shards),
+    'loading.load_data': ('raw', lambda ctx: ((ctx['paths'], config.ENROLMENT_SCHEMA), {}),
+                          lambda *a, **k: _quiet(loading.load_data, *a, **k)),
+    'loading.load_data[cached]': ('raw', _cached_load_setup, lambda *a, **k: _quiet(loading.load_data, *a, **k)),
+
+    'cleaning.normalize_names': ('raw', lambda ctx: ((ctx['raw']['district'],), {}), cleaning.normalize_names),
+    'cleaning.clean_name': ('raw', lambda ctx: ((ctx['raw'].copy(), 'state', config.STATE_MAPPING, 'state_cleaned'), {}), cleaning.clean_name),
+    'cleaning.replace_names': ('state', lambda ctx: ((ctx['state'].copy(), 'district_cleaned', {'Howrah': 'Haora'}), {}), cleaning.replace_names),
+    'cleaning.clean_district_names': ('cleaned', lambda ctx: ((ctx['cleaned'].copy(), config.STATE_CONFIGS), {}), cleaning.clean_district_names),
+    'cleaning.drop_columns': ('cleaned', lambda ctx: ((ctx['cleaned'], ['date', 'state', 'district']), {}), cleaning.drop_columns),
+
+    'transformation.date_format_change': ('raw', lambda ctx: ((ctx['raw'].copy(), 'enrolment_date'), {}), transformation.date_format_change),
+    'transformation.date_format_change[datetime]': ('raw', lambda ctx: ((ctx['raw'].copy(), 'enrolment_date', None), {}), transformation.date_format_change),
+    'transformation.extract_date_parts': ('cleaned', lambda ctx: ((ctx['cleaned'].copy(),), {}), transformation.extract_date_parts),
+    'transformation.extract_month_from_date': ('cleaned', lambda ctx: ((ctx['cleaned'].copy(),), {}), transformation.extract_month_from_date),
+    'transformation.filter_by_state': ('cleaned', lambda ctx: ((ctx['cleaned'], 'West Bengal'), {}), transformation.filter_by_state),
+    'transformation.filter_df_by_level': ('cleaned', lambda ctx: ((ctx['cleaned'].assign(total_enroll=ctx['cleaned'][AGE_COLUMNS].sum(axis=1)),
+                                                                    'state_cleaned', AGE_COLUMNS + ['total_enroll']), {}), transformation.filter_df_by_level),
+
+    'validation.unique_pincode_count': ('state', lambda ctx: ((ctx['state'],), {}), validation.unique_pincode_count),
+    'validation.get_pin_district_count': ('state', lambda ctx: ((ctx['state'],), {}), validation.get_pin_district_count),
+    'validation.flag_problematic_enrolments': ('state', lambda ctx: ((ctx['state'], ctx['problem_pins']), {}), validation.flag_problematic_enrolments),
+    'validation.aggregate_enrolments_by_district_pincode': ('state', lambda ctx: ((ctx['state'], AGE_COLUMNS), {}),
+                                                            validation.aggregate_enrolments_by_district_pincode),
+    'validation.get_dominant_district_per_pincode': ('state', lambda ctx: ((ctx['state'], AGE_COLUMNS), {}),
+                                                     validation.get_dominant_district_per_pincode),
+    'validation.flag_multi_district_pincodes': ('state', lambda ctx: ((ctx['state'].copy(),), {}), validation.flag_multi_district_pincodes),
+    'validation.PincodeDistrictIntegrity': ('state', lambda ctx: ((ctx['state'],), {}),
+                                            lambda df: _integrity_report(validation.PincodeDistrictIntegrity(df, AGE_COLUMNS), df)),
+    'validation.DataQualityRules.validate': ('cleaned', lambda ctx: ((ctx['cleaned'],), {}),
+                                             validation.default_rules(AGE_COLUMNS, set(config.STATE_MAPPING.values()), config.PINCODE_REGIONS).validate),
+
+    'anomaly.detect_spikes': ('cleaned', lambda ctx: ((ctx['cleaned'], AGE_COLUMNS), {}), anomaly.detect_spikes),
+}
+
+def _integrity_report(integrity, df):
+    # Everything main() asks of the index
+    integrity.unique_pincode_count()
+    integrity.problem_pins()
+    integrity.problematic_aggregate()
+    integrity.dominant_districts()
+    return integrity.flag_rows(df.copy())
+
+def run_benchmark(name: str, ctx: dict, repeat: int = 3) -> dict:
+    """
+    Time one benchmark.
+
+    Parameters:
+    name (str): Key of BENCHMARKS.
+    ctx (dict): Output of prepare_context.
+    repeat (int): Number of timed runs; the fastest counts.
+
+    Returns:
+    dict: seconds, rows, rows_per_sec, peak_rss_mb and rss_delta_mb (peak above the RSS before the call).
+    """
+    rows_key, setup, call = BENCHMARKS[name]
+    rows = len(ctx['raw']) // len(ctx['paths']) if rows_key == 'shard' else len(ctx[rows_key])
+
+    best, peak_delta, peak = float('inf'), 0.0, 0.0
+    for _ in range(repeat):
+        args, kwargs = setup(ctx)
+        gc.collect()
+        before = current_rss_mb()
+        reset_peak_rss()
+        start = time.perf_counter()
+        result = call(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = max(peak, peak_rss_mb())
+        peak_delta = max(peak_delta, peak_rss_mb() - before)
+        best = min(best, elapsed)
+        del args, kwargs, result
+
+    return {
+        'seconds': round(best, 6),
+        'rows': rows,
+        'rows_per_sec': round(rows / best) if best > 0 else None,
+        'peak_rss_mb': round(peak, 1),
+        'rss_delta_mb': round(max(peak_delta, 0.0), 1)
+    }
+
+def compare_to_baseline(results: dict, baseline: dict, time_tolerance: float, memory_tolerance: float,
+                        min_seconds: float = 0.005, min_memory_mb: float = 16) -> list:
+    """
+    List regressions of `results` against `baseline` (both keyed by '<benchmark>@<rows>').
+
+    A benchmark regresses when it is slower than baseline * (1 + time_tolerance) or
+    uses more than baseline * (1 + memory_tolerance) extra memory. Differences below
+    min_seconds / min_memory_mb are treated as noise.
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if result['seconds'] > base['seconds'] * (1 + time_tolerance) and result['seconds'] - base['seconds'] > min_seconds:
+            regressions.append(f"{key}: {result['seconds']:.4f}s vs baseline {base['seconds']:.4f}s")
+        if (result['rss_delta_mb'] > base['rss_delta_mb'] * (1 + memory_tolerance)
+                and result['rss_delta_mb'] - base['rss_delta_mb'] > min_memory_mb):
+            regressions.append(f"{key}: +{result['rss_delta_mb']:.0f} MB vs baseline +{base['rss_delta_mb']:.0f} MB")
+    return regressions
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get('results', {})
+
+def save_baseline(path: str, results: dict) -> None:
+    """Merge `results` into the baseline file (other sizes and benchmarks are kept)."""
+    merged = load_baseline(path)
+    merged.update(results)
+    payload = {
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'pandas': pd.__version__},
+        'results': dict(sorted(merged.items()))
+    }
+    with open(path + '.tmp', 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the data processing functions on synthetic data")
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000], help="Dataset sizes (100k to 50M)")
+    parser.add_argument('--only', nargs='+', help="Benchmark name prefixes to run (e.g. 'cleaning' or 'loading.load_data')")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per benchmark (fastest counts)")
+    parser.add_argument('--shard-rows', type=int, default=1_000_000, help="Rows per generated CSV shard")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the generator")
+    parser.add_argument('--data-dir', default=os.path.join(config.PROCESSED_DATA_DIR, 'benchmarks'), help="Where generated shards are kept")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run's results as the new baseline")
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help="Allowed slowdown before a regression is reported")
+    parser.add_argument('--memory-tolerance', type=float, default=0.25, help="Allowed extra memory before a regression is reported")
+    parser.add_argument('--output', help="Also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    names = [n for n in BENCHMARKS if not args.only or any(n.startswith(prefix) for prefix in args.only)]
+    results = {}
+    for n_rows in args.rows:
+        print("*"*50)
+        print(f"Preparing {n_rows} rows...")
+        ctx = prepare_context(n_rows, args.data_dir, args.shard_rows, args.seed)
+        for name in names:
+            result = run_benchmark(name, ctx, args.repeat)
+            results[f"{name}@{n_rows}"] = result
+            print(f"{name:55s} {result['seconds']:9.4f}s {result['rows_per_sec'] or 0:>14,} rows/s "
+                  f"peak {result['peak_rss_mb']:8.1f} MB (+{result['rss_delta_mb']:.1f})")
+        shutil.rmtree(ctx['cache_dir'], ignore_errors=True)
+        del ctx
+        gc.collect()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare_to_baseline(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to: {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+
+    print("*"*50)
+    if regressions:
+        print("Regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Startup time of the CLI and of importing the data processing modules.
+
+Every target runs in a fresh interpreter, so each measurement includes the
+imports it triggers. Besides the time, each result lists the heavy plotting/GIS
+modules (matplotlib, seaborn, geopandas, shapely, pyproj) that got imported; the
+non-plotting paths must not import any of them. A run exits with status 1 when a
+target imports a heavy module or is slower than its baseline allows.
+
+Usage:
+    python -m benchmarks.startup --save-baseline
+    python -m benchmarks.startup
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run_benchmarks import load_baseline, save_baseline
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_baselines.json')
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'geopandas', 'shapely', 'pyproj']
+
+# name -> statement timed in a fresh interpreter (run from the repository root)
+TARGETS = {
+    'cli --help': "import runpy, sys; sys.argv = ['cli.py', '--help']\ntry:\n    runpy.run_path('cli.py', run_name='__main__')\nexcept SystemExit:\n    pass",
+    'main --help': "import runpy, sys; sys.argv = ['main.py', '--help']\ntry:\n    runpy.run_path('main.py', run_name='__main__')\nexcept SystemExit:\n    pass",
+    'import main': "import main",
+    'import loading': "import src.data_processing.loading",
+    'import cleaning': "import src.data_processing.cleaning",
+    'import transformation': "import src.data_processing.transformation",
+    'import validation': "import src.data_processing.validation",
+    'import registry': "import src.data_processing.registry",
+    'import batch': "import src.data_processing.batch",
+}
+
+_PROBE = """
+import io, sys, json, time, contextlib
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy_modules': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(name: str, repeat: int = 5) -> dict:
+    """
+    Time one target in `repeat` fresh interpreters.
+
+    Returns:
+    dict: seconds (fastest run, excluding interpreter start-up) and heavy_modules imported.
+    """
+    statement = '\n'.join('    ' + line for line in TARGETS[name].splitlines())
+    code = _PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    best, heavy = float('inf'), []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        best = min(best, result['seconds'])
+        heavy = result['heavy_modules']
+    return {'seconds': round(best, 4), 'heavy_modules': heavy}
+
+def check(results: dict, baseline: dict, time_tolerance: float, min_seconds: float = 0.05) -> list:
+    """List heavy imports and slowdowns beyond baseline * (1 + time_tolerance) (ignoring < min_seconds)."""
+    problems = []
+    for name, result in results.items():
+        if result['heavy_modules']:
+            problems.append(f"{name}: imports {', '.join(result['heavy_modules'])}")
+        base = baseline.get(name)
+        if base and result['seconds'] > base['seconds'] * (1 + time_tolerance) and result['seconds'] - base['seconds'] > min_seconds:
+            problems.append(f"{name}: {result['seconds']:.3f}s vs baseline {base['seconds']:.3f}s")
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure CLI and import startup time")
+    parser.add_argument('--only', nargs='+', help="Target name prefixes to run (e.g. 'cli' or 'import')")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per target (fastest counts)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run's results as the new baseline")
+    parser.add_argument('--time-tolerance', type=float, default=0.5, help="Allowed slowdown before a regression is reported")
+    args = parser.parse_args(argv)
+
+    names = [n for n in TARGETS if not args.only or any(n.startswith(prefix) for prefix in args.only)]
+    results = {}
+    for name in names:
+        results[name] = measure(name, args.repeat)
+        heavy = ', '.join(results[name]['heavy_modules']) or '-'
+        print(f"{name:25s} {results[name]['seconds']:8.3f}s   heavy imports: {heavy}")
+
+    baseline = load_baseline(args.baseline)
+    problems = check(results, baseline, args.time_tolerance)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to: {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+
+    print("*"*50)
+    if problems:
+        print("Regressions:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+
+def spelling_variants(name: str) -> List[str]:
+    """
+    Messy spellings of a name as they appear in the raw shards.
+
+    Every variant normalizes back to `name` with normalize_names, so the cleaning
+    mappings still resolve them.
+    """
+    variants = [name, name.upper(), name.title(), name.replace(' ', '  '), name.replace(' ', '-'), f" {name.title()}."]
+    return list(dict.fromkeys(variants))
+
+def build_locations(state_mapping: dict, state_configs: Optional[dict] = None, districts_per_state: int = 20,
+                    pins_per_district: int = 25, pincode_regions: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Location table the generator samples from: one row per (state, district).
+
+    States come from STATE_MAPPING (every raw spelling of a canonical state is kept).
+    States with a district mapping in `state_configs` use its raw district spellings;
+    other states get synthetic 'District N' names.
+
+    Parameters:
+    state_mapping (dict): config.STATE_MAPPING.
+    state_configs (dict, optional): config.STATE_CONFIGS.
+    districts_per_state (int): Districts generated for states without a mapping.
+    pins_per_district (int): Pincodes in each district's block.
+    pincode_regions (dict, optional): config.PINCODE_REGIONS; each state's pincode blocks then start
+        with its (first) postal region digit, so the pincode region rule accepts them.
+
+    Returns:
+    pd.DataFrame: state_spellings, district_spellings (lists) and first_pin per district.
+    """
+    state_configs = state_configs or {}
+    spellings = {}
+    for raw, canonical in state_mapping.items():
+        spellings.setdefault(canonical, []).extend(spelling_variants(raw))
+
+    rows = []
+    region_blocks = {}  # postal region -> districts already placed in it
+    for state_index, canonical in enumerate(sorted(spellings)):
+        mapping = state_configs.get(canonical, {}).get('district_mapping')
+        if mapping:
+            districts = {}
+            for raw, district in mapping.items():
+                districts.setdefault(district, []).extend(spelling_variants(raw))
+        else:
+            districts = {f"{canonical} District {i + 1}": spelling_variants(f"{canonical.lower()} district {i + 1}")
+                         for i in range(districts_per_state)}
+        if pincode_regions and canonical in pincode_regions:
+            region = pincode_regions[canonical][0]
+            state_first_pin = region * 100000 + 10000 + region_blocks.get(region, 0) * pins_per_district
+            region_blocks[region] = region_blocks.get(region, 0) + len(districts)
+        else:
+            state_first_pin = 110000 + state_index * 20000
+        for district_index, district in enumerate(sorted(districts)):
+            rows.append({
+                'state_spellings': list(dict.fromkeys(spellings[canonical])),
+                'district_spellings': list(dict.fromkeys(districts[district])),
+                'first_pin': state_first_pin + district_index * pins_per_district
+            })
+    return pd.DataFrame(rows)
+
+def _pick_spellings(rng: np.random.Generator, location_codes: np.ndarray, spellings: pd.Series, messy_fraction: float) -> pd.Categorical:
+    """Per row, the first (clean) spelling of its location or, with probability messy_fraction, a random variant."""
+    labels = pd.Index(dict.fromkeys(s for variants in spellings for s in variants))
+    first = labels.get_indexer([variants[0] for variants in spellings])
+    counts = np.array([len(variants) for variants in spellings])
+    offsets = np.append(0, np.cumsum(counts))[:-1]
+    flat = labels.get_indexer([s for variants in spellings for s in variants])
+
+    codes = first[location_codes]
+    messy = rng.random(len(location_codes)) < messy_fraction
+    variant = (rng.random(messy.sum()) * counts[location_codes[messy]]).astype(np.int64)
+    codes[messy] = flat[offsets[location_codes[messy]] + variant]
+    return pd.Categorical.from_codes(codes, labels)
+
+def generate_enrolment(n_rows: int, locations: pd.DataFrame, seed: int = 0, start_date: str = '2025-03-01', days: int = 120,
+                       pins_per_district: int = 25, messy_fraction: float = 0.3, shared_pin_fraction: float = 0.05,
+                       junk_fraction: float = 0.001) -> pd.DataFrame:
+    """
+    Generate enrolment rows shaped like the UIDAI API extracts.
+
+    Location popularity is skewed (Zipf-like), a fraction of names use messy
+    spellings, some rows use a pincode of the neighbouring district (the
+    multi-district pincodes validation looks for) and a few rows carry numeric
+    junk such as '100000' in the state and district columns.
+
+    Parameters:
+    n_rows (int): Number of rows.
+    locations (pd.DataFrame): Output of build_locations.
+    seed (int): Random seed.
+    start_date (str): First date.
+    days (int): Number of distinct dates.
+    pins_per_district (int): Must match build_locations.
+    messy_fraction (float): Share of rows with a non-canonical spelling.
+    shared_pin_fraction (float): Share of rows using the next district's pincodes.
+    junk_fraction (float): Share of rows with numeric state/district names.
+
+    Returns:
+    pd.DataFrame: date, state, district, pincode, age_0_5, age_5_17, age_18_greater
+    (names and dates as categoricals, counts as int32).
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(locations) + 1) ** 0.8
+    order = np.random.default_rng(0).permutation(len(locations))  # same popularity ranking for every shard
+    location_codes = rng.choice(order, size=n_rows, p=weights / weights.sum())
+
+    state = _pick_spellings(rng, location_codes, locations['state_spellings'], messy_fraction)
+    district = _pick_spellings(rng, location_codes, locations['district_spellings'], messy_fraction)
+
+    pin_location = location_codes.copy()
+    shared = rng.random(n_rows) < shared_pin_fraction
+    pin_location[shared] = (pin_location[shared] + 1) % len(locations)
+    pincode = (locations['first_pin'].to_numpy()[pin_location] + rng.integers(0, pins_per_district, n_rows)).astype('int32')
+
+    junk = rng.random(n_rows) < junk_fraction
+    if junk.any():
+        state = state.add_categories(['100000'])
+        state[junk] = '100000'
+        district = district.add_categories(['100000'])
+        district[junk] = '100000'
+
+    dates = pd.date_range(start_date, periods=days).strftime('%d-%m-%Y')
+    date = pd.Categorical.from_codes(rng.integers(0, days, n_rows), dates)
+
+    return pd.DataFrame({
+        'date': date,
+        'state': state,
+        'district': district,
+        'pincode': pincode,
+        'age_0_5': rng.geometric(0.08, n_rows).astype('int32'),
+        'age_5_17': rng.geometric(0.1, n_rows).astype('int32'),
+        'age_18_greater': rng.geometric(0.3, n_rows).astype('int32') - 1
+    })
+
+def write_shards(output_dir: str, n_rows: int, state_mapping: dict, state_configs: Optional[dict] = None, shard_rows: int = 1_000_000,
+                 seed: int = 0, pincode_regions: Optional[dict] = None, **generator_options) -> List[str]:
+    """
+    Write `n_rows` synthetic rows as CSV shards, one shard in memory at a time.
+
+    Existing shards are reused, so large datasets are only generated once. A
+    `_manifest.json` records the parameters the shards were generated with (sizes,
+    seed, locations and generator options); shards of a directory written with
+    other parameters are regenerated rather than reused.
+
+    Parameters:
+    output_dir (str): Directory for the shards.
+    n_rows (int): Total number of rows.
+    state_mapping (dict): config.STATE_MAPPING.
+    state_configs (dict, optional): config.STATE_CONFIGS.
+    shard_rows (int): Rows per shard.
+    seed (int): Base random seed; shard i uses seed + i.
+    pincode_regions (dict, optional): config.PINCODE_REGIONS (see build_locations).
+    **generator_options: Passed to generate_enrolment.
+
+    Returns:
+    list: Shard paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    locations = build_locations(state_mapping, state_configs, pincode_regions=pincode_regions)
+    manifest = {
+        'n_rows': n_rows,
+        'shard_rows': shard_rows,
+        'seed': seed,
+        'options': _options_key(state_mapping=state_mapping, state_configs=state_configs, pincode_regions=pincode_regions,
+                                **generator_options)
+    }
+    manifest_path = os.path.join(output_dir, '_manifest.json')
+    reuse = False
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            reuse = json.load(f) == manifest
+    if not reuse:
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        for name in os.listdir(output_dir):
+            if name.startswith('enrolment_') and name.endswith('.csv'):
+                os.remove(os.path.join(output_dir, name))
+
+    paths = []
+    for i, start in enumerate(range(0, n_rows, shard_rows)):
+        path = os.path.join(output_dir, f"enrolment_{i:04d}.csv")
+        if not os.path.exists(path):
+            shard = generate_enrolment(min(shard_rows, n_rows - start), locations, seed=seed + i, **generator_options)
+            shard.to_csv(path + '.tmp', index=False)
+            os.replace(path + '.tmp', path)
+            print(f"Generated {path} ({len(shard)} rows)")
+        paths.append(path)
+    # Written last, so an interrupted run is regenerated instead of reusing partial output
+    with open(manifest_path + '.tmp', 'w') as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return paths
+
+def _options_key(**options) -> str:
+    # Short digest of generator parameters (dicts, lists, numbers), stable across runs
+    text = json.dumps(options, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+def dataset_dir(base_dir: str, n_rows: int, seed: int = 0, shard_rows: int = 1_000_000, **options) -> str:
+    """
+    Directory holding the synthetic shards for a given size, seed, shard size and
+    generator options (e.g. pincode_regions, messy_fraction), so runs with other
+    parameters never share shards.
+    """
+    return os.path.join(base_dir, f"enrolment_{n_rows}_{seed}_{shard_rows}_{_options_key(**options)}")
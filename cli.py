@@ -0,0 +1,106 @@
+"""
+Command line entry point of the enrolment analysis.
+
+Arguments are parsed before the pipeline (pandas, pyarrow and the data processing
+modules) is imported, so `--help` and argument errors return immediately, and
+matplotlib/geopandas are only imported once a heatmap is actually drawn. Startup
+time is tracked by benchmarks/startup.py.
+
+Usage:
+    python cli.py                       # West Bengal analysis (same as python main.py)
+    python cli.py --batch --states Bihar 'West Bengal'
+    python cli.py --help
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings as config
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="UIDAI enrolment analysis")
+    parser.add_argument('--streaming', action='store_true', help="Aggregate in chunks instead of loading all data into memory")
+    parser.add_argument('--chunksize', type=int, default=config.STREAMING_CHUNK_SIZE, help="Rows per chunk in streaming mode")
+    parser.add_argument('--batch', action='store_true', help="Process all states (or --states) in parallel")
+    parser.add_argument('--states', nargs='+', help="States to process in batch mode (default: all)")
+    parser.add_argument('--workers', type=int, default=config.BATCH_MAX_WORKERS, help="Worker processes in batch mode")
+    parser.add_argument('--build-cube', nargs='*', metavar='DATASET', help="Build rollup cubes (default: every dataset with data)")
+    parser.add_argument('--build-store', nargs='*', metavar='DATASET', help="Write cleaned rows partitioned by state and month (default: every dataset with data)")
+    parser.add_argument('--incremental', nargs='*', metavar='DATASET', help="Ingest only new or changed shards into the cubes")
+    parser.add_argument('--lazy', action='store_true', help="Run the West Bengal export as a lazy pipeline (filter pushed down per shard)")
+    parser.add_argument('--anomalies', nargs='*', metavar='DATASET', help="Rank per-pincode enrolment spikes (default: every dataset with data)")
+    parser.add_argument('--validate', nargs='*', metavar='DATASET', help="Run the data-quality rules and quarantine failing rows (default: every dataset with data)")
+    parser.add_argument('--serve', nargs='?', type=int, const=config.SERVICE_PORT, metavar='PORT',
+                        help="Serve the stored cubes over HTTP on localhost (build them first with --build-cube)")
+    parser.add_argument('--join', nargs='*', metavar='DATASET', help="Join datasets into one wide fact table")
+    parser.add_argument('--backend', choices=['pandas', 'partitioned'], default=config.EXECUTION_BACKEND,
+                        help="Execution backend of the default run (config.EXECUTION_BACKEND)")
+    parser.add_argument('--no-preview', action='store_true', help="Skip the debug df.head() output after each step")
+    parser.add_argument('--no-report', action='store_true', help="Do not write the per-stage run report")
+    return parser
+
+def main(argv=None, app=None) -> int:
+    """
+    Parse `argv` and run the selected mode.
+
+    Parameters:
+    argv (list, optional): Arguments (default: sys.argv[1:]).
+    app (module, optional): Module with the main_* functions; main.py passes itself,
+        otherwise it is imported here, after parsing.
+
+    Returns:
+    int: Exit status.
+    """
+    args = build_parser().parse_args(argv)
+    if args.no_preview:
+        config.DEBUG_PREVIEW = False
+
+    if app is None:
+        import main as app
+    from src.utils.instrumentation import end_run, start_run
+
+    if args.serve is not None:
+        # Long-running; the run report would only cover start-up
+        app.main_serve(args.serve)
+        return 0
+    if args.join is not None:
+        mode, run = 'join', lambda: app.main_join(args.join)
+    elif args.validate is not None:
+        mode, run = 'validate', lambda: app.main_validate(args.validate)
+    elif args.anomalies is not None:
+        mode, run = 'anomalies', lambda: app.main_anomalies(args.anomalies)
+    elif args.incremental is not None:
+        mode, run = 'incremental', lambda: app.main_incremental(args.incremental)
+    elif args.build_store is not None:
+        mode, run = 'store', lambda: app.main_store(args.build_store)
+    elif args.build_cube is not None:
+        mode, run = 'cube', lambda: app.main_cube(args.build_cube)
+    elif args.batch:
+        mode, run = 'batch', lambda: app.main_batch(args.states, args.workers)
+    elif args.streaming:
+        mode, run = 'streaming', lambda: app.main_streaming(args.chunksize)
+    elif args.lazy:
+        mode, run = 'lazy', app.main_lazy
+    elif args.backend == 'partitioned':
+        mode, run = 'partitioned', app.main_partitioned
+    else:
+        mode, run = 'main', app.main
+
+    if config.RUN_REPORT_ENABLED and not args.no_report:
+        start_run(mode)
+        try:
+            run()
+        finally:
+            report = end_run()
+            print("*"*50)
+            print("Run report:")
+            print(report.summary().to_string(index=False))
+            print(f"Saved run report to: {report.save(config.RUN_REPORT_DIR)}")
+    else:
+        run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
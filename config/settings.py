@@ -1,4 +1,5 @@
 import os
+import glob
 
 # Base directory (1 level up from config/)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -29,6 +30,79 @@ ENROLMENT_DATA_PATHS = [os.path.join(RAW_DATA_DIR, f) for f in ENROLMENT_DATA_FI
 DEMOGRAPHIC_DATA_DIR = os.path.join(RAW_DATA_DIR, "api_data_aadhar_demographic")
 DEMOGRAPHIC_DATA_PATHS = [os.path.join(DEMOGRAPHIC_DATA_DIR, f) for f in DEMOGRAPHIC_DATA_FILES]
 
+# Biometric shards are picked up from their directory as they arrive
+BIOMETRIC_DATA_DIR = os.path.join(RAW_DATA_DIR, "api_data_aadhar_biometric")
+BIOMETRIC_DATA_PATHS = sorted(glob.glob(os.path.join(BIOMETRIC_DATA_DIR, "api_data_aadhar_biometric_*.csv")))
+
+DATASET_PATHS = {
+    'enrolment': ENROLMENT_DATA_PATHS,
+    'demographic': DEMOGRAPHIC_DATA_PATHS,
+    'biometric': BIOMETRIC_DATA_PATHS
+}
+
+# Column schemas used by load_data (only these columns are read, with these dtypes).
+# Location and date columns repeat a few hundred values across millions of rows, so
+# they are read as categories; pincodes and counts fit comfortably in 32 bits. They use
+# the nullable Int32 type so blank cells load as missing values (and are quarantined by
+# the pincode_integer / count rules) instead of failing the whole read.
+ENROLMENT_SCHEMA = {
+    'date': 'category',
+    'state': 'category',
+    'district': 'category',
+    'pincode': 'Int32',
+    'age_0_5': 'Int32',
+    'age_5_17': 'Int32',
+    'age_18_greater': 'Int32'
+}
+
+DEMOGRAPHIC_SCHEMA = {
+    'date': 'category',
+    'state': 'category',
+    'district': 'category',
+    'pincode': 'Int32',
+    'demo_age_5_17': 'Int32',
+    'demo_age_17_': 'Int32'
+}
+
+BIOMETRIC_SCHEMA = {
+    'date': 'category',
+    'state': 'category',
+    'district': 'category',
+    'pincode': 'Int32',
+    'bio_age_5_17': 'Int32',
+    'bio_age_17_': 'Int32'
+}
+
+DATASET_SCHEMAS = {
+    'enrolment': ENROLMENT_SCHEMA,
+    'demographic': DEMOGRAPHIC_SCHEMA,
+    'biometric': BIOMETRIC_SCHEMA
+}
+
+# Count columns of each dataset (everything in the schema except date and location)
+DATASET_VALUE_COLUMNS = {
+    dataset: [c for c in schema if c not in ('date', 'state', 'district', 'pincode')]
+    for dataset, schema in DATASET_SCHEMAS.items()
+}
+
+# Number of shards read concurrently by load_data (None lets the executor decide)
+LOADER_MAX_WORKERS = None
+
+# Rows per chunk when aggregating in streaming mode (python main.py --streaming)
+STREAMING_CHUNK_SIZE = 250_000
+
+# Execution backend of main(): 'pandas' loads all rows into one DataFrame; 'partitioned'
+# reduces each shard in a worker process and merges partial aggregates (out of core)
+EXECUTION_BACKEND = 'pandas'
+PARTITION_MAX_WORKERS = None
+PARTITION_CHUNK_SIZE = STREAMING_CHUNK_SIZE
+
+# Columnar cache of parsed shards (Feather files in PROCESSED_DATA_DIR)
+USE_DATA_CACHE = True
+CACHE_DIR = os.path.join(PROCESSED_DATA_DIR, "cache")
+# Bump when the schemas above or the cached layout change to invalidate old entries
+CACHE_SCHEMA_VERSION = 1
+
 # Mapping dictionary for state name corrections
 STATE_MAPPING = {
     # Andaman and Nicobar Islands
@@ -144,13 +218,23 @@ STATE_MAPPING = {
     
     # Uttarakhand
     'uttarakhand': 'Uttarakhand',
+    'uttaranchal': 'Uttarakhand',
     
     # West Bengal
     'west bengal': 'West Bengal',
     'west bangal': 'West Bengal',
     'westbengal': 'West Bengal',
     'west  bengal': 'West Bengal',
-    'westbengal ': 'West Bengal'
+    'westbengal ': 'West Bengal',
+
+    # Cities and localities reported in the state column
+    'darbhanga': 'Bihar',
+    'puttenahalli': 'Karnataka',
+    'balanagar': 'Telangana',
+    'jaipur': 'Rajasthan',
+    'madanapalle': 'Andhra Pradesh',
+    'nagpur': 'Maharashtra',
+    'raja annamalai puram': 'Tamil Nadu'
 }
 
 # District mapping for West Bengal
@@ -222,7 +306,6 @@ DISTRICT_MAPPING_WB = {
     # North 24 Parganas
     'north 24 parganas': 'North 24 Parganas',
     '24 parganas north': 'North 24 Parganas',
-    '24 Paraganas North': 'North 24 Parganas',
     'north twenty four parganas': 'North 24 Parganas',
 
     # South 24 Parganas
@@ -250,3 +333,106 @@ DISTRICT_MAPPING_WB = {
     'purba bardhaman': 'Purba Bardhaman',
     'paschim bardhaman': 'Paschim Bardhaman'
 }
+
+# Output directory for exported tables and plots
+RESULTS_DIR = os.path.join(BASE_DIR, "results")
+
+# Per-state configuration for the batch run. States not listed here keep their
+# district names as found (after basic normalization) and look for
+# '<state_slug>_districts.geojson' in RAW_DATA_DIR.
+STATE_CONFIGS = {
+    'West Bengal': {
+        'slug': 'wb',
+        'district_mapping': DISTRICT_MAPPING_WB,
+        'geojson_path': os.path.join(RAW_DATA_DIR, 'west_bengal_districts.geojson')
+    }
+}
+
+# Number of states processed in parallel by the batch run (None uses all cores)
+BATCH_MAX_WORKERS = None
+
+# Heatmap rendering: pickled district geometries are cached here by file hash
+GEOMETRY_CACHE_DIR = os.path.join(PROCESSED_DATA_DIR, "geometry")
+# Polygon simplification tolerance in CRS units (None keeps full detail)
+GEOMETRY_SIMPLIFY_TOLERANCE = None
+HEATMAP_DPI = 300
+
+# Pincode centroids (CSV with pincode, latitude, longitude; e.g. the India Post pincode directory).
+# When present, multi-district pincodes are also settled by locating the centroid in the district
+# boundaries (src/data_processing/spatial.py). Points outside every district are assigned to the
+# nearest one within SPATIAL_MAX_DISTANCE degrees (None disables the fallback)
+PINCODE_CENTROIDS_PATH = os.path.join(RAW_DATA_DIR, "pincode_centroids.csv")
+SPATIAL_MAX_DISTANCE = 0.05
+
+# Precomputed state x district x pincode x month rollups (one Parquet file per dataset)
+CUBE_DIR = os.path.join(PROCESSED_DATA_DIR, "cube")
+# Manifests and per-shard partial cubes for incremental ingestion (one sub-directory per dataset)
+INCREMENTAL_DIR = os.path.join(PROCESSED_DATA_DIR, "incremental")
+
+# Persisted state/district master tables with stable integer ids
+LOCATIONS_PATH = os.path.join(PROCESSED_DATA_DIR, "locations.json")
+
+# Cleaned rows partitioned by state and month (one Parquet file each) with a statistics index of row
+# counts, date and pincode ranges (python cli.py --build-store). main() reads only the West Bengal
+# partitions while the store matches the raw files; otherwise it loads and filters every shard
+STORE_DIR = os.path.join(PROCESSED_DATA_DIR, "store")
+USE_STORE = True
+
+# Wide (date, state, district, pincode) table joining all datasets
+FACT_TABLE_PATH = os.path.join(PROCESSED_DATA_DIR, "fact_table.parquet")
+
+# Exports (src/data_processing/export.py): 'parquet', 'csv' or 'jsonl' (gzip-compressed JSON lines).
+# Pincode-level aggregates are partitioned into EXPORT_DIR/<name>/<column>=<value>/ directories;
+# Excel is only written as a summary of the small district level aggregate
+EXPORT_FORMAT = 'parquet'
+EXPORT_DIR = os.path.join(RESULTS_DIR, "exports")
+EXPORT_PARTITION_BY = ['state_cleaned', 'month']
+EXPORT_EXCEL_SUMMARY = True
+EXPORT_MAX_WORKERS = None
+EXPORT_CHUNK_ROWS = 100_000
+
+# Spike detection on pincode x day totals (src/data_processing/anomaly.py): a day is flagged when its
+# robust z-score against the trailing ANOMALY_WINDOW-day median/MAD reaches ANOMALY_Z_THRESHOLD
+ANOMALY_WINDOW = 28
+ANOMALY_MIN_PERIODS = 7
+ANOMALY_Z_THRESHOLD = 5.0
+ANOMALY_MIN_COUNT = 20
+
+# Data-quality rules (validation.default_rules) run after state cleaning; violating rows are
+# quarantined to EXPORT_DIR/<dataset>_quarantine instead of being dropped silently.
+# PINCODE_REGIONS lists the first pincode digit(s) (postal region) of each state
+QUALITY_RULES_ENABLED = True
+QUALITY_PINCODE_RANGE = (110000, 999999)
+QUALITY_CHUNK_ROWS = 1_000_000
+PINCODE_REGIONS = {
+    'Delhi': [1], 'Haryana': [1], 'Punjab': [1], 'Himachal Pradesh': [1], 'Jammu and Kashmir': [1], 'Ladakh': [1], 'Chandigarh': [1],
+    'Uttar Pradesh': [2], 'Uttarakhand': [2],
+    'Rajasthan': [3], 'Gujarat': [3], 'Dadra and Nagar Haveli and Daman and Diu': [3],
+    'Maharashtra': [4], 'Madhya Pradesh': [4], 'Chhattisgarh': [4], 'Goa': [4],
+    'Andhra Pradesh': [5], 'Telangana': [5], 'Karnataka': [5],
+    'Tamil Nadu': [6], 'Kerala': [6], 'Lakshadweep': [6], 'Puducherry': [5, 6],
+    'West Bengal': [7], 'Odisha': [7], 'Assam': [7], 'Arunachal Pradesh': [7], 'Manipur': [7], 'Meghalaya': [7], 'Mizoram': [7],
+    'Nagaland': [7], 'Tripura': [7], 'Sikkim': [7], 'Andaman and Nicobar Islands': [7],
+    'Bihar': [8], 'Jharkhand': [8]
+}
+
+# Local query service over the stored cubes (python cli.py --serve); binds to localhost only
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 8050
+SERVICE_CACHE_SIZE = 512
+
+# Run reports with per-stage wall/CPU time, rows and peak memory (JSON, one file per run)
+RUN_REPORT_ENABLED = True
+RUN_REPORT_DIR = os.path.join(RESULTS_DIR, "run_reports")
+# Print df.head() after every step of main(); turn off for large runs (python main.py --no-preview)
+DEBUG_PREVIEW = True
+
+# Fuzzy resolution of names missing from the mappings (src/data_processing/resolver.py).
+# Accepted matches are kept per state in ALIAS_CACHE_DIR ('<slug>_districts.json', 'states.json')
+ALIAS_CACHE_DIR = os.path.join(PROCESSED_DATA_DIR, "aliases")
+RESOLVER_THRESHOLD = 0.7
+RESOLVER_MIN_MARGIN = 0.05
+
+# Per-state districts, alias mappings and boundaries shared by cleaning and plotting
+# (src/data_processing/registry.py); least recently used states are dropped beyond this
+REGISTRY_MAX_STATES = 8
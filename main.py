@@ -1,8 +1,6 @@
 import sys
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -12,135 +10,280 @@ from src.data_processing.loading import load_data
 from src.data_processing.transformation import (
     date_format_change,  
     extract_month_from_date, 
-    plot_state_enrolment_heatmap
+    plot_state_enrolment_heatmap,
+    render_district_heatmap
 )
-from src.data_processing.cleaning import clean_name, drop_columns
+from src.data_processing.cleaning import clean_name, clean_district_names, drop_columns
 from src.data_processing.transformation import filter_by_state
-from src.data_processing.validation import (
-    get_dominant_district_per_pincode, 
-    flag_multi_district_pincodes, 
-    unique_pincode_count, 
-    get_pin_district_count, 
-    flag_problematic_enrolments, 
-    aggregate_enrolments_by_district_pincode
-)
+from src.data_processing.streaming import stream_state_aggregate
+from src.data_processing.anomaly import detect_spikes
+from src.data_processing.batch import run_batch
+from src.data_processing.cube import build_cube, load_cube, save_cube
+from src.data_processing.export import EXPORT_FORMATS, export_aggregate
+from src.data_processing.incremental import ingest_incremental
+from src.data_processing.joins import encode_keys, join_encoded
+from src.data_processing.locations import LocationDictionary
+from src.data_processing.partitioned import run_partitioned
+from src.data_processing.pipeline import Pipeline
+from src.data_processing.registry import get_registry
+from src.data_processing.resolver import build_state_resolver
+from src.data_processing.spatial import load_pincode_centroids
+from src.data_processing.store import build_store, load_store, settings_hash, store_is_current
+from src.data_processing.validation import PincodeDistrictIntegrity, default_rules
+from src.service.server import QueryService, serve
+from src.utils.instrumentation import stage
 
-def main():
+def state_resolver():
+    # Fuzzy fallback for state spellings missing from STATE_MAPPING
+    return build_state_resolver(config.STATE_MAPPING, config.ALIAS_CACHE_DIR,
+                                threshold=config.RESOLVER_THRESHOLD, min_margin=config.RESOLVER_MIN_MARGIN)
+
+def registry():
+    # Shared per-state district mappings, resolvers and boundaries, loaded on first use
+    return get_registry(
+        config.STATE_CONFIGS,
+        config.RAW_DATA_DIR,
+        alias_dir=config.ALIAS_CACHE_DIR,
+        geometry_cache_dir=config.GEOMETRY_CACHE_DIR,
+        simplify_tolerance=config.GEOMETRY_SIMPLIFY_TOLERANCE,
+        max_states=config.REGISTRY_MAX_STATES,
+        resolver_options={'threshold': config.RESOLVER_THRESHOLD, 'min_margin': config.RESOLVER_MIN_MARGIN}
+    )
+
+def spatial_reference(state_name):
+    # Pincode -> district table from the centroid file and the state's boundaries (None if either is missing)
+    if not os.path.exists(config.PINCODE_CENTROIDS_PATH):
+        return None
+    resolver = registry().spatial_resolver(state_name)
+    if resolver is None:
+        return None
+    return resolver.assign(load_pincode_centroids(config.PINCODE_CENTROIDS_PATH), config.SPATIAL_MAX_DISTANCE)
+
+def quality_rules(dataset, enabled=None):
+    # The declared data-quality rules of a dataset, or None when they are off (enabled defaults to config.QUALITY_RULES_ENABLED).
+    # Every execution path (main, batch, streaming, lazy, partitioned, incremental, load_clean_dataset) applies this same set
+    if not (config.QUALITY_RULES_ENABLED if enabled is None else enabled):
+        return None
+    return default_rules(config.DATASET_VALUE_COLUMNS[dataset], set(config.STATE_MAPPING.values()), config.PINCODE_REGIONS,
+                         config.QUALITY_PINCODE_RANGE)
+
+def apply_quality_rules(df, dataset):
+    # Declared data-quality rules; violating rows are exported to a quarantine file instead of being dropped silently
+    rules = quality_rules(dataset, enabled=True)
+    with stage('quality_rules', len(df)) as record:
+        result = rules.validate(df, config.QUALITY_CHUNK_ROWS)
+        record['rows_out'] = len(result['valid'])
+    report_quality(result, dataset)
+    return result['valid']
+
+def report_quality(result, dataset):
+    # Prints per-rule violation counts and exports the quarantined rows (a validate() or DataQualityRules.merge result)
+    print(f"Data-quality rules on {dataset}: {len(result['quarantine'])} of {result['rows']} rows quarantined")
+    print(result['counts'][['rule', 'kind', 'violations', 'share']].to_string(index=False))
+    if len(result['quarantine']):
+        exported = export_aggregate(result['quarantine'], config.EXPORT_DIR, f"{dataset}_quarantine", config.EXPORT_FORMAT,
+                                    chunk_rows=config.EXPORT_CHUNK_ROWS)
+        print(f"Quarantined rows saved to: {exported['path']}")
+
+def export_district_level(dist_level, name):
+    # District totals in config.EXPORT_FORMAT, plus the Excel summary sheet (config.EXPORT_EXCEL_SUMMARY)
+    result = export_aggregate(dist_level, config.EXPORT_DIR, name, config.EXPORT_FORMAT,
+                              excel_summary=config.EXPORT_EXCEL_SUMMARY, chunk_rows=config.EXPORT_CHUNK_ROWS)
+    print(f"Exported district level data to: {result['path']}")
+    if result['excel_path']:
+        print(f"Excel summary: {result['excel_path']}")
+    return result
+
+def preview(df):
+    # Debug output after each step; costs real time on wide frames (config.DEBUG_PREVIEW / --no-preview)
+    if config.DEBUG_PREVIEW:
+        print(df.head())
+
+def load_state_rows(state_name):
+    # Loads every shard, cleans state names and keeps one state's rows (the path without a current store)
     # Load Data
     print("Loading data...")
-    enrolment_df = load_data(config.ENROLMENT_DATA_PATHS)
+    with stage('load') as record:
+        enrolment_df = load_data(
+            config.ENROLMENT_DATA_PATHS,
+            config.ENROLMENT_SCHEMA,
+            config.LOADER_MAX_WORKERS,
+            cache_dir=config.CACHE_DIR if config.USE_DATA_CACHE else None,
+            cache_version=config.CACHE_SCHEMA_VERSION
+        )
+        record['rows_out'] = len(enrolment_df)
     print("*"*50)
     print("Enrolment data:")
-    print(enrolment_df.head())
+    preview(enrolment_df)
     
     # Date Formatting
     print("*"*50)
     print("Formatting dates...")
-    enrolment_df = date_format_change(enrolment_df, 'enrolment_date')
+    with stage('format_dates'):
+        enrolment_df = date_format_change(enrolment_df, 'enrolment_date')
     print("Formatted enrolment data:")
-    print(enrolment_df.head())
+    preview(enrolment_df)
     
     # Clean State Names
     print("*"*50)
     print("Cleaning state names...")
-    enrolment_df = clean_name(enrolment_df, 'state', config.STATE_MAPPING, 'state_cleaned')
-    unique_states = enrolment_df['state_cleaned'].unique()
-    print(f"Unique states after cleaning: {unique_states}") # Todo: Handle this 37 -> 36
+    with stage('clean_states'):
+        states_resolver = state_resolver()
+        enrolment_df = clean_name(enrolment_df, 'state', config.STATE_MAPPING, 'state_cleaned', states_resolver)
+        states_resolver.save()
+
+    # Junk such as state '100000' or unmapped names is quarantined here, leaving the 36 states/UTs
+    if config.QUALITY_RULES_ENABLED:
+        print("*"*50)
+        enrolment_df = apply_quality_rules(enrolment_df, 'enrolment')
+    unique_states = sorted(enrolment_df['state_cleaned'].dropna().unique())
+    print(f"Unique states after cleaning ({len(unique_states)}): {unique_states}")
     print("Cleaned enrolment data:")
-    print(enrolment_df.head())
+    preview(enrolment_df)
     
-    # Filter for West Bengal
+    # Filter for the state
     print("*"*50)
-    print("Filtering for West Bengal...")
-    wb_df = filter_by_state(enrolment_df, 'West Bengal')
+    print(f"Filtering for {state_name}...")
+    with stage('filter_state', len(enrolment_df)) as record:
+        state_df = filter_by_state(enrolment_df, state_name)
+        # Create a copy to avoid SettingWithCopyWarning
+        state_df = state_df.copy()
+        record['rows_out'] = len(state_df)
+    return state_df
+
+def cleaning_settings(dataset):
+    # Digest of everything load_clean_dataset cleans rows with (stored in the store index and the incremental manifest);
+    # output built with other mappings, accepted aliases or data-quality rules is stale even if the raw files are unchanged
+    aliases = {}
+    if os.path.isdir(config.ALIAS_CACHE_DIR):
+        for name in sorted(os.listdir(config.ALIAS_CACHE_DIR)):
+            if name.endswith('.json'):
+                with open(os.path.join(config.ALIAS_CACHE_DIR, name)) as f:
+                    aliases[name] = f.read()
+    rules = quality_rules(dataset)
+    return settings_hash({
+        'state_mapping': config.STATE_MAPPING,
+        'state_configs': config.STATE_CONFIGS,
+        'aliases': aliases,
+        'quality_rules': None if rules is None else {
+            'rules': [repr(rule) for rule in rules.rules],
+            'pincode_regions': config.PINCODE_REGIONS,
+            'pincode_range': config.QUALITY_PINCODE_RANGE
+        }
+    })
+
+def main():
+    # West Bengal rows come from the partitioned store when it is current (python cli.py --build-store);
+    # only its West Bengal partitions are read. Otherwise all shards are loaded, cleaned and filtered
+    if config.USE_STORE and store_is_current(config.STORE_DIR, 'enrolment', config.ENROLMENT_DATA_PATHS, config.ENROLMENT_SCHEMA,
+                                             config.CACHE_SCHEMA_VERSION, cleaning_settings('enrolment')):
+        print("Loading West Bengal from the partitioned store...")
+        with stage('load_store') as record:
+            wb_df = load_store(config.STORE_DIR, 'enrolment', states=['West Bengal'], max_workers=config.LOADER_MAX_WORKERS)
+            record['rows_out'] = len(wb_df)
+        if wb_df.empty:
+            print(f"The enrolment store at {config.STORE_DIR} has no West Bengal rows; stopping.")
+            return
+    else:
+        wb_df = load_state_rows('West Bengal')
     print(f"West Bengal data shape: {wb_df.shape}")
+    if wb_df.empty:
+        # Every later stage (district cleaning, validation, heatmap, exports) needs rows
+        print("No West Bengal rows left after state cleaning and the data-quality rules "
+              "(see the quarantine export and its rule counts); stopping.")
+        return
     print("West Bengal data:")
-    print(wb_df.head())
+    preview(wb_df)
     
     # Clean District Names for West Bengal
     print("*"*50)
     print("Cleaning district names for West Bengal...")
-    # Create a copy to avoid SettingWithCopyWarning
-    wb_df = wb_df.copy()
-    wb_df = clean_name(wb_df, 'district', config.DISTRICT_MAPPING_WB, 'district_cleaned')
+    with stage('clean_districts'):
+        # Spellings missing from the mapping (e.g. '24 Paraganas North') are matched by the resolver
+        wb_df = registry().clean_districts(wb_df, 'West Bengal')
+        registry().save()
     unique_districts = wb_df['district_cleaned'].nunique()
     print(f"Unique districts in West Bengal after cleaning: {unique_districts}")
     print("Cleaned West Bengal data:")
-    print(wb_df.head())
-    
-    # Todo: Remove Hard coding
-    print("*"*50)
-    print("*"*50)
-    wb_df['district_cleaned'] = wb_df['district_cleaned'].replace({
-        '24 Paraganas North': 'North 24 Parganas',
-        '24 Paraganas South': 'South 24 Parganas'
-    })
-    unique_districts = wb_df['district_cleaned'].nunique()
-    print(f"Unique districts in West Bengal after cleaning: {unique_districts}")
-    print("Cleaned West Bengal data:")
-    print(wb_df.head())
+    preview(wb_df)
     print("*"*50)
 
-    # Get unique pincode count
-    print("*"*50)
-    unique_pincode_count_df = unique_pincode_count(wb_df)
-    print("Unique pincode count:")
-    print(unique_pincode_count_df)
+    with stage('validation'):
+        # Build the pincode x district integrity index (one groupby for all checks)
+        print("*"*50)
+        integrity = PincodeDistrictIntegrity(wb_df, ['age_0_5', 'age_5_17', 'age_18_greater'])
 
-    # Get pincode district count
-    print("*"*50)
-    pincode_district_count_df = get_pin_district_count(wb_df)
-    print("Pincode district count:")
-    print(pincode_district_count_df)
+        # Get unique pincode count
+        print("*"*50)
+        unique_pincode_count_df = integrity.unique_pincode_count()
+        print("Unique pincode count:")
+        print(unique_pincode_count_df)
 
-    # Get problem pins
-    print("*"*50)
-    problem_pins = pincode_district_count_df[
-    pincode_district_count_df['district_count'] > 1
-    ]
-    print("Problematic pins:")
-    print(problem_pins[['pincode', 'district_count']])
+        # Get pincode district count
+        print("*"*50)
+        pincode_district_count_df = integrity.pin_district_count()
+        print("Pincode district count:")
+        print(pincode_district_count_df)
 
-    # Flag Problematic Enrolments
-    print("*"*50)
-    flagged_pincode_dominant = aggregate_enrolments_by_district_pincode(
-    flag_problematic_enrolments(wb_df, problem_pins), ['age_0_5', 'age_5_17', 'age_18_greater'])
-    print("Flagged problematic enrolments aggregated by district and pincode:")
-    print(flagged_pincode_dominant)
-    
-    print("*"*50)
-    dominant_districts = get_dominant_district_per_pincode(flagged_pincode_dominant, ['age_0_5', 'age_5_17', 'age_18_greater'])
-    print("Dominant districts per problematic pincode:")
-    print(dominant_districts)
+        # Get problem pins
+        print("*"*50)
+        problem_pins = integrity.problem_pins()
+        print("Problematic pins:")
+        print(problem_pins[['pincode', 'district_count']])
 
-    # Flag Multi-District Pincodes
-    print("*"*50)
-    wb_df = flag_multi_district_pincodes(wb_df)
+        # Flag Problematic Enrolments
+        print("*"*50)
+        flagged_pincode_dominant = integrity.problematic_aggregate()
+        print("Flagged problematic enrolments aggregated by district and pincode:")
+        print(flagged_pincode_dominant)
+        
+        print("*"*50)
+        dominant_districts = integrity.dominant_districts()
+        print("Dominant districts per problematic pincode:")
+        print(dominant_districts)
+
+        # Flag Multi-District Pincodes
+        print("*"*50)
+        wb_df = integrity.flag_rows(wb_df)
+
+    with stage('spatial_resolution'):
+        # Settle multi-district pincodes geographically when pincode centroids are available
+        reference = spatial_reference('West Bengal')
+        if reference is not None:
+            print("*"*50)
+            resolved = integrity.reference_districts(reference)
+            located = int((resolved['source'] == 'reference').sum())
+            print(f"Multi-district pincodes located in district boundaries: {located} of {len(resolved)} "
+                  f"({int(resolved['agrees'].sum())} agree with the enrolment majority)")
+            print(resolved)
     print("West Bengal data with multi-district pincode flag:")
-    print(wb_df.head())
+    preview(wb_df)
 
     # Extract Month from Enrolment Date
     print("*"*50)
-    wb_df = extract_month_from_date(wb_df, 'enrolment_date', 'month')
-    print("West Bengal data with extracted month:")
-    print(wb_df.head())
-    
-    # Calculate total enrolments
-    print("*"*50)
-    wb_df['total_enroll'] = wb_df['age_0_5']+wb_df['age_5_17']+wb_df['age_18_greater']
+    with stage('derive_columns'):
+        wb_df = extract_month_from_date(wb_df, 'enrolment_date', 'month')
+        print("West Bengal data with extracted month:")
+        preview(wb_df)
+        
+        # Calculate total enrolments
+        print("*"*50)
+        wb_df['total_enroll'] = wb_df['age_0_5']+wb_df['age_5_17']+wb_df['age_18_greater']
     print("West Bengal data with total enrolments:")
-    print(wb_df.head())
+    preview(wb_df)
 
     # Drop unnecessary columns if needed
     print("*"*50)
     columns_to_drop = ['date','district','state']  # Replace with actual column names to drop
     wb_df_cleaned = drop_columns(wb_df, columns_to_drop)
     print("Final West Bengal data after dropping unnecessary columns:")
-    print(wb_df_cleaned.head())
+    preview(wb_df_cleaned)
 
     # Group by district and calculate total enrolments
     print("*"*50)
-    wb_df_dist_level=wb_df_cleaned.groupby('district_cleaned')[['age_0_5','age_5_17','age_18_greater','total_enroll']].sum()
+    with stage('aggregate', len(wb_df_cleaned)) as record:
+        wb_df_dist_level=wb_df_cleaned.groupby('district_cleaned', observed=True)[['age_0_5','age_5_17','age_18_greater','total_enroll']].sum()
+        record['rows_out'] = len(wb_df_dist_level)
     print(wb_df_dist_level.shape)
     print("West Bengal district level enrolment data:")
     print(wb_df_dist_level)
@@ -151,11 +294,22 @@ def main():
     print("West Bengal district level enrolment data sorted by total enrolments:")
     print(wb_df_dist_level)
 
-    # Export to Excel
+    # Export district totals and the pincode x month aggregate (partitioned by state and month)
     print("*"*50)
-    excel_output_path = os.path.join(config.BASE_DIR, 'results', 'wb_enrolment_df_dist_level_filtered.xlsx')
-    wb_df_dist_level.to_excel(excel_output_path)
-    print(f"Exported district level data to: {excel_output_path}")
+    with stage('export'):
+        export_district_level(wb_df_dist_level, 'wb_enrolment_df_dist_level_filtered')
+        pincode_level = wb_df_cleaned.groupby(['state_cleaned', 'month', 'district_cleaned', 'pincode'], observed=True)[
+            ['age_0_5', 'age_5_17', 'age_18_greater', 'total_enroll']].sum()
+        pincode_export = export_aggregate(
+            pincode_level,
+            config.EXPORT_DIR,
+            'enrolment_pincode_month',
+            config.EXPORT_FORMAT,
+            partition_by=config.EXPORT_PARTITION_BY,
+            max_workers=config.EXPORT_MAX_WORKERS,
+            chunk_rows=config.EXPORT_CHUNK_ROWS
+        )
+    print(f"Exported pincode level data ({pincode_export['rows']} rows, {len(pincode_export['files'])} partitions) to: {pincode_export['path']}")
 
     # Get top 10 districts by total enrolments
     print("*"*50)
@@ -164,13 +318,339 @@ def main():
     print(wb_df_dist_level_top_10)
 
     print("*"*50)
-    plot_state_enrolment_heatmap(
-    enrolment_df=wb_df,  # Assuming wb_df is available from previous cells. Or use original 'enrolment_df'
-    state_name='West Bengal',
-    geojson_path=os.path.join(config.RAW_DATA_DIR, 'west_bengal_districts.geojson'),
-    output_path=os.path.join(config.BASE_DIR, 'results', 'wb_enrolment_heatmap_generic.png'),
-    district_mapping=config.DISTRICT_MAPPING_WB
+    with stage('heatmap'):
+        plot_state_enrolment_heatmap(
+        enrolment_df=wb_df,  # Already has district_cleaned; boundaries come from the registry
+        state_name='West Bengal',
+        output_path=os.path.join(config.BASE_DIR, 'results', 'wb_enrolment_heatmap_generic.png'),
+        dpi=config.HEATMAP_DPI,
+        registry=registry()
+        )
+
+def main_partitioned():
+    # Out-of-core variant of main(): shards are cleaned, filtered and reduced in worker
+    # processes, and only the merged aggregates are brought back (config.EXECUTION_BACKEND)
+    age_columns = ['age_0_5', 'age_5_17', 'age_18_greater']
+    print("Aggregating West Bengal partitions...")
+    result = run_partitioned(
+        config.ENROLMENT_DATA_PATHS,
+        config.STATE_MAPPING,
+        age_columns,
+        schema=config.ENROLMENT_SCHEMA,
+        state_name='West Bengal',
+        district_mapping=config.DISTRICT_MAPPING_WB,
+        district_fixes=registry().config('West Bengal')['district_fixes'],
+        district_resolvers=registry().resolvers(['West Bengal']),
+        max_workers=config.PARTITION_MAX_WORKERS,
+        chunksize=config.PARTITION_CHUNK_SIZE,
+        cache_dir=config.CACHE_DIR if config.USE_DATA_CACHE else None,
+        cache_version=config.CACHE_SCHEMA_VERSION,
+        quality_rules=quality_rules('enrolment'),
+        state_resolver=state_resolver()
     )
+    if result['quality'] is not None:
+        report_quality(result['quality'], 'enrolment')
+    print(f"West Bengal rows: {result['rows']}")
+    if result['rows'] == 0:
+        print("No West Bengal rows left after state cleaning and the data-quality rules (see python cli.py --validate enrolment); stopping.")
+        return
+
+    integrity = result['integrity']
+    print("*"*50)
+    print("Unique pincode count:")
+    print(integrity.unique_pincode_count())
+    print("*"*50)
+    print("Problematic pins:")
+    print(integrity.problem_pins()[['pincode', 'district_count']])
+    print("*"*50)
+    print("Dominant districts per problematic pincode:")
+    print(integrity.dominant_districts())
+
+    print("*"*50)
+    wb_df_dist_level = result['level'].set_index('district_cleaned')
+    print("West Bengal district level enrolment data:")
+    print(wb_df_dist_level)
+    export_district_level(wb_df_dist_level, 'wb_enrolment_df_dist_level_filtered')
+
+    print("*"*50)
+    render_district_heatmap(
+        result['level'][['district_cleaned', 'total_enroll']],
+        None,
+        os.path.join(config.RESULTS_DIR, 'wb_enrolment_heatmap_generic.png'),
+        'West Bengal Enrolment Heatmap',
+        dpi=config.HEATMAP_DPI,
+        geometry=registry().geometry('West Bengal')
+    )
+
+def main_streaming(chunksize=config.STREAMING_CHUNK_SIZE):
+    # Streams the shards chunk by chunk, so memory is bounded by chunksize
+    print("Streaming district level aggregation for West Bengal...")
+    age_columns = ['age_0_5', 'age_5_17', 'age_18_greater']
+    states_resolver = state_resolver()
+    rules = quality_rules('enrolment')
+    checks = []
+    wb_df_dist_level = stream_state_aggregate(
+        config.ENROLMENT_DATA_PATHS,
+        'West Bengal',
+        config.STATE_MAPPING,
+        ['district_cleaned'],
+        age_columns,
+        schema=config.ENROLMENT_SCHEMA,
+        district_mapping=config.DISTRICT_MAPPING_WB,
+        chunksize=chunksize,
+        district_resolver=registry().resolver('West Bengal'),
+        quality_rules=rules,
+        state_resolver=states_resolver,
+        quality_results=checks
+    )
+    states_resolver.save()
+    registry().save()
+    if rules is not None:
+        report_quality(rules.merge(checks), 'enrolment')
+    print("*"*50)
+    print("West Bengal district level enrolment data:")
+    print(wb_df_dist_level)
+
+    print("*"*50)
+    export_district_level(wb_df_dist_level, 'wb_enrolment_df_dist_level_filtered')
+
+def main_lazy():
+    # Same district level export as main(), but as a lazy pipeline: the state filter and
+    # column projection run per shard before district cleaning, and only requested outputs run
+    age_columns = ['age_0_5', 'age_5_17', 'age_18_greater']
+    states_resolver = state_resolver()
+    pipeline = (
+        Pipeline(
+            config.ENROLMENT_DATA_PATHS,
+            config.ENROLMENT_SCHEMA,
+            config.LOADER_MAX_WORKERS,
+            cache_dir=config.CACHE_DIR if config.USE_DATA_CACHE else None,
+            cache_version=config.CACHE_SCHEMA_VERSION
+        )
+        .clean_states(config.STATE_MAPPING, resolver=states_resolver)
+    )
+    rules = quality_rules('enrolment')
+    if rules is not None:
+        pipeline = pipeline.apply_rules(rules)
+    pipeline = (
+        pipeline
+        .filter_state('West Bengal')
+        .clean_districts(config.DISTRICT_MAPPING_WB, registry().config('West Bengal')['district_fixes'],
+                         resolver=registry().resolver('West Bengal'))
+        .format_dates('enrolment_date')
+        .add_total(age_columns, 'total_enroll')
+        .validate(age_columns, 'integrity')
+        .aggregate('district_level', ['district_cleaned'], age_columns + ['total_enroll'], sort_by='total_enroll')
+        .export('district_level_file', 'district_level',
+                os.path.join(config.EXPORT_DIR, 'wb_enrolment_df_dist_level_filtered' + EXPORT_FORMATS[config.EXPORT_FORMAT]))
+    )
+    outputs = ['integrity', 'district_level', 'district_level_file'] + (['quality'] if rules is not None else [])
+    print(pipeline.explain(outputs))
+
+    results = pipeline.run(outputs)
+    states_resolver.save()
+    registry().save()
+    if rules is not None:
+        report_quality(results['quality'], 'enrolment')
+    print("*"*50)
+    print("Problematic pins:")
+    print(results['integrity'].problem_pins()[['pincode', 'district_count']])
+    print("*"*50)
+    print("West Bengal district level enrolment data:")
+    print(results['district_level'])
+    print(f"Exported district level data to: {results['district_level_file']}")
+
+def main_batch(states=None, max_workers=config.BATCH_MAX_WORKERS):
+    # Loads and cleans the national data once, then fans states out over a process pool
+    print("Loading data...")
+    enrolment_df = load_data(
+        config.ENROLMENT_DATA_PATHS,
+        config.ENROLMENT_SCHEMA,
+        config.LOADER_MAX_WORKERS,
+        cache_dir=config.CACHE_DIR if config.USE_DATA_CACHE else None,
+        cache_version=config.CACHE_SCHEMA_VERSION
+    )
+    enrolment_df = date_format_change(enrolment_df, 'enrolment_date')
+    enrolment_df = clean_name(enrolment_df, 'state', config.STATE_MAPPING, 'state_cleaned', state_resolver())
+    if config.QUALITY_RULES_ENABLED:
+        enrolment_df = apply_quality_rules(enrolment_df, 'enrolment')
+
+    if not states:
+        # Only known states; numeric junk like '100000' is left out
+        known_states = set(config.STATE_MAPPING.values())
+        states = sorted(s for s in enrolment_df['state_cleaned'].unique() if s in known_states)
+
+    print("*"*50)
+    print(f"Processing {len(states)} states...")
+    summary = run_batch(
+        enrolment_df,
+        states,
+        config.STATE_CONFIGS,
+        config.RAW_DATA_DIR,
+        config.RESULTS_DIR,
+        max_workers=max_workers,
+        heatmap_options={'dpi': config.HEATMAP_DPI},
+        registry=registry(),
+        export_options={
+            'fmt': config.EXPORT_FORMAT,
+            'excel_summary': config.EXPORT_EXCEL_SUMMARY,
+            'partition_by': config.EXPORT_PARTITION_BY,
+            'chunk_rows': config.EXPORT_CHUNK_ROWS
+        },
+        export_dir=config.EXPORT_DIR
+    )
+    print("*"*50)
+    print("Batch summary:")
+    print(summary)
+
+def load_clean_dataset(dataset, quality_rules=None):
+    # Loads one dataset and adds enrolment_date, state_cleaned and district_cleaned for all states;
+    # rows failing the data-quality rules are quarantined (quality_rules defaults to config.QUALITY_RULES_ENABLED)
+    df = load_data(
+        config.DATASET_PATHS[dataset],
+        config.DATASET_SCHEMAS[dataset],
+        config.LOADER_MAX_WORKERS,
+        cache_dir=config.CACHE_DIR if config.USE_DATA_CACHE else None,
+        cache_version=config.CACHE_SCHEMA_VERSION
+    )
+    df = date_format_change(df, 'enrolment_date')
+    states_resolver = state_resolver()
+    df = clean_name(df, 'state', config.STATE_MAPPING, 'state_cleaned', states_resolver)
+    df = clean_district_names(df, config.STATE_CONFIGS, resolvers=registry().resolvers())
+    states_resolver.save()
+    registry().save()
+    if config.QUALITY_RULES_ENABLED if quality_rules is None else quality_rules:
+        df = apply_quality_rules(df, dataset)
+
+    # Master tables of stable state/district ids, shared across runs and datasets; the rows keep
+    # their categorical names, which every consumer (cube, join, store, exports) groups on
+    locations = LocationDictionary.load_or_create(config.LOCATIONS_PATH, config.STATE_MAPPING, config.STATE_CONFIGS)
+    locations.register(df)
+    locations.save(config.LOCATIONS_PATH)
+    return df
+
+def main_cube(datasets=None):
+    # Builds the state x district x pincode x month rollup cube for each available dataset
+    datasets = datasets or [d for d, paths in config.DATASET_PATHS.items() if paths and all(os.path.exists(p) for p in paths)]
+    for dataset in datasets:
+        print("*"*50)
+        print(f"Building {dataset} cube...")
+        df = load_clean_dataset(dataset)
+        cube = build_cube(df, dataset, config.DATASET_VALUE_COLUMNS[dataset])
+        paths = save_cube(cube, config.CUBE_DIR)
+        print(f"{dataset} cube: {len(cube)} rows from {len(df)} source rows -> {paths[0]}")
+
+def main_anomalies(datasets=None):
+    # Ranks enrolment spikes of every pincode against its own recent days, nationally
+    datasets = datasets or [d for d, paths in config.DATASET_PATHS.items() if paths and all(os.path.exists(p) for p in paths)]
+    for dataset in datasets:
+        print("*"*50)
+        print(f"Detecting {dataset} spikes...")
+        df = load_clean_dataset(dataset)
+        with stage('anomalies', len(df)) as record:
+            anomalies = detect_spikes(
+                df,
+                config.DATASET_VALUE_COLUMNS[dataset],
+                window=config.ANOMALY_WINDOW,
+                min_periods=config.ANOMALY_MIN_PERIODS,
+                z_threshold=config.ANOMALY_Z_THRESHOLD,
+                min_count=config.ANOMALY_MIN_COUNT,
+                label_columns=['state_cleaned', 'district_cleaned']
+            )
+            record['rows_out'] = len(anomalies)
+        print(f"{len(anomalies)} suspicious pincode-days across {anomalies['pincode'].nunique()} pincodes")
+        print(anomalies.head(20))
+        result = export_aggregate(anomalies, config.EXPORT_DIR, f"{dataset}_anomalies", config.EXPORT_FORMAT,
+                                  chunk_rows=config.EXPORT_CHUNK_ROWS)
+        print(f"Exported anomalies to: {result['path']}")
+
+def main_validate(datasets=None):
+    # Runs the data-quality rules over whole datasets and reports per-rule violation counts
+    datasets = datasets or [d for d, paths in config.DATASET_PATHS.items() if paths and all(os.path.exists(p) for p in paths)]
+    for dataset in datasets:
+        print("*"*50)
+        print(f"Validating {dataset}...")
+        load_clean_dataset(dataset, quality_rules=True)
+
+def main_store(datasets=None):
+    # Writes cleaned rows partitioned by state and month with a statistics index, so state or
+    # date-range runs (main()) only open the partitions they need
+    datasets = datasets or [d for d, paths in config.DATASET_PATHS.items() if paths and all(os.path.exists(p) for p in paths)]
+    for dataset in datasets:
+        print("*"*50)
+        print(f"Building the {dataset} store...")
+        df = load_clean_dataset(dataset)
+        with stage('store', len(df)) as record:
+            index = build_store(df, config.STORE_DIR, dataset, source_paths=config.DATASET_PATHS[dataset],
+                                schema=config.DATASET_SCHEMAS[dataset], schema_version=config.CACHE_SCHEMA_VERSION,
+                                max_workers=config.EXPORT_MAX_WORKERS, chunk_rows=config.EXPORT_CHUNK_ROWS,
+                                settings=cleaning_settings(dataset))
+            record['rows_out'] = len(index)
+        print(f"Wrote {int(index['rows'].sum())} rows in {len(index)} partitions ({int(index['bytes'].sum()):,} bytes) to "
+              f"{os.path.join(config.STORE_DIR, dataset)}")
+
+def main_serve(port=config.SERVICE_PORT, datasets=None):
+    # Loads the stored cubes once and answers aggregate/validation queries over HTTP until Ctrl+C
+    import asyncio
+    cube = load_cube(config.CUBE_DIR, datasets)
+    service = QueryService(cube, config.DATASET_VALUE_COLUMNS, cache_size=config.SERVICE_CACHE_SIZE)
+    try:
+        asyncio.run(serve(service, config.SERVICE_HOST, port))
+    except KeyboardInterrupt:
+        print("Service stopped")
+
+def main_incremental(datasets=None):
+    # Processes only new or changed shards and merges them into the stored cubes
+    datasets = datasets or [d for d, paths in config.DATASET_PATHS.items() if paths]
+    for dataset in datasets:
+        print("*"*50)
+        print(f"Incremental refresh of {dataset}...")
+        file_paths = [p for p in config.DATASET_PATHS[dataset] if os.path.exists(p)]
+        states_resolver = state_resolver()
+        summary = ingest_incremental(
+            dataset,
+            file_paths,
+            config.DATASET_SCHEMAS[dataset],
+            config.DATASET_VALUE_COLUMNS[dataset],
+            config.STATE_MAPPING,
+            config.STATE_CONFIGS,
+            os.path.join(config.INCREMENTAL_DIR, dataset),
+            config.CUBE_DIR,
+            cache_dir=config.CACHE_DIR if config.USE_DATA_CACHE else None,
+            cache_version=config.CACHE_SCHEMA_VERSION,
+            quality_rules=quality_rules(dataset),
+            settings=cleaning_settings(dataset),
+            state_resolver=states_resolver,
+            district_resolvers=registry().resolvers()
+        )
+        states_resolver.save()
+        registry().save()
+        for status in ['added', 'updated', 'removed', 'unchanged']:
+            shards = summary[status]
+            print(f"{status}: {len(shards)} {shards if status != 'unchanged' else ''}")
+        if summary['quality'] is not None:
+            report_quality(summary['quality'], dataset)
+
+def main_join(datasets=None):
+    # Joins all datasets on (date, state, district, pincode) into one wide fact table
+    datasets = datasets or [d for d, paths in config.DATASET_PATHS.items() if paths and all(os.path.exists(p) for p in paths)]
+    encoded = {}
+    for dataset in datasets:
+        print("*"*50)
+        print(f"Encoding {dataset}...")
+        df = load_clean_dataset(dataset)
+        encoded[dataset] = encode_keys(df, config.DATASET_VALUE_COLUMNS[dataset])
+        del df  # only the integer keys and counts are kept
+
+    print("*"*50)
+    fact_table = join_encoded(encoded)
+    print(f"Fact table shape: {fact_table.shape}")
+    preview(fact_table)
+    os.makedirs(os.path.dirname(config.FACT_TABLE_PATH), exist_ok=True)
+    fact_table.to_parquet(config.FACT_TABLE_PATH, index=False)
+    print(f"Exported fact table to: {config.FACT_TABLE_PATH}")
 
 if __name__ == "__main__":
-    main()
+    # Argument parsing and mode dispatch live in cli.py (python cli.py --help)
+    from cli import main as cli_main
+    sys.exit(cli_main(app=sys.modules[__name__]))
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Optional
+
+from src.data_processing.transformation import unique_dates
+from src.utils.instrumentation import instrument
+
+# Scales a median absolute deviation to a standard deviation under normality
+MAD_SCALE = 1.4826
+
+def pincode_day_matrix(df: pd.DataFrame, value_columns: List[str], pincode_column: str = 'pincode',
+                       date_column: str = 'enrolment_date'):
+    """
+    Sum `value_columns` into a dense pincode x day matrix with one bincount.
+
+    Columns are the distinct days present in the data (sorted), so days without any
+    record nationwide are not counted as zero-enrolment days; a pincode without rows
+    on a day that exists elsewhere counts 0.
+
+    Parameters:
+    df (pd.DataFrame): Rows with a pincode, a date (int yyyymmdd, datetime64 or date strings) and counts.
+    value_columns (list): Count columns to add up (e.g. ['age_0_5', 'age_5_17', 'age_18_greater']).
+    pincode_column (str): Pincode column. Default is 'pincode'.
+    date_column (str): Date column. Default is 'enrolment_date'.
+
+    Returns:
+    tuple: (matrix, pincodes, days) - float64 array of shape (len(pincodes), len(days)),
+    the sorted pincodes and the sorted days (DatetimeIndex).
+    """
+    pin_codes, pincodes = pd.factorize(df[pincode_column], sort=True)
+    date_codes, dates = unique_dates(df[date_column])
+    order = np.argsort(dates.to_numpy())
+    rank = np.empty(len(order), dtype='int64')
+    rank[order] = np.arange(len(order))
+    days = dates[order]
+
+    values = np.zeros(len(df))
+    for column in value_columns:
+        values += df[column].to_numpy(dtype='float64', na_value=0)
+
+    valid = (pin_codes >= 0) & (date_codes >= 0)
+    cells = pin_codes[valid].astype('int64') * len(days) + rank[date_codes[valid]]
+    matrix = np.bincount(cells, weights=values[valid], minlength=len(pincodes) * len(days))
+    return matrix.reshape(len(pincodes), len(days)), np.asarray(pincodes), pd.DatetimeIndex(days)
+
+def _sorted_median(sorted_windows: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    # Median of windows sorted along the last axis with NaNs at the end; `counts` non-NaN values each
+    last = sorted_windows.shape[-1] - 1
+    low = np.take_along_axis(sorted_windows, np.clip((counts - 1) // 2, 0, last)[..., None], axis=-1)[..., 0]
+    high = np.take_along_axis(sorted_windows, np.clip(counts // 2, 0, last)[..., None], axis=-1)[..., 0]
+    return (low + high) / 2
+
+def rolling_baseline(matrix: np.ndarray, window: int = 28, min_periods: int = 7, active_days_only: bool = True,
+                     block_rows: int = 2048):
+    """
+    Trailing median and median absolute deviation of every cell over the `window` previous days.
+
+    The current day is not part of its own baseline. Windows are strided views
+    sorted once per block (float32; counts are exact up to 16M), which gives the
+    median of every window at once even when windows hold different numbers of
+    values, and rows are processed in blocks of `block_rows`, so memory stays at
+    block_rows x days x window values however many pincodes there are.
+
+    Parameters:
+    matrix (np.ndarray): Pincode x day counts (see pincode_day_matrix).
+    window (int): Days of history. Default is 28.
+    min_periods (int): Minimum days of history (active days with active_days_only); cells with
+        less get NaN. Default is 7.
+    active_days_only (bool): Leave days with zero enrolments out of the baseline, so pincodes that
+        only report a few days a week are compared with their usual level on active days. Default is True.
+    block_rows (int): Rows per block.
+
+    Returns:
+    tuple: (median, mad) float64 arrays shaped like `matrix`.
+    """
+    n_rows, n_days = matrix.shape
+    median = np.full(matrix.shape, np.nan)
+    mad = np.full(matrix.shape, np.nan)
+
+    history = matrix.astype('float32')
+    if active_days_only:
+        history[history == 0] = np.nan
+    padded = np.concatenate([np.full((n_rows, window), np.nan, dtype='float32'), history], axis=1)
+    for start in range(0, n_rows, block_rows):
+        # windows[:, t] holds days t - window .. t - 1
+        windows = sliding_window_view(padded[start:start + block_rows, :-1], window, axis=1)
+        counts = window - np.isnan(windows).sum(axis=2)
+        med = _sorted_median(np.sort(windows, axis=2), counts)
+        deviation = _sorted_median(np.sort(np.abs(windows - med[..., None]), axis=2), counts)
+
+        enough = counts >= max(min_periods, 1)
+        median[start:start + block_rows] = np.where(enough, med, np.nan)
+        mad[start:start + block_rows] = np.where(enough, deviation, np.nan)
+    return median, mad
+
+def robust_zscores(matrix: np.ndarray, median: np.ndarray, mad: np.ndarray, min_scale: float = 1.0) -> np.ndarray:
+    """
+    (count - median) / scale, where scale is 1.4826 * MAD floored at the Poisson noise sqrt(median) and `min_scale`.
+
+    The floors keep pincodes whose recent days happen to be nearly identical (MAD
+    close to 0) from turning ordinary count noise into huge scores.
+    """
+    return (matrix - median) / robust_scale(median, mad, min_scale)
+
+def robust_scale(median: np.ndarray, mad: np.ndarray, min_scale: float = 1.0) -> np.ndarray:
+    """Scale used by robust_zscores."""
+    with np.errstate(invalid='ignore'):
+        return np.maximum(np.maximum(MAD_SCALE * mad, np.sqrt(np.maximum(median, 0))), min_scale)
+
+@instrument
+def detect_spikes(df: pd.DataFrame, value_columns: List[str], pincode_column: str = 'pincode', date_column: str = 'enrolment_date',
+                  window: int = 28, min_periods: int = 7, z_threshold: float = 5.0, min_count: float = 20,
+                  min_scale: float = 1.0, active_days_only: bool = True, label_columns: Optional[List[str]] = None,
+                  block_rows: int = 2048) -> pd.DataFrame:
+    """
+    Rank suspicious enrolment spikes across all pincodes at once.
+
+    The rows are summed into a pincode x day matrix (pincode_day_matrix), every cell
+    is compared with the trailing median/MAD of its pincode (rolling_baseline) and
+    cells whose robust z-score reaches `z_threshold` with at least `min_count`
+    enrolments are reported. Everything runs as array operations over the whole
+    matrix; no Python loop touches individual pincodes or days.
+
+    Parameters:
+    df (pd.DataFrame): Row-level data with pincode, date and count columns.
+    value_columns (list): Count columns to add up (e.g. ['age_0_5', 'age_5_17', 'age_18_greater']).
+    pincode_column (str): Pincode column. Default is 'pincode'.
+    date_column (str): Date column. Default is 'enrolment_date'.
+    window (int): Days of history in the baseline. Default is 28.
+    min_periods (int): Minimum (active) days of history before a day can be flagged. Default is 7.
+    z_threshold (float): Minimum robust z-score of a spike. Default is 5.0.
+    min_count (float): Minimum enrolments on the day, so tiny pincodes do not flag on noise. Default is 20.
+    min_scale (float): Floor of the robust scale (see robust_zscores). Default is 1.0.
+    active_days_only (bool): Baselines from days with enrolments only (see rolling_baseline). Default is True.
+    label_columns (list, optional): Columns (e.g. ['state_cleaned', 'district_cleaned']) added to the
+        table from each pincode's first row.
+    block_rows (int): Pincodes per block in rolling_baseline.
+
+    Returns:
+    pd.DataFrame: One row per flagged pincode-day with 'pincode', 'date', 'count', 'baseline'
+    (trailing median), 'scale' and 'z_score' (plus `label_columns`), highest z-score first.
+    """
+    matrix, pincodes, days = pincode_day_matrix(df, value_columns, pincode_column, date_column)
+    median, mad = rolling_baseline(matrix, window, min_periods, active_days_only, block_rows)
+    z_scores = robust_zscores(matrix, median, mad, min_scale)
+
+    with np.errstate(invalid='ignore'):
+        flags = (z_scores >= z_threshold) & (matrix >= min_count)
+    pin_index, day_index = np.nonzero(flags)
+    order = np.argsort(-z_scores[pin_index, day_index], kind='stable')
+    pin_index, day_index = pin_index[order], day_index[order]
+
+    anomalies = pd.DataFrame({
+        'pincode': pincodes[pin_index],
+        'date': days[day_index],
+        'count': matrix[pin_index, day_index],
+        'baseline': median[pin_index, day_index],
+        'scale': robust_scale(median[pin_index, day_index], mad[pin_index, day_index], min_scale),
+        'z_score': z_scores[pin_index, day_index]
+    })
+
+    if label_columns:
+        pin_codes = pd.factorize(df[pincode_column], sort=True)[0]
+        present = pin_codes >= 0
+        _, first = np.unique(pin_codes[present], return_index=True)
+        first_rows = np.flatnonzero(present)[first]  # first row of every pincode, in pincode order
+        for column in label_columns:
+            anomalies[column] = df[column].take(first_rows[pin_index]).reset_index(drop=True)
+    return anomalies
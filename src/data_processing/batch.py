@@ -0,0 +1,149 @@
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from src.data_processing.cleaning import clean_name, replace_names
+from src.data_processing.export import export_aggregate
+from src.data_processing.registry import get_state_config
+from src.data_processing.transformation import extract_month_from_date, render_district_heatmap, use_agg_backend
+from src.data_processing.validation import PincodeDistrictIntegrity
+
+AGE_COLUMNS = ['age_0_5', 'age_5_17', 'age_18_greater']
+
+def process_state(state_name: str, state_df: pd.DataFrame, state_config: dict, output_dir: str, age_columns: List[str] = AGE_COLUMNS,
+                  heatmap_options: Optional[dict] = None, district_resolver=None, geometry=None,
+                  export_options: Optional[dict] = None, export_dir: Optional[str] = None) -> dict:
+    """
+    Run district cleaning, validation, aggregation, export and plotting for one state.
+
+    Parameters:
+    state_name (str): Cleaned state name.
+    state_df (pd.DataFrame): The state's rows (with 'district' and 'enrolment_date').
+    state_config (dict): Resolved config from get_state_config.
+    output_dir (str): Directory for the heatmap (and the exports without `export_dir`).
+    age_columns (list): Count columns to aggregate.
+    heatmap_options (dict, optional): Extra render_district_heatmap arguments (dpi, geometry_cache_dir, ...).
+    district_resolver (NameResolver, optional): Fallback for districts the mapping misses.
+    geometry (gpd.GeoDataFrame, optional): Preloaded boundaries (StateRegistry.geometry); read from
+        the state's 'geojson_path' otherwise.
+    export_options (dict, optional): export_aggregate arguments for the district totals ('fmt',
+        'excel_summary', 'chunk_rows'); with 'partition_by' the pincode x month totals are also
+        written to the shared 'enrolment_pincode_month' dataset, one partition per state and month.
+        'partition_by' has to start with 'state_cleaned'; the state's old partitions are replaced.
+    export_dir (str, optional): Directory for the exports (config.EXPORT_DIR). Default is `output_dir`.
+
+    Returns:
+    dict: Summary of the run for this state.
+    """
+    slug = state_config['slug']
+    state_df = clean_name(state_df, 'district', state_config['district_mapping'], 'district_cleaned', district_resolver)
+    if state_config['district_fixes']:
+        state_df = replace_names(state_df, 'district_cleaned', state_config['district_fixes'])
+
+    integrity = PincodeDistrictIntegrity(state_df, age_columns)
+    state_df = integrity.flag_rows(state_df)
+    state_df = extract_month_from_date(state_df, 'enrolment_date', 'month')
+    state_df['total_enroll'] = state_df[age_columns].sum(axis=1)
+
+    dist_level = (
+        state_df.groupby('district_cleaned', observed=True)[age_columns + ['total_enroll']]
+            .sum()
+            .sort_values('total_enroll', ascending=False)
+    )
+
+    export_dir = export_dir or output_dir
+    export_options = dict(export_options or {'excel_summary': True})
+    partition_by = export_options.pop('partition_by', None)
+    dist_export = export_aggregate(dist_level, export_dir, f"{slug}_enrolment_df_dist_level_filtered", **export_options)
+    pincode_export = None
+    if partition_by:
+        if partition_by[0] != 'state_cleaned':
+            raise ValueError(f"States export concurrently into one dataset, so partition_by must start with 'state_cleaned': {partition_by}")
+        pincode_level = state_df.groupby(['state_cleaned', 'month', 'district_cleaned', 'pincode'], observed=True)[age_columns + ['total_enroll']].sum()
+        export_options.pop('excel_summary', None)
+        pincode_export = export_aggregate(pincode_level, export_dir, 'enrolment_pincode_month', partition_by=partition_by,
+                                          replace_within=['state_cleaned'], **export_options)
+
+    heatmap_path = None
+    if geometry is not None or os.path.exists(state_config['geojson_path']):
+        heatmap_path = os.path.join(output_dir, f"{slug}_enrolment_heatmap.png")
+        render_district_heatmap(
+            dist_level['total_enroll'].reset_index(),
+            state_config['geojson_path'],
+            heatmap_path,
+            f'{state_name} Enrolment Heatmap',
+            geometry=geometry,
+            **(heatmap_options or {})
+        )
+
+    return {
+        'state': state_name,
+        'rows': len(state_df),
+        'districts': len(dist_level),
+        'problem_pins': len(integrity.problem_pins()),
+        'total_enroll': int(dist_level['total_enroll'].sum()),
+        'export_path': dist_export['path'],
+        'excel_path': dist_export['excel_path'],
+        'pincode_files': len(pincode_export['files']) if pincode_export else 0,
+        'heatmap_path': heatmap_path
+    }
+
+def run_batch(df: pd.DataFrame, states: List[str], state_configs: Dict[str, dict], raw_data_dir: str, output_dir: str,
+              max_workers: Optional[int] = None, age_columns: List[str] = AGE_COLUMNS, heatmap_options: Optional[dict] = None,
+              district_resolvers: Optional[dict] = None, registry=None, export_options: Optional[dict] = None,
+              export_dir: Optional[str] = None) -> pd.DataFrame:
+    """
+    Process many states in parallel from one cleaned national DataFrame.
+
+    The frame is partitioned by 'state_cleaned' once and each partition is handed to
+    a worker process, so wall time scales with the number of cores rather than with
+    the number of states.
+
+    Parameters:
+    df (pd.DataFrame): National data with 'state_cleaned', 'district' and 'enrolment_date'.
+    states (list): Cleaned state names to process.
+    state_configs (dict): Per-state overrides (config.STATE_CONFIGS).
+    raw_data_dir (str): Directory searched for default GeoJSON files.
+    output_dir (str): Directory for the plots (and the exports without `export_dir`).
+    max_workers (int, optional): Number of worker processes.
+    age_columns (list): Count columns to aggregate.
+    heatmap_options (dict, optional): Extra render_district_heatmap arguments (dpi, geometry_cache_dir, ...).
+    district_resolvers (dict, optional): State name -> NameResolver. Workers use copies, so aliases
+        they find are not written back to the alias cache.
+    registry (StateRegistry, optional): Source of each state's config, resolver and canonicalized
+        boundaries; takes precedence over `state_configs` and `district_resolvers`.
+    export_options (dict, optional): See process_state. States export concurrently from their workers.
+    export_dir (str, optional): Directory for the exports (config.EXPORT_DIR). Default is `output_dir`.
+
+    Returns:
+    pd.DataFrame: One summary row per processed state.
+    """
+    wanted = set(states)
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=use_agg_backend) as executor:
+        futures = {}
+        for state_name, state_df in df.groupby('state_cleaned', observed=True, sort=True):
+            if state_name not in wanted:
+                continue
+            if registry is not None:
+                state_config, resolver, geometry = registry.config(state_name), registry.resolver(state_name), registry.geometry(state_name)
+            else:
+                state_config = get_state_config(state_name, state_configs, raw_data_dir)
+                resolver, geometry = (district_resolvers or {}).get(state_name), None
+            future = executor.submit(process_state, state_name, state_df, state_config, output_dir, age_columns, heatmap_options,
+                                     resolver, geometry, export_options, export_dir)
+            futures[future] = state_name
+
+        for future in as_completed(futures):
+            state_name = futures[future]
+            try:
+                summaries.append(future.result())
+                print(f"Finished {state_name}")
+            except Exception as e:
+                print(f"Error processing {state_name}: {e}")
+                raise
+
+    if not summaries:
+        return pd.DataFrame()
+    return pd.DataFrame(summaries).sort_values('state').reset_index(drop=True)
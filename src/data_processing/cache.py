@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+import pandas as pd
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - caching is simply skipped without pyarrow
+    pa = None
+    feather = None
+
+def cache_available() -> bool:
+    """Return True if the columnar cache can be used (pyarrow is installed)."""
+    return feather is not None
+
+def file_fingerprint(file_path: str, schema: Optional[Dict[str, str]] = None, schema_version: int = 1, hash_bytes: int = 1 << 20) -> dict:
+    """
+    Build the fingerprint that identifies a raw file and the way it was parsed.
+
+    The fingerprint combines file size, modification time, a hash of the first and
+    last `hash_bytes` of the file, the column schema and the cache schema version,
+    so any of those changing invalidates the cached copy.
+
+    Parameters:
+    file_path (str): Path to the raw file.
+    schema (dict, optional): Column -> dtype mapping the file is read with.
+    schema_version (int): Cache layout version (config.CACHE_SCHEMA_VERSION).
+    hash_bytes (int): Number of bytes hashed from each end of the file.
+
+    Returns:
+    dict: JSON-serialisable fingerprint.
+    """
+    stat = os.stat(file_path)
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(hash_bytes))
+        if stat.st_size > 2 * hash_bytes:
+            f.seek(-hash_bytes, os.SEEK_END)
+            digest.update(f.read(hash_bytes))
+
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha1': digest.hexdigest(),
+        'schema': schema or {},
+        'schema_version': schema_version
+    }
+
+def _cache_paths(file_path: str, cache_dir: str):
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(cache_dir, f"{name}.feather"), os.path.join(cache_dir, f"{name}.json")
+
+def read_cached_shard(file_path: str, cache_dir: str, fingerprint: dict, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """
+    Return the cached copy of a shard, or None if it is missing or stale.
+
+    The Feather file is memory-mapped, so only the pages actually converted are read.
+
+    Parameters:
+    file_path (str): Path to the raw file.
+    cache_dir (str): Directory holding the cache.
+    fingerprint (dict): Current fingerprint of the raw file (see file_fingerprint).
+    columns (list, optional): Only read these columns.
+
+    Returns:
+    pd.DataFrame or None: Cached DataFrame if the fingerprint matches.
+    """
+    if not cache_available():
+        return None
+
+    data_path, meta_path = _cache_paths(file_path, cache_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path) as f:
+        if json.load(f) != fingerprint:
+            return None
+
+    table = feather.read_table(data_path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+def write_cached_shard(df: pd.DataFrame, file_path: str, cache_dir: str, fingerprint: dict) -> pd.DataFrame:
+    """
+    Store a parsed shard as an uncompressed Feather file next to its fingerprint.
+
+    Files are written under temporary names and the old fingerprint is removed
+    before the data is swapped in, so a crash never leaves a cache entry whose data
+    and fingerprint disagree. The cache is only an accelerator: when it cannot be
+    written (full disk, read-only directory), a warning is printed and the load
+    carries on with the parsed shard.
+
+    Parameters:
+    df (pd.DataFrame): The parsed shard.
+    file_path (str): Path to the raw file the shard was read from.
+    cache_dir (str): Directory holding the cache.
+    fingerprint (dict): Fingerprint of the raw file (see file_fingerprint).
+
+    Returns:
+    pd.DataFrame: `df`, whether or not it could be cached.
+    """
+    if not cache_available():
+        return df
+
+    data_path, meta_path = _cache_paths(file_path, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        feather.write_feather(table, data_path + '.tmp', compression='uncompressed')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(fingerprint, f)
+
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        os.replace(data_path + '.tmp', data_path)
+        os.replace(meta_path + '.tmp', meta_path)
+    except OSError as e:
+        print(f"Warning: could not cache {file_path} in {cache_dir}: {e}")
+        for path in (data_path + '.tmp', meta_path + '.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+    return df
@@ -1,42 +1,194 @@
-import re
+import numpy as np
 import pandas as pd
+from typing import Optional
 
-def clean_name(df: pd.DataFrame, column_name: str, name_mapping: dict, cleaned_column_name: str) -> pd.DataFrame:
+from src.utils.instrumentation import instrument
+
+def normalize_names(names: pd.Series) -> pd.Series:
+    """
+    Normalize a Series of names for lookup in a name mapping.
+
+    Lowercases, replaces symbols like &, - with spaces and collapses repeated spaces.
+    Purely numeric names are returned as NaN. Missing values stay missing.
+
+    Parameters:
+    names (pd.Series): Names to normalize (normally the unique values of a column).
+
+    Returns:
+    pd.Series: Normalized names, aligned with the input.
+    """
+    normalized = names.astype(str).str.lower()                            # convert to lowercase
+    normalized = normalized.str.replace(r'[^a-z0-9\s]', ' ', regex=True)  # remove symbols like &, -, etc.
+    normalized = normalized.str.replace(r'\s+', ' ', regex=True).str.strip()  # remove extra spaces
+    normalized = normalized.where(~normalized.str.fullmatch(r'\d+', na=False))  # drop purely numeric names
+    return normalized.where(names.notna())
+
+def factorize_column(values: pd.Series):
+    """
+    Return (codes, uniques) for a column, reusing existing codes for categoricals.
+
+    Parameters:
+    values (pd.Series): Column to encode.
+
+    Returns:
+    tuple: Integer codes per row (-1 for missing) and a pd.Index of the distinct values.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+def _recode(codes: np.ndarray, unique_values: pd.Series, index: pd.Index) -> pd.Series:
+    """
+    Build a categorical Series from row codes and the (possibly repeated) value of each code.
+
+    Parameters:
+    codes (np.ndarray): Per-row positions into `unique_values`, -1 for missing.
+    unique_values (pd.Series): Value for each code; several codes may share a value.
+    index (pd.Index): Index of the resulting Series.
+
+    Returns:
+    pd.Series: Categorical Series with sorted categories.
+    """
+    try:
+        value_codes, categories = pd.factorize(unique_values, sort=True)
+    except TypeError:  # mixed types cannot be sorted
+        value_codes, categories = pd.factorize(unique_values)
+
+    # Map every old code to its new category; -1 (missing) stays -1
+    lookup = np.append(value_codes, -1)
+    row_codes = lookup[codes]
+    return pd.Series(pd.Categorical.from_codes(row_codes, categories), index=index)
+
+def _map_names(names: pd.Series, normalized: pd.Series, name_mapping: dict, resolver=None, label: str = 'names',
+               present: Optional[np.ndarray] = None) -> pd.Series:
+    """
+    Map distinct names through `name_mapping`, then `resolver` for the rest.
+
+    Names that neither resolves keep their original value and are reported. Only
+    names flagged in `present` (default: all) are resolved and reported, so unused
+    categories of a filtered frame are skipped.
+    """
+    mapped = normalized.map(name_mapping)
+    unmapped = mapped.isna() & normalized.notna()
+    if present is not None:
+        unmapped &= present
+    if resolver is not None and unmapped.any():
+        resolved = resolver.resolve(normalized[unmapped].unique())
+        mapped = mapped.fillna(normalized.map(resolved))
+        unmapped &= mapped.isna()
+    if unmapped.any() and (name_mapping or resolver is not None):
+        print(f"Warning: {int(unmapped.sum())} {label} without a mapping kept as-is: {sorted(names[unmapped].astype(str))}")
+    return mapped.fillna(names)
+
+@instrument
+def clean_name(df: pd.DataFrame, column_name: str, name_mapping: dict, cleaned_column_name: str, resolver=None) -> pd.DataFrame:
     """
     Clean and standardize names in a specified column of a DataFrame.
 
+    Each distinct name is normalized and mapped once; rows pick up the result through
+    their integer codes, so the cost depends on the number of distinct names rather
+    than the number of rows. Names without a mapping are passed to `resolver` (fuzzy
+    match against the canonical names); names neither resolves keep their original
+    value and are listed in a warning.
+
     Parameters:
     df (pd.DataFrame): The input DataFrame.
     column_name (str): The name of the column to be cleaned.
     name_mapping (dict): A dictionary mapping incorrect names to correct names.
     cleaned_column_name (str): The name of the new column to store cleaned names.
+    resolver (NameResolver, optional): Fallback for unmapped names (see src/data_processing/resolver.py).
+
+    Returns:
+    pd.DataFrame: DataFrame with an additional categorical column for cleaned names.
+    """
+    codes, uniques = factorize_column(df[column_name])
+    uniques = pd.Series(uniques)
+    present = np.bincount(codes[codes >= 0], minlength=len(uniques)) > 0
+    cleaned = _map_names(uniques, normalize_names(uniques), name_mapping, resolver, f"{column_name} names", present)
+    df[cleaned_column_name] = _recode(codes, cleaned, df.index)
+    return df
+
+@instrument
+def replace_names(df: pd.DataFrame, column_name: str, replacements: dict) -> pd.DataFrame:
+    """
+    Replace exact values in a (possibly categorical) name column.
+
+    Parameters:
+    df (pd.DataFrame): The input DataFrame.
+    column_name (str): The column to update in place.
+    replacements (dict): Mapping of values to replace to their new values.
 
     Returns:
-    pd.DataFrame: DataFrame with an additional column for cleaned names.
-    """
-    def clean_single_name(name):
-        if pd.isna(name):
-            return name
-        name = str(name).lower()                     # convert to lowercase
-        name = re.sub(r'[^a-z0-9\s]', ' ', name)   # remove symbols like &, -, etc. (Regex pattern: [^a-z\s])
-        name = re.sub(r'\s+', ' ', name).strip()  # remove extra spaces (Regex pattern: \s+)
-        if re.fullmatch(r'\d+', name): # if name is purely numeric
-            return None
-        return name
-
-    cleaned = df[column_name].apply(clean_single_name)
-    df[cleaned_column_name] = cleaned.map(name_mapping).fillna(df[column_name])
+    pd.DataFrame: DataFrame with the column updated.
+    """
+    codes, uniques = factorize_column(df[column_name])
+    df[column_name] = _recode(codes, pd.Series(uniques).replace(replacements), df.index)
     return df
 
+@instrument
+def clean_district_names(df: pd.DataFrame, state_configs: dict, state_column: str = 'state_cleaned', district_column: str = 'district',
+                         cleaned_column_name: str = 'district_cleaned', resolvers: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Clean district names for many states at once, using each state's own mapping.
+
+    Every distinct (state, district) pair is cleaned once with the mapping and exact
+    fixes configured for its state ('district_mapping' / 'district_fixes' in
+    `state_configs`) and, for names the mapping misses, the state's resolver;
+    states without a config keep their original district names.
+
+    Parameters:
+    df (pd.DataFrame): The input DataFrame with cleaned states.
+    state_configs (dict): Per-state configuration (config.STATE_CONFIGS).
+    state_column (str): Column holding cleaned state names. Default is 'state_cleaned'.
+    district_column (str): Column holding raw district names. Default is 'district'.
+    cleaned_column_name (str): Name of the new column. Default is 'district_cleaned'.
+    resolvers (dict, optional): State name -> NameResolver (see StateRegistry.resolvers or build_district_resolvers).
+
+    Returns:
+    pd.DataFrame: DataFrame with an additional categorical column for cleaned districts.
+    """
+    state_codes, states = factorize_column(df[state_column])
+    district_codes, districts = factorize_column(df[district_column])
+
+    # Combine both codes into one integer key so pairs are factorized without tuples.
+    # Missing values (code -1) decode to out-of-range positions, i.e. NaN below.
+    width = len(districts) + 1
+    pair_keys = state_codes.astype('int64') * width + district_codes
+    pair_codes, unique_keys = pd.factorize(pair_keys)
+    pair_states = unique_keys // width
+    pair_districts = unique_keys % width
+
+    cleaned = pd.Series(districts.to_numpy(), dtype=object).reindex(pair_districts).reset_index(drop=True)
+    normalized = normalize_names(cleaned)
+    pair_state_names = pd.Series(states.to_numpy(), dtype=object).reindex(pair_states).reset_index(drop=True)
+
+    resolvers = resolvers or {}
+    for state_name in set(state_configs) | set(resolvers):
+        in_state = (pair_state_names == state_name).to_numpy()
+        if not in_state.any():
+            continue
+        state_config = state_configs.get(state_name, {})
+        updated = _map_names(cleaned[in_state], normalized[in_state], state_config.get('district_mapping', {}),
+                             resolvers.get(state_name), f"{state_name} districts")
+        fixes = state_config.get('district_fixes')
+        if fixes:
+            updated = updated.replace(fixes)
+        cleaned[in_state] = updated
+
+    df[cleaned_column_name] = _recode(pair_codes, cleaned, df.index)
+    return df
+
+@instrument
 def drop_columns(df, columns_to_drop: list):
     """
     Drop specified columns from a DataFrame.
-    
+
     Args:
         df: DataFrame to clean
         columns_to_drop: List of column names to drop
-    
+
     Returns:
         DataFrame with specified columns removed
     """
-    return df.drop(columns=columns_to_drop, axis=1)
+    return df.drop(columns=columns_to_drop)
@@ -0,0 +1,188 @@
+import os
+import pandas as pd
+from typing import Dict, List, Optional
+
+from src.data_processing.transformation import extract_date_parts
+
+# Dimensions of the rollup cube, from coarsest to finest
+CUBE_DIMENSIONS = ['dataset', 'state', 'district', 'pincode', 'month']
+
+def _align_categories(frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    # Partials clean their names independently; give shared categoricals one sorted category set so
+    # concat keeps them categorical. Returns new frames, the inputs are left as they are
+    aligned = list(frames)
+    for column in frames[0].columns:
+        if all(isinstance(f[column].dtype, pd.CategoricalDtype) for f in frames):
+            categories = pd.Index(sorted(set().union(*(f[column].cat.categories for f in frames))))
+            aligned = [f.assign(**{column: f[column].cat.set_categories(categories)}) for f in aligned]
+    return aligned
+
+def merge_partials(partials: List[pd.DataFrame], keys: List[str], dropna: bool = True) -> pd.DataFrame:
+    """
+    Sum partial aggregates of disjoint row sets (shards, chunks) into one aggregate.
+
+    Parameters:
+    partials (list): Frames with `keys` columns and summable value columns; not modified.
+    keys (list): Key columns. Object keys are grouped as categoricals.
+    dropna (bool): Drop keys with missing values, as groupby does. Cubes keep them (False).
+
+    Returns:
+    pd.DataFrame: One row per key (sorted), as a single groupby over all rows would give;
+    an empty frame with the partials' columns when none has rows.
+    """
+    non_empty = [p for p in partials if len(p)]
+    if not non_empty:
+        return partials[0].iloc[:0].reset_index(drop=True) if partials else pd.DataFrame(columns=keys)
+    combined = pd.concat(_align_categories(non_empty), ignore_index=True)
+    for column in keys:
+        if combined[column].dtype == object:
+            combined[column] = combined[column].astype('category')
+    values = [c for c in combined.columns if c not in keys]
+    return combined.groupby(keys, observed=True, dropna=dropna)[values].sum().reset_index()
+
+def build_cube(df: pd.DataFrame, dataset: str, value_columns: List[str], date_column: str = 'enrolment_date',
+               state_column: str = 'state_cleaned', district_column: str = 'district_cleaned', pincode_column: str = 'pincode') -> pd.DataFrame:
+    """
+    Materialize the state x district x pincode x month rollup of one dataset.
+
+    Parameters:
+    df (pd.DataFrame): Cleaned row-level data (cleaned state/district, pincode and a date column).
+    dataset (str): Dataset name stored in the 'dataset' dimension (e.g. 'enrolment').
+    value_columns (list): Count columns to sum (e.g. ['age_0_5', 'age_5_17', 'age_18_greater']).
+    date_column (str): Date column (int yyyymmdd, datetime64 or date strings). Default is 'enrolment_date'.
+    state_column (str): Cleaned state column. Default is 'state_cleaned'.
+    district_column (str): Cleaned district column. Default is 'district_cleaned'.
+    pincode_column (str): Pincode column. Default is 'pincode'.
+
+    Returns:
+    pd.DataFrame: One row per (dataset, state, district, pincode, month) with the summed
+    `value_columns`, a 'total' column and the number of source rows in 'row_count'.
+    Months are int yyyymm values.
+    """
+    months = extract_date_parts(df[[date_column]].copy(), date_column, year_column=None, month_column=None,
+                                week_column=None, year_month_column='month')['month']
+    keys = [df[state_column].rename('state'), df[district_column].rename('district'), df[pincode_column].rename('pincode'), months]
+
+    grouped = df[value_columns].groupby(keys, observed=True, dropna=False)
+    cube = grouped.sum().astype('int64')  # rollups of int32 counts can exceed int32
+    cube['total'] = cube[value_columns].sum(axis=1)
+    cube['row_count'] = grouped.size()
+    cube = cube.reset_index()
+
+    cube.insert(0, 'dataset', pd.Categorical([dataset] * len(cube)))
+    for column in ['state', 'district']:
+        if not isinstance(cube[column].dtype, pd.CategoricalDtype):
+            cube[column] = cube[column].astype('category')
+    return cube
+
+def save_cube(cube: pd.DataFrame, cube_dir: str) -> List[str]:
+    """
+    Store a cube as one Parquet file per dataset in `cube_dir`.
+
+    Parameters:
+    cube (pd.DataFrame): Output of build_cube (one or several datasets).
+    cube_dir (str): Target directory (config.CUBE_DIR).
+
+    Returns:
+    list: Paths written.
+    """
+    os.makedirs(cube_dir, exist_ok=True)
+    paths = []
+    for dataset, part in cube.groupby('dataset', observed=True):
+        path = os.path.join(cube_dir, f"{dataset}.parquet")
+        other_measures = [c for c in part.columns if c not in CUBE_DIMENSIONS and part[c].isna().all()]
+        part = part.drop(columns=other_measures)  # measures that belong to other datasets
+        part.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+        paths.append(path)
+    return paths
+
+def load_cube(cube_dir: str, datasets: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load stored cubes; measures missing from a dataset are filled with 0.
+
+    Parameters:
+    cube_dir (str): Directory written by save_cube.
+    datasets (list, optional): Datasets to load. Defaults to every stored cube.
+
+    Returns:
+    pd.DataFrame: The combined cube.
+    """
+    if datasets is None:
+        datasets = sorted(os.path.splitext(f)[0] for f in os.listdir(cube_dir) if f.endswith('.parquet'))
+
+    parts = [pd.read_parquet(os.path.join(cube_dir, f"{dataset}.parquet")) for dataset in datasets]
+    if not parts:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS)
+    if len(parts) == 1:
+        return parts[0]
+
+    cube = pd.concat(parts, ignore_index=True)
+    measures = [c for c in cube.columns if c not in CUBE_DIMENSIONS]
+    cube[measures] = cube[measures].fillna(0).astype('int64')
+    for column in ['dataset', 'state', 'district']:
+        cube[column] = cube[column].astype('category')
+    return cube
+
+def _filter_mask(cube: pd.DataFrame, filters: Dict[str, object]) -> pd.Series:
+    mask = pd.Series(True, index=cube.index)
+    for column, value in filters.items():
+        if isinstance(value, tuple):  # inclusive (low, high) range, e.g. months
+            low, high = value
+            mask &= cube[column].between(low, high)
+        elif isinstance(value, (list, set)):
+            mask &= cube[column].isin(value)
+        else:
+            mask &= cube[column] == value
+    return mask
+
+def query_cube(cube: pd.DataFrame, by: List[str], measures: Optional[List[str]] = None, filters: Optional[Dict[str, object]] = None,
+               sort_by: Optional[str] = None, ascending: bool = False, top: Optional[int] = None) -> pd.DataFrame:
+    """
+    Answer a rollup (e.g. district by month, state totals) from the cube.
+
+    Parameters:
+    cube (pd.DataFrame): Output of build_cube / load_cube.
+    by (list): Dimensions to keep, e.g. ['district', 'month']. An empty list gives grand totals.
+    measures (list, optional): Measures to sum. Defaults to every non-dimension column.
+    filters (dict, optional): Dimension -> value, list of values, or inclusive (low, high) tuple,
+        e.g. {'state': 'West Bengal', 'month': (202503, 202506)}.
+    sort_by (str, optional): Measure to sort by.
+    ascending (bool): Sort order. Default is False (largest first).
+    top (int, optional): Keep only the first `top` rows after sorting.
+
+    Returns:
+    pd.DataFrame: Aggregated measures per `by` key.
+    """
+    if measures is None:
+        measures = [c for c in cube.columns if c not in CUBE_DIMENSIONS]
+    if filters:
+        cube = cube[_filter_mask(cube, filters)]
+
+    if by:
+        result = cube.groupby(by, observed=True)[measures].sum().reset_index()
+    else:
+        result = cube[measures].sum().to_frame().T
+
+    if sort_by:
+        result = result.sort_values(sort_by, ascending=ascending)
+    if top:
+        result = result.head(top)
+    return result.reset_index(drop=True)
+
+def with_shares(result: pd.DataFrame, measures: List[str], total_column: str = 'total') -> pd.DataFrame:
+    """
+    Add '<measure>_share' columns holding each measure as a fraction of `total_column`.
+
+    Parameters:
+    result (pd.DataFrame): Output of query_cube.
+    measures (list): Measures to express as shares (e.g. the age bands).
+    total_column (str): Denominator column. Default is 'total'.
+
+    Returns:
+    pd.DataFrame: `result` with the share columns added.
+    """
+    total = result[total_column].where(result[total_column] != 0)
+    for measure in measures:
+        result[f"{measure}_share"] = result[measure] / total
+    return result
@@ -0,0 +1,259 @@
+import os
+import gzip
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union
+
+from src.utils.instrumentation import instrument
+
+# Export format -> file extension
+EXPORT_FORMATS = {'parquet': '.parquet', 'csv': '.csv', 'jsonl': '.jsonl.gz'}
+
+# Excel's sheet limit (1,048,576 rows including the header)
+EXCEL_MAX_ROWS = 1_048_575
+
+def format_from_path(path: str) -> str:
+    """Export format of a path by its extension ('.parquet', '.csv' or '.jsonl.gz')."""
+    for fmt, extension in EXPORT_FORMATS.items():
+        if path.lower().endswith(extension):
+            return fmt
+    raise ValueError(f"Unsupported export format: {path}")
+
+def _chunks(frames: Union[pd.DataFrame, Iterable[pd.DataFrame]], chunk_rows: int):
+    # Split frames into slices of at most chunk_rows; a named or multi-level index becomes columns.
+    # Without any rows, one empty frame is still yielded so writers get the columns (Parquet schema, CSV header)
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    rows, empty = 0, None
+    for frame in frames:
+        if not isinstance(frame.index, pd.RangeIndex):
+            frame = frame.reset_index()
+        if empty is None:
+            empty = frame.iloc[:0]
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows]
+            rows += len(chunk)
+            yield chunk
+    if rows == 0 and empty is not None:
+        yield empty
+
+def _write_parquet(chunks, path: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows, writer = 0, None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                writer = pq.ParquetWriter(path, pa.Schema.from_pandas(chunk, preserve_index=False))
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if not table.schema.equals(writer.schema):
+                table = table.cast(writer.schema)  # e.g. categorical codes of another width
+            writer.write_table(table)
+            rows += len(chunk)
+        if writer is None:
+            # No frames at all: a valid Parquet file without columns
+            pq.write_table(pa.table({}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+def _write_csv(chunks, path: str) -> int:
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        for chunk in chunks:
+            chunk.to_csv(f, header=rows == 0, index=False)
+            rows += len(chunk)
+    return rows
+
+def _write_jsonl(chunks, path: str) -> int:
+    rows = 0
+    with gzip.open(path, 'wt', compresslevel=6) as f:
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            text = chunk.to_json(orient='records', lines=True)
+            f.write(text if text.endswith('\n') else text + '\n')  # older pandas omit the final newline
+            rows += len(chunk)
+    return rows
+
+_WRITERS = {'parquet': _write_parquet, 'csv': _write_csv, 'jsonl': _write_jsonl}
+
+def write_table(frames: Union[pd.DataFrame, Iterable[pd.DataFrame]], path: str, fmt: Optional[str] = None,
+                chunk_rows: int = 100_000) -> int:
+    """
+    Write one frame, or a stream of frames with the same columns, to a single file.
+
+    Rows are written chunk by chunk (Parquet row groups, CSV blocks, gzip-compressed
+    JSON lines), so a generator of frames (e.g. streaming partial results) is never
+    concatenated in memory. The file is written under a temporary name and moved into
+    place when complete. A non-range index is written as columns. Frames without rows
+    still give a file with their columns (Parquet schema, CSV header).
+
+    Parameters:
+    frames (pd.DataFrame or iterable): Data to write.
+    path (str): Output file.
+    fmt (str, optional): 'parquet', 'csv' or 'jsonl'. Defaults to the format of the extension.
+    chunk_rows (int): Rows per written chunk. Default is 100,000.
+
+    Returns:
+    int: Rows written.
+    """
+    fmt = fmt or format_from_path(path)
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Choose from {list(_WRITERS)}")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    rows = _WRITERS[fmt](_chunks(frames, chunk_rows), path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return rows
+
+def _partition_dir(columns: List[str], values) -> str:
+    # Hive-style 'column=value' directories, readable by pyarrow.dataset / pd.read_parquet
+    return os.path.join(*[f"{column}={str(value).replace(os.sep, '_')}" for column, value in zip(columns, values)])
+
+def _clear_partitions(output_dir: str, partition_by: List[str], scopes: Optional[List[tuple]], file_name: str) -> int:
+    # Remove the partition files (file_name in any export format) of a dataset, or only those below
+    # the given leading partition values, and the directories left empty. Other files are kept
+    if scopes is None:
+        prefix = partition_by[0] + '='
+        roots = [os.path.join(output_dir, entry) for entry in (os.listdir(output_dir) if os.path.isdir(output_dir) else [])
+                 if entry.startswith(prefix)]
+    else:
+        roots = [os.path.join(output_dir, _partition_dir(partition_by, values)) for values in scopes]
+    names = {file_name + extension for extension in EXPORT_FORMATS.values()}
+    names |= {name + '.tmp' for name in names}
+    removed = 0
+    for root in roots:
+        for directory, _, files in os.walk(root, topdown=False):
+            for name in files:
+                if name in names:
+                    os.remove(os.path.join(directory, name))
+                    removed += 1
+            if not os.listdir(directory):
+                os.rmdir(directory)
+    return removed
+
+@instrument
+def export_partitioned(df: pd.DataFrame, output_dir: str, partition_by: List[str], fmt: str = 'parquet', max_workers: Optional[int] = None,
+                       chunk_rows: int = 100_000, file_name: str = 'part-0', replace_within: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Write a frame as one file per partition, e.g. per state and month.
+
+    Partitions are written as `output_dir/<col>=<value>/.../part-0<ext>` by a thread
+    pool; Parquet, CSV and gzip writers release the GIL, so many states export
+    concurrently. The partition columns are encoded in the directory names and left
+    out of the files.
+
+    Partitions of an earlier export that this one does not write again (e.g. a month
+    that has no rows any more) are removed first, so the directory never mixes runs.
+    By default that covers the whole dataset; with `replace_within`, only partitions
+    below the written values of those leading columns are replaced, so several
+    exports (e.g. one per state) can share a dataset.
+
+    Parameters:
+    df (pd.DataFrame): Rows (typically an aggregate) with the `partition_by` columns.
+    output_dir (str): Root directory of the export.
+    partition_by (list): Partition columns, e.g. ['state_cleaned', 'month'].
+    fmt (str): 'parquet', 'csv' or 'jsonl'. Default is 'parquet'.
+    max_workers (int, optional): Writer threads.
+    chunk_rows (int): Rows per written chunk.
+    file_name (str): File name (without extension) inside each partition directory.
+    replace_within (list, optional): Leading partition columns scoping the replacement, e.g.
+        ['state_cleaned']. Default replaces every existing partition of the dataset.
+
+    Returns:
+    pd.DataFrame: One row per written file with the partition values, 'path' and 'rows'.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Choose from {list(EXPORT_FORMATS)}")
+    missing = [c for c in partition_by if c not in df.columns]
+    if missing:
+        raise KeyError(f"Partition columns not in frame: {missing}")
+    if replace_within is not None and replace_within != partition_by[:len(replace_within)]:
+        raise ValueError(f"replace_within {replace_within} must be leading columns of partition_by {partition_by}")
+
+    values_df = df[[c for c in df.columns if c not in partition_by]]
+    jobs = []
+    for values, positions in df.groupby(partition_by, observed=True, sort=True).indices.items():
+        values = values if isinstance(values, tuple) else (values,)
+        path = os.path.join(output_dir, _partition_dir(partition_by, values), file_name + EXPORT_FORMATS[fmt])
+        jobs.append((values, path, positions))
+
+    scopes = None
+    if replace_within:
+        scopes = sorted({values[:len(replace_within)] for values, _, _ in jobs})
+    _clear_partitions(output_dir, partition_by, scopes, file_name)
+
+    def _write(job):
+        _, path, positions = job
+        return write_table(values_df.take(positions).reset_index(drop=True), path, fmt, chunk_rows)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = list(executor.map(_write, jobs))
+
+    manifest = pd.DataFrame([dict(zip(partition_by, values)) for values, _, _ in jobs], columns=partition_by)
+    manifest['path'] = [path for _, path, _ in jobs]
+    manifest['rows'] = rows
+    return manifest
+
+def export_excel_summary(sheets: Dict[str, pd.DataFrame], path: str) -> str:
+    """
+    Write small aggregates (e.g. district totals) as sheets of one Excel workbook.
+
+    Excel is only a summary format: frames beyond the sheet row limit are rejected,
+    so row-level or pincode-level data has to go through write_table / export_partitioned.
+
+    Parameters:
+    sheets (dict): Sheet name -> frame (the index is written).
+    path (str): Output .xlsx file.
+
+    Returns:
+    str: The written path.
+    """
+    for name, frame in sheets.items():
+        if len(frame) > EXCEL_MAX_ROWS:
+            raise ValueError(f"Sheet '{name}' has {len(frame)} rows, more than Excel allows ({EXCEL_MAX_ROWS}); export it as Parquet/CSV/JSONL")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with pd.ExcelWriter(path) as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name[:31])
+    return path
+
+@instrument
+def export_aggregate(df: pd.DataFrame, output_dir: str, name: str, fmt: str = 'parquet', partition_by: Optional[List[str]] = None,
+                     excel_summary: bool = False, max_workers: Optional[int] = None, chunk_rows: int = 100_000,
+                     replace_within: Optional[List[str]] = None) -> dict:
+    """
+    Export one aggregate in `fmt`, partitioned or as a single file, plus an optional Excel summary.
+
+    Parameters:
+    df (pd.DataFrame): The aggregate (a non-range index is written as columns).
+    output_dir (str): Directory of the export (config.EXPORT_DIR).
+    name (str): Base name, e.g. 'wb_enrolment_dist_level'.
+    fmt (str): 'parquet', 'csv' or 'jsonl'. Default is 'parquet'.
+    partition_by (list, optional): Write `output_dir/name/<col>=<value>/...` partitions instead of one file.
+    excel_summary (bool): Also write `output_dir/name.xlsx` (small aggregates only).
+    max_workers (int, optional): Writer threads for partitioned exports.
+    chunk_rows (int): Rows per written chunk.
+    replace_within (list, optional): See export_partitioned; old partitions are replaced on re-export.
+
+    Returns:
+    dict: 'path' (file or partition root), 'rows', 'files' (manifest or None) and 'excel_path' (or None).
+    """
+    files = None
+    if partition_by:
+        frame = df if isinstance(df.index, pd.RangeIndex) else df.reset_index()
+        path = os.path.join(output_dir, name)
+        files = export_partitioned(frame, path, partition_by, fmt, max_workers, chunk_rows, replace_within=replace_within)
+        rows = int(files['rows'].sum())
+    else:
+        path = os.path.join(output_dir, name + EXPORT_FORMATS[fmt])
+        rows = write_table(df, path, fmt, chunk_rows)
+
+    excel_path = export_excel_summary({name: df}, os.path.join(output_dir, name + '.xlsx')) if excel_summary else None
+    return {'path': path, 'rows': rows, 'files': files, 'excel_path': excel_path}
@@ -0,0 +1,87 @@
+import os
+import pickle
+import hashlib
+from typing import Optional
+
+# Column names used for district names in the GeoJSON files we have seen
+POSSIBLE_DISTRICT_COLUMNS = ['district', 'DISTRICT', 'dtname', 'DTNAME', 'district_name', 'Name', 'NAME', 'District']
+
+# Parsed geometries for this process, keyed by (path, size, mtime, tolerance)
+_GEOMETRY_MEMO = {}
+
+def find_district_column(gdf) -> Optional[str]:
+    """Return the name of the district column of a boundary GeoDataFrame, or None."""
+    for col in POSSIBLE_DISTRICT_COLUMNS:
+        if col in gdf.columns:
+            return col
+    return None
+
+def _file_sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_district_geometry(geojson_path: str, cache_dir: Optional[str] = None, simplify_tolerance: Optional[float] = None,
+                           memoize: bool = True):
+    """
+    Load district boundaries with a normalized 'district_normalized' name column.
+
+    The GeoJSON is parsed at most once per process. When `cache_dir` is given the
+    parsed (and optionally simplified) GeoDataFrame is also pickled there under the
+    file's content hash, so other processes and later runs skip parsing entirely.
+    Callers that keep their own bounded cache (StateRegistry) pass memoize=False so
+    the module-level memo does not pin every file ever loaded.
+
+    Parameters:
+    geojson_path (str): Path to the district GeoJSON file.
+    cache_dir (str, optional): Directory for pickled geometries (config.GEOMETRY_CACHE_DIR).
+    simplify_tolerance (float, optional): Tolerance passed to GeoSeries.simplify; None keeps full detail.
+    memoize (bool): Keep the result in the per-process memo. Default is True.
+
+    Returns:
+    gpd.GeoDataFrame: Columns 'district_normalized' and 'geometry'.
+    """
+    stat = os.stat(geojson_path)
+    memo_key = (os.path.abspath(geojson_path), stat.st_size, stat.st_mtime_ns, simplify_tolerance)
+    if memo_key in _GEOMETRY_MEMO:
+        return _GEOMETRY_MEMO[memo_key]
+
+    cache_path = None
+    if cache_dir:
+        name = f"{_file_sha1(geojson_path)}_{simplify_tolerance or 0}.pkl"
+        cache_path = os.path.join(cache_dir, name)
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                gdf = pickle.load(f)
+            if memoize:
+                _GEOMETRY_MEMO[memo_key] = gdf
+            return gdf
+
+    # geopandas (with shapely/pyproj) takes about a second to import; only boundary loading needs it
+    import geopandas as gpd
+
+    gdf = gpd.read_file(geojson_path)
+    dist_col = find_district_column(gdf)
+    if not dist_col:
+        raise ValueError(f"Could not identify district column in {geojson_path}. Available columns: {list(gdf.columns)}")
+
+    # Normalize GeoJSON district names for merging, keeping only what plotting needs
+    gdf = gpd.GeoDataFrame(
+        {'district_normalized': gdf[dist_col].astype(str).str.strip()},
+        geometry=gdf.geometry,
+        crs=gdf.crs
+    )
+    if simplify_tolerance:
+        gdf['geometry'] = gdf.geometry.simplify(simplify_tolerance, preserve_topology=True)
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path + '.tmp', 'wb') as f:
+            pickle.dump(gdf, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_path + '.tmp', cache_path)
+
+    if memoize:
+        _GEOMETRY_MEMO[memo_key] = gdf
+    return gdf
@@ -0,0 +1,145 @@
+import os
+import json
+import pandas as pd
+from typing import Dict, List, Optional
+
+from src.data_processing.cache import file_fingerprint
+from src.data_processing.cleaning import clean_name, clean_district_names
+from src.data_processing.cube import CUBE_DIMENSIONS, build_cube, merge_partials, save_cube
+from src.data_processing.loading import load_data
+from src.data_processing.transformation import date_format_change
+
+def _shard_name(file_path: str) -> str:
+    return os.path.splitext(os.path.basename(file_path))[0]
+
+def read_manifest(state_dir: str) -> dict:
+    """Return {shard name: fingerprint} of the shards already ingested into `state_dir`."""
+    path = os.path.join(state_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_manifest(state_dir: str, manifest: dict) -> None:
+    """Atomically replace the manifest in `state_dir`."""
+    path = os.path.join(state_dir, 'manifest.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def _write_quality(quarantine_dir: str, name: str, checked: dict) -> None:
+    # A shard's quarantined rows and per-rule counts, kept until the shard is re-ingested or removed
+    path = os.path.join(quarantine_dir, name)
+    checked['quarantine'].to_parquet(path + '.parquet.tmp')
+    os.replace(path + '.parquet.tmp', path + '.parquet')
+    with open(path + '.json.tmp', 'w') as f:
+        json.dump({'rows': checked['rows'], 'violations': dict(zip(checked['counts']['rule'], checked['counts']['violations'].tolist()))}, f)
+    os.replace(path + '.json.tmp', path + '.json')
+
+def _remove_quality(quarantine_dir: str, name: str) -> None:
+    for extension in ['.parquet', '.json']:
+        path = os.path.join(quarantine_dir, name + extension)
+        if os.path.exists(path):
+            os.remove(path)
+
+def _read_quality(quarantine_dir: str, name: str, quality_rules) -> dict:
+    # The stored validate() result of a shard, in the order of `quality_rules`
+    path = os.path.join(quarantine_dir, name)
+    if not os.path.exists(path + '.json'):
+        return {'quarantine': pd.DataFrame({'violations': pd.Categorical([])}),
+                'counts': pd.DataFrame({'violations': [0] * len(quality_rules.rules)}), 'rows': 0}
+    with open(path + '.json') as f:
+        stored = json.load(f)
+    counts = pd.DataFrame({'violations': [stored['violations'].get(rule.name, 0) for rule in quality_rules.rules]})
+    return {'quarantine': pd.read_parquet(path + '.parquet'), 'counts': counts, 'rows': stored['rows']}
+
+def ingest_incremental(dataset: str, file_paths: List[str], schema: Dict[str, str], value_columns: List[str], state_mapping: dict,
+                       state_configs: dict, state_dir: str, cube_dir: str, cache_dir: Optional[str] = None, cache_version: int = 1,
+                       quality_rules=None, settings: Optional[str] = None, state_resolver=None, district_resolvers: Optional[dict] = None) -> dict:
+    """
+    Bring a dataset's stored cube up to date, processing only new or changed shards.
+
+    Each shard is reduced to its own partial cube, stored under `state_dir/partials`
+    together with a manifest of shard fingerprints. On later runs only shards whose
+    fingerprint is new or different are loaded and cleaned; removed shards drop out.
+    The stored cube is then re-summed from the partial cubes, so a refresh costs time
+    proportional to the new data plus the (small) size of the cube.
+
+    Parameters:
+    dataset (str): Dataset name (e.g. 'enrolment').
+    file_paths (list): Current shard paths of the dataset.
+    schema (dict): Column -> dtype mapping used to read the shards.
+    value_columns (list): Count columns to aggregate.
+    state_mapping (dict): Mapping used to clean state names (config.STATE_MAPPING).
+    state_configs (dict): Per-state district cleaning config (config.STATE_CONFIGS).
+    state_dir (str): Directory holding this dataset's manifest and partial cubes.
+    cube_dir (str): Directory of the stored cubes (config.CUBE_DIR).
+    cache_dir (str, optional): Columnar shard cache used when loading new shards.
+    cache_version (int): Cache schema version (config.CACHE_SCHEMA_VERSION).
+    quality_rules (DataQualityRules, optional): Rows violating any rule are left out of the partial cubes
+        and kept per shard under `state_dir/quarantine`.
+    settings (str, optional): Digest of the cleaning settings and rules (store.settings_hash); it is part
+        of every shard's fingerprint, so changed settings re-ingest all shards.
+    state_resolver (NameResolver, optional): Fallback for state spellings STATE_MAPPING misses.
+    district_resolvers (dict, optional): State name -> NameResolver for districts the mappings miss.
+
+    Returns:
+    dict: Names of the 'added', 'updated', 'removed' and 'unchanged' shards, and 'quality'
+    (DataQualityRules.merge over every current shard, or None without quality_rules).
+    """
+    partial_dir = os.path.join(state_dir, 'partials')
+    quarantine_dir = os.path.join(state_dir, 'quarantine')
+    os.makedirs(partial_dir, exist_ok=True)
+    os.makedirs(quarantine_dir, exist_ok=True)
+    manifest = read_manifest(state_dir)
+
+    summary = {'added': [], 'updated': [], 'removed': [], 'unchanged': []}
+    current = {}
+    for file_path in file_paths:
+        name = _shard_name(file_path)
+        fingerprint = file_fingerprint(file_path, schema, cache_version)
+        if settings is not None:
+            fingerprint['settings'] = settings
+        current[name] = fingerprint
+        if manifest.get(name) == fingerprint:
+            summary['unchanged'].append(name)
+            continue
+
+        summary['updated' if name in manifest else 'added'].append(name)
+        print(f"Ingesting {file_path}...")
+        df = load_data([file_path], schema, cache_dir=cache_dir, cache_version=cache_version)
+        df = date_format_change(df, 'enrolment_date')
+        df = clean_name(df, 'state', state_mapping, 'state_cleaned', state_resolver)
+        df = clean_district_names(df, state_configs, resolvers=district_resolvers)
+        if quality_rules is not None:
+            df, checked = quality_rules.split(df)
+            _write_quality(quarantine_dir, name, checked)
+        else:
+            _remove_quality(quarantine_dir, name)
+        partial = build_cube(df, dataset, value_columns)
+        partial_path = os.path.join(partial_dir, f"{name}.parquet")
+        partial.to_parquet(partial_path + '.tmp', index=False)
+        os.replace(partial_path + '.tmp', partial_path)
+
+    for name in set(manifest) - set(current):
+        summary['removed'].append(name)
+        partial_path = os.path.join(partial_dir, f"{name}.parquet")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        _remove_quality(quarantine_dir, name)
+
+    cube_path = os.path.join(cube_dir, f"{dataset}.parquet")
+    if summary['added'] or summary['updated'] or summary['removed'] or not os.path.exists(cube_path):
+        partials = [pd.read_parquet(os.path.join(partial_dir, f"{name}.parquet")) for name in sorted(current)]
+        if partials:
+            save_cube(merge_partials(partials, CUBE_DIMENSIONS, dropna=False), cube_dir)
+        elif os.path.exists(cube_path):
+            os.remove(cube_path)
+
+    # Only record shards once the cube that includes them has been written
+    write_manifest(state_dir, current)
+
+    summary['quality'] = None
+    if quality_rules is not None:
+        summary['quality'] = quality_rules.merge([_read_quality(quarantine_dir, name, quality_rules) for name in sorted(current)])
+    return summary
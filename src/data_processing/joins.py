@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+from src.data_processing.cleaning import factorize_column
+
+# Key dimensions shared by the enrolment, demographic and biometric datasets
+JOIN_DIMENSIONS = ['date', 'state', 'district', 'pincode']
+
+def encode_keys(df: pd.DataFrame, value_columns: List[str], date_column: str = 'enrolment_date', state_column: str = 'state_cleaned',
+                district_column: str = 'district_cleaned', pincode_column: str = 'pincode') -> dict:
+    """
+    Reduce a dataset to integer-coded join keys and its count columns.
+
+    The result holds only numpy arrays plus the (small) distinct values of each key
+    column, so the source DataFrame can be released before the join.
+
+    Parameters:
+    df (pd.DataFrame): Cleaned dataset with a yyyymmdd date column, cleaned state/district and pincode.
+    value_columns (list): Count columns to carry into the fact table.
+    date_column (str): Date column. Default is 'enrolment_date'.
+    state_column (str): Cleaned state column. Default is 'state_cleaned'.
+    district_column (str): Cleaned district column. Default is 'district_cleaned'.
+    pincode_column (str): Pincode column. Default is 'pincode'.
+
+    Returns:
+    dict: {'codes': {dimension: codes}, 'uniques': {dimension: values}, 'values': {column: array}}.
+    """
+    columns = dict(zip(JOIN_DIMENSIONS, [date_column, state_column, district_column, pincode_column]))
+    encoded = {'codes': {}, 'uniques': {}, 'values': {}}
+    for dimension, column in columns.items():
+        codes, uniques = factorize_column(df[column])
+        encoded['codes'][dimension] = codes
+        encoded['uniques'][dimension] = uniques
+    for column in value_columns:
+        encoded['values'][column] = df[column].to_numpy()
+    return encoded
+
+def _shared_dictionary(uniques_list: List[pd.Index]) -> pd.Index:
+    union = uniques_list[0]
+    for uniques in uniques_list[1:]:
+        union = union.union(uniques)
+    try:
+        return union.sort_values()
+    except TypeError:  # mixed types cannot be sorted
+        return union
+
+def join_encoded(encoded: Dict[str, dict]) -> pd.DataFrame:
+    """
+    Full outer join of encoded datasets on (date, state, district, pincode).
+
+    Each dataset's codes are remapped onto shared dictionaries and packed into one
+    int64 key (mixed radix). The sorted union of keys is built once and every
+    dataset's counts are summed into it with searchsorted + bincount, i.e. a
+    sort-merge join that never materializes string keys or intermediate merges.
+    Rows sharing a key within a dataset are summed.
+
+    Parameters:
+    encoded (dict): Dataset name -> output of encode_keys.
+
+    Returns:
+    pd.DataFrame: One row per key with every dataset's count columns side by side
+    (0 where a dataset has no rows for the key) and a '<dataset>_total' column each.
+    """
+    dictionaries = {
+        dimension: _shared_dictionary([e['uniques'][dimension] for e in encoded.values()])
+        for dimension in JOIN_DIMENSIONS
+    }
+    # One extra slot per dimension for missing values
+    sizes = [len(dictionaries[dimension]) + 1 for dimension in JOIN_DIMENSIONS]
+    if np.prod([float(s) for s in sizes]) >= 2 ** 63:
+        raise ValueError("Join key space does not fit into 64 bits")
+
+    keys = {}
+    for name, e in encoded.items():
+        key = np.zeros(len(e['codes'][JOIN_DIMENSIONS[0]]), dtype='int64')
+        for dimension, size in zip(JOIN_DIMENSIONS, sizes):
+            remap = dictionaries[dimension].get_indexer(e['uniques'][dimension])
+            remap = np.append(np.where(remap < 0, size - 1, remap), size - 1)  # code -1 -> missing slot
+            key = key * size + remap[e['codes'][dimension]]
+        keys[name] = key
+
+    union = np.unique(np.concatenate(list(keys.values())))
+
+    fact = {}
+    remaining = union
+    for dimension, size in reversed(list(zip(JOIN_DIMENSIONS, sizes))):
+        remaining, codes = np.divmod(remaining, size)
+        codes = np.where(codes == size - 1, -1, codes)
+        values = dictionaries[dimension]
+        if dimension in ('state', 'district'):
+            fact[dimension] = pd.Categorical.from_codes(codes, values)
+        elif (codes < 0).any():
+            fact[dimension] = pd.array(values.to_numpy()).take(codes, allow_fill=True)
+        else:
+            fact[dimension] = values.to_numpy()[codes]
+            if pd.api.types.is_integer_dtype(values):
+                fact[dimension] = fact[dimension].astype('int32')  # yyyymmdd dates and pincodes fit
+    fact = pd.DataFrame({dimension: fact[dimension] for dimension in JOIN_DIMENSIONS})
+
+    for name, e in encoded.items():
+        positions = np.searchsorted(union, keys[name])
+        total = np.zeros(len(union), dtype='int64')
+        for column, values in e['values'].items():
+            summed = np.bincount(positions, weights=values, minlength=len(union)).astype('int64')
+            fact[column] = summed
+            total += summed
+        fact[f"{name}_total"] = total
+    return fact
+
+def build_fact_table(frames: Dict[str, pd.DataFrame], value_columns: Dict[str, List[str]], **column_names) -> pd.DataFrame:
+    """
+    Align several cleaned datasets on (date, state, district, pincode) in one wide table.
+
+    Parameters:
+    frames (dict): Dataset name -> cleaned DataFrame (e.g. {'enrolment': ..., 'demographic': ...}).
+    value_columns (dict): Dataset name -> count columns (config.DATASET_VALUE_COLUMNS).
+    **column_names: Key column overrides passed to encode_keys (date_column, state_column, ...).
+
+    Returns:
+    pd.DataFrame: The joined fact table (see join_encoded).
+    """
+    encoded = {name: encode_keys(df, value_columns[name], **column_names) for name, df in frames.items()}
+    return join_encoded(encoded)
@@ -1,30 +1,121 @@
 import os
 import pandas as pd
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from pandas.api.types import union_categoricals
+from typing import Callable, Dict, List, Optional
 
-def load_data(file_paths : List[str]) -> pd.DataFrame:
-    dfs = [] # List to hold individual DataFrames
-    
+from src.data_processing.cache import file_fingerprint, read_cached_shard, write_cached_shard
+from src.utils.instrumentation import instrument
+
+def read_shard(file_path: str, schema: Optional[Dict[str, str]] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a single CSV shard, optionally restricted to a column schema.
+
+    Parameters:
+    file_path (str): Path to the CSV file.
+    schema (dict, optional): Mapping of column name to dtype. Only these columns are read.
+    columns (list, optional): Subset of columns to read.
+
+    Returns:
+    pd.DataFrame: The shard as a DataFrame.
+    """
+    if schema:
+        usecols = [c for c in schema if columns is None or c in columns]
+        return pd.read_csv(file_path, usecols=usecols, dtype={c: schema[c] for c in usecols})
+    return pd.read_csv(file_path, usecols=columns)
+
+def combine_shards(dfs: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate shards into one DataFrame, keeping categorical columns categorical.
+
+    pd.concat turns categoricals whose categories differ between shards into object
+    columns, so those are merged with union_categoricals instead; all other columns
+    are concatenated as usual. The shards are not modified. Like pd.concat, the result
+    is a copy, so peak memory is the shards plus the combined frame until the caller
+    drops its references to the shards.
+
+    Parameters:
+    dfs (list): Shards with identical columns.
+
+    Returns:
+    pd.DataFrame: Combined DataFrame with a fresh RangeIndex.
+    """
+    if len(dfs) == 1:
+        return dfs[0].reset_index(drop=True)
+
+    columns = list(dfs[0].columns)
+    combined = {}
+    for column in columns:
+        parts = [df[column] for df in dfs]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            combined[column] = union_categoricals(parts, sort_categories=True)
+        else:
+            combined[column] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(combined, columns=columns)
+
+@instrument
+def load_data(file_paths : List[str], schema: Optional[Dict[str, str]] = None, max_workers: Optional[int] = None,
+              cache_dir: Optional[str] = None, cache_version: int = 1, columns: Optional[List[str]] = None,
+              shard_transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> pd.DataFrame:
+    """
+    Load and combine CSV shards, reading them concurrently.
+
+    Parameters:
+    file_paths (list): Paths to the CSV shards.
+    schema (dict, optional): Column -> dtype mapping (e.g. config.ENROLMENT_SCHEMA). When given,
+        only these columns are read and no dtype inference is done.
+    max_workers (int, optional): Number of shards read in parallel.
+    cache_dir (str, optional): Directory of the columnar shard cache (config.CACHE_DIR). Shards whose
+        fingerprint matches are served from the cache; the rest are parsed and cached.
+    cache_version (int): Cache schema version (config.CACHE_SCHEMA_VERSION).
+    columns (list, optional): Only return these columns. Cache entries always hold the full schema,
+        so projected loads still share them.
+    shard_transform (callable, optional): Applied to each shard before the shards are combined,
+        e.g. to filter rows early so the full dataset is never assembled.
+
+    Returns:
+    pd.DataFrame: Combined DataFrame.
+    """
     for file_path in file_paths:
         if not os.path.exists(file_path):
             print(f"File not found: {file_path}")
-        
-        print("*"*50)
-        
-        print(f"Loading file: {file_path}...")
 
-        try:
-            df = pd.read_csv(file_path)
-            dfs.append(df)
+    def _read(file_path):
+        if cache_dir:
+            fingerprint = file_fingerprint(file_path, schema, cache_version)
+            df = read_cached_shard(file_path, cache_dir, fingerprint, columns)
+            if df is not None:
+                print(f"Loaded {file_path} from cache with shape {df.shape}")
+                return df
+
+            # Parse the full schema so the cache entry serves every projection
+            df = read_shard(file_path, schema)
             print(f"Successfully loaded {file_path} with shape {df.shape}")
+            df = write_cached_shard(df, file_path, cache_dir, fingerprint)
+            return df[columns] if columns is not None else df
+
+        df = read_shard(file_path, schema, columns)
+        print(f"Successfully loaded {file_path} with shape {df.shape}")
+        return df
+
+    def _load(file_path):
+        print(f"Loading file: {file_path}...")
+        try:
+            df = _read(file_path)
+            return shard_transform(df) if shard_transform else df
         except Exception as e:
             print(f"Error loading {file_path}: {e}")
             raise
 
+    # The C parser releases the GIL while tokenizing, so threads overlap the reads
+    # without the pickling cost a process pool would add to every shard.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dfs = list(executor.map(_load, file_paths)) # Shards in input order
+
     if not dfs:
         return pd.DataFrame()  # Return empty DataFrame
-    
-    combined_df = pd.concat(dfs, axis=0, ignore_index=True)
+
+    combined_df = combine_shards(dfs)
     print("*"*50)
     print(f"Combined DataFrame shape: {combined_df.shape}")
     return combined_df
@@ -0,0 +1,99 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Iterable, List, Optional, Tuple
+
+class LocationDictionary:
+    """
+    Master tables of states and districts with stable integer ids.
+
+    Ids are positions in append-only lists: names seen for the first time get the
+    next free id, and the dictionary is persisted as JSON, so ids never change
+    between runs or datasets. Districts are keyed by (state id, name) because the
+    same district name exists in several states.
+
+    Parameters:
+    states (list, optional): State names in id order.
+    districts (list, optional): (state_id, district name) pairs in id order.
+    """
+
+    def __init__(self, states: Optional[List[str]] = None, districts: Optional[List[Tuple[int, str]]] = None):
+        self.states = list(states or [])
+        self.districts = [tuple(d) for d in (districts or [])]
+        self._state_ids = {name: i for i, name in enumerate(self.states)}
+        self._district_ids = {pair: i for i, pair in enumerate(self.districts)}
+
+    @classmethod
+    def from_config(cls, state_mapping: dict, state_configs: dict) -> 'LocationDictionary':
+        """Seed the dictionary with the canonical names in STATE_MAPPING and each state's district mapping."""
+        locations = cls()
+        locations.add_states(sorted(set(state_mapping.values())))
+        for state_name in sorted(state_configs):
+            mapping = state_configs[state_name].get('district_mapping', {})
+            locations.add_districts(state_name, sorted(set(mapping.values())))
+        return locations
+
+    @classmethod
+    def load(cls, path: str) -> 'LocationDictionary':
+        """Load a dictionary written by save()."""
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['states'], data['districts'])
+
+    @classmethod
+    def load_or_create(cls, path: str, state_mapping: dict, state_configs: dict) -> 'LocationDictionary':
+        """Load the persisted dictionary, or seed a new one from config if none exists yet."""
+        if os.path.exists(path):
+            return cls.load(path)
+        return cls.from_config(state_mapping, state_configs)
+
+    def save(self, path: str) -> None:
+        """Persist the dictionary as JSON (atomically)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'states': self.states, 'districts': [list(d) for d in self.districts]}, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def add_states(self, names: Iterable[str]) -> np.ndarray:
+        """Return the ids of `names`, assigning new ids to names not seen before."""
+        ids = []
+        for name in names:
+            if name not in self._state_ids:
+                self._state_ids[name] = len(self.states)
+                self.states.append(name)
+            ids.append(self._state_ids[name])
+        return np.asarray(ids, dtype='int32')
+
+    def add_districts(self, state_name: str, names: Iterable[str]) -> np.ndarray:
+        """Return the ids of `names` within `state_name`, assigning new ids where needed."""
+        state_id = int(self.add_states([state_name])[0])
+        ids = []
+        for name in names:
+            pair = (state_id, name)
+            if pair not in self._district_ids:
+                self._district_ids[pair] = len(self.districts)
+                self.districts.append(pair)
+            ids.append(self._district_ids[pair])
+        return np.asarray(ids, dtype='int32')
+
+    def register(self, df: pd.DataFrame, state_column: str = 'state_cleaned', district_column: str = 'district_cleaned') -> 'LocationDictionary':
+        """
+        Give the distinct cleaned (state, district) names of `df` ids, without adding columns to it.
+
+        Keeps the persisted master tables complete; the frames and exports carry
+        categorical names. Missing names are skipped.
+
+        Parameters:
+        df (pd.DataFrame): Frame with cleaned location columns.
+        state_column (str): Cleaned state column. Default is 'state_cleaned'.
+        district_column (str): Cleaned district column. Default is 'district_cleaned'.
+
+        Returns:
+        LocationDictionary: self.
+        """
+        for state_name, district_name in df.groupby([state_column, district_column], observed=True).size().index:
+            self.add_districts(state_name, [district_name])
+        return self
@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from src.data_processing.cache import file_fingerprint, read_cached_shard
+from src.data_processing.cleaning import clean_name, clean_district_names, replace_names
+from src.data_processing.cube import merge_partials
+from src.data_processing.streaming import iter_chunks
+from src.data_processing.transformation import date_format_change, extract_date_parts
+from src.data_processing.validation import PincodeDistrictIntegrity, integrity_table
+from src.utils.instrumentation import instrument
+
+def _read_partition(file_path: str, schema: Optional[Dict[str, str]], chunksize: int, cache_dir: Optional[str], cache_version: int):
+    """Yield a shard's rows in chunks, from the columnar cache when it holds the shard."""
+    if cache_dir:
+        cached = read_cached_shard(file_path, cache_dir, file_fingerprint(file_path, schema, cache_version))
+        if cached is not None:
+            for start in range(0, len(cached), chunksize):
+                yield cached.iloc[start:start + chunksize].copy()
+            return
+    yield from iter_chunks([file_path], schema, chunksize)
+
+def process_partition(file_path: str, plan: dict) -> dict:
+    """
+    Clean, filter and reduce one shard to partial aggregates (runs in a worker process).
+
+    The shard is read in chunks, so a worker holds at most one chunk of rows plus the
+    (small) partial aggregates.
+
+    Parameters:
+    file_path (str): CSV shard.
+    plan (dict): Built by run_partitioned.
+
+    Returns:
+    dict: 'rows' (rows kept after filtering), 'level' and 'integrity' partials, and 'quality'
+    (merged rule counts and quarantined rows, or None without rules).
+    """
+    level_keys, value_columns = plan['group_by'], plan['value_columns']
+    rules = plan['quality_rules']
+    rows, level_parts, integrity_parts, checks = 0, [], [], []
+    for chunk in _read_partition(file_path, plan['schema'], plan['chunksize'], plan['cache_dir'], plan['cache_version']):
+        chunk = clean_name(chunk, 'state', plan['state_mapping'], 'state_cleaned', plan['state_resolver'])
+        if rules is not None:
+            chunk, checked = rules.split(chunk)
+            checks.append(checked)
+        if plan['state_name']:
+            chunk = chunk.take(np.flatnonzero((chunk['state_cleaned'] == plan['state_name']).to_numpy()))
+        if chunk.empty:
+            continue
+
+        if plan['state_name'] and plan['district_mapping'] is not None:
+            resolver = plan['district_resolvers'].get(plan['state_name'])
+            chunk = clean_name(chunk, 'district', plan['district_mapping'], 'district_cleaned', resolver)
+            if plan['district_fixes']:
+                chunk = replace_names(chunk, 'district_cleaned', plan['district_fixes'])
+        else:
+            chunk = clean_district_names(chunk, plan['state_configs'], resolvers=plan['district_resolvers'])
+        if 'month' in level_keys:
+            chunk = date_format_change(chunk, 'enrolment_date')
+            chunk = extract_date_parts(chunk, 'enrolment_date', year_column=None, week_column=None)
+        chunk[plan['total_column']] = chunk[plan['age_columns']].sum(axis=1)
+
+        rows += len(chunk)
+        level_parts.append(chunk.groupby(level_keys, observed=True)[value_columns].sum().reset_index())
+        if plan['validate']:
+            integrity_parts.append(integrity_table(chunk, plan['age_columns']))
+
+    return {
+        'rows': rows,
+        'level': merge_partials(level_parts, level_keys),
+        'integrity': merge_partials(integrity_parts, ['district_cleaned', 'pincode']) if plan['validate'] else None,
+        'quality': rules.merge(checks) if rules is not None else None
+    }
+
+@instrument
+def run_partitioned(file_paths: List[str], state_mapping: dict, age_columns: List[str], schema: Optional[Dict[str, str]] = None,
+                    state_name: Optional[str] = None, district_mapping: Optional[dict] = None, district_fixes: Optional[dict] = None,
+                    state_configs: Optional[dict] = None, group_by: Optional[List[str]] = None, total_column: str = 'total_enroll',
+                    validate: bool = True, max_workers: Optional[int] = None, chunksize: int = 250_000,
+                    cache_dir: Optional[str] = None, cache_version: int = 1, district_resolvers: Optional[dict] = None,
+                    quality_rules=None, state_resolver=None) -> dict:
+    """
+    Out-of-core, parallel equivalent of load -> clean_name -> filter_by_state -> filter_df_by_level (+ integrity checks).
+
+    Every shard is a partition handed to a worker process, which streams it in
+    chunks and returns partial group sums and a partial (district, pincode)
+    integrity table. Both are sums over disjoint rows, so merging the partials
+    gives exactly the results of running the pandas functions on the full
+    frame, while no process ever holds more than a chunk of rows.
+
+    Parameters:
+    file_paths (list): CSV shards.
+    state_mapping (dict): Mapping used to clean the state column (config.STATE_MAPPING).
+    age_columns (list): Count columns.
+    schema (dict, optional): Column -> dtype mapping used to read the shards.
+    state_name (str, optional): Keep only this cleaned state (filter_by_state). None keeps all states.
+    district_mapping (dict, optional): District mapping of `state_name`; districts are cleaned with
+        clean_district_names and `state_configs` when no state or mapping is given.
+    district_fixes (dict, optional): Replacements applied after the district mapping.
+    state_configs (dict, optional): Per-state district config (config.STATE_CONFIGS).
+    group_by (list, optional): Level to aggregate at. Default is ['district_cleaned'] (or
+        ['state_cleaned', 'district_cleaned'] without a state filter); 'month' is derived when used.
+    total_column (str): Row total of `age_columns`. Default is 'total_enroll'.
+    validate (bool): Also build the PincodeDistrictIntegrity checks.
+    max_workers (int, optional): Worker processes.
+    chunksize (int): Rows per chunk within a partition.
+    cache_dir (str, optional): Columnar shard cache; cached shards are read instead of the CSV.
+    cache_version (int): Cache schema version (config.CACHE_SCHEMA_VERSION).
+    district_resolvers (dict, optional): State name -> NameResolver for districts the mappings miss.
+        Workers use copies, so aliases they find are not written back to the alias cache.
+    quality_rules (DataQualityRules, optional): Rows violating any rule are quarantined in the workers.
+    state_resolver (NameResolver, optional): Fallback for state spellings the mapping misses (as in
+        main's load_state_rows). Workers use copies, like the district resolvers.
+
+    Returns:
+    dict: 'level' (same as filter_df_by_level on the filtered, cleaned frame), 'integrity'
+    (PincodeDistrictIntegrity or None), 'rows' (rows after filtering) and 'quality'
+    (DataQualityRules.merge of all shards, or None without quality_rules).
+    """
+    if group_by is None:
+        group_by = ['district_cleaned'] if state_name else ['state_cleaned', 'district_cleaned']
+    plan = {
+        'schema': schema,
+        'state_mapping': state_mapping,
+        'state_resolver': state_resolver,
+        'state_name': state_name,
+        'district_mapping': district_mapping,
+        'district_fixes': district_fixes,
+        'state_configs': state_configs or {},
+        'district_resolvers': district_resolvers or {},
+        'group_by': list(group_by),
+        'age_columns': list(age_columns),
+        'value_columns': list(age_columns) + [total_column],
+        'total_column': total_column,
+        'validate': validate,
+        'chunksize': chunksize,
+        'cache_dir': cache_dir,
+        'cache_version': cache_version,
+        'quality_rules': quality_rules
+    }
+
+    # Fold partials as workers finish, so memory holds one merged partial per output
+    rows, level, integrity, quality = 0, [], [], []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process_partition, file_path, plan): file_path for file_path in file_paths}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error processing partition {futures[future]}: {e}")
+                raise
+            print(f"Finished partition {futures[future]} ({result['rows']} rows)")
+            if quality_rules is not None:
+                quality = [quality_rules.merge(quality + [result['quality']])]
+            if not result['rows']:
+                continue
+            rows += result['rows']
+            level = [merge_partials(level + [result['level']], plan['group_by'])]
+            if validate:
+                integrity = [merge_partials(integrity + [result['integrity']], ['district_cleaned', 'pincode'])]
+
+    level_df = level[0] if level else pd.DataFrame(columns=plan['group_by'] + plan['value_columns'])
+    level_df = level_df.sort_values(by=total_column, ascending=False).reset_index(drop=True)
+    checks = None
+    if validate:
+        table = integrity[0] if integrity else pd.DataFrame(columns=['district_cleaned', 'pincode'] + plan['age_columns'] + ['row_count'])
+        checks = PincodeDistrictIntegrity.from_table(table, age_columns)
+    quality_result = (quality[0] if quality else quality_rules.merge([])) if quality_rules is not None else None
+    return {'level': level_df, 'integrity': checks, 'rows': rows, 'quality': quality_result}
@@ -0,0 +1,255 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+
+from src.data_processing.cleaning import clean_name, replace_names
+from src.data_processing.export import export_excel_summary, write_table
+from src.data_processing.loading import load_data
+from src.data_processing.transformation import date_format_change, extract_date_parts
+from src.data_processing.validation import PincodeDistrictIntegrity
+
+class Pipeline:
+    """
+    Lazily recorded load -> clean -> filter -> validate -> aggregate -> export pipeline.
+
+    Builder methods only record stages; nothing is read until run(). Row stages
+    (cleaning, filters, derived columns) declare the columns they read and write,
+    and outputs (validation, aggregates, exports) declare what they need. run()
+    walks the stages backwards from the requested outputs, drops stages nobody
+    needs, projects the shards down to the columns still required and applies the
+    row stages to every shard before the shards are combined, so the state filter
+    runs before any district cleaning and the full national frame is never built.
+    Row stages add columns in place and filters select rows with take(), so no
+    stage makes a defensive copy of the frame.
+
+    Parameters:
+    file_paths (list): Paths to the CSV shards.
+    schema (dict, optional): Column -> dtype mapping (e.g. config.ENROLMENT_SCHEMA).
+    max_workers (int, optional): Number of shards loaded in parallel.
+    cache_dir (str, optional): Columnar shard cache (config.CACHE_DIR).
+    cache_version (int): Cache schema version (config.CACHE_SCHEMA_VERSION).
+
+    Example:
+    >>> pipeline = (Pipeline(config.ENROLMENT_DATA_PATHS, config.ENROLMENT_SCHEMA)
+    ...     .clean_states(config.STATE_MAPPING)
+    ...     .filter_state('West Bengal')
+    ...     .clean_districts(config.DISTRICT_MAPPING_WB)
+    ...     .add_total(['age_0_5', 'age_5_17', 'age_18_greater'])
+    ...     .aggregate('district_level', ['district_cleaned'], ['age_0_5', 'age_5_17', 'age_18_greater', 'total_enroll'], sort_by='total_enroll'))
+    >>> results = pipeline.run(['district_level'])
+    """
+
+    def __init__(self, file_paths: List[str], schema: Optional[Dict[str, str]] = None, max_workers: Optional[int] = None,
+                 cache_dir: Optional[str] = None, cache_version: int = 1):
+        self.file_paths = file_paths
+        self.schema = schema
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.cache_version = cache_version
+        self.stages = []
+        self.outputs = {}
+
+    def _add_stage(self, name: str, reads: List[str], writes: List[str], func: Callable, is_filter: bool = False,
+                   reset: Optional[Callable] = None) -> 'Pipeline':
+        self.stages.append({'name': name, 'reads': set(reads), 'writes': set(writes), 'func': func, 'filter': is_filter, 'reset': reset})
+        return self
+
+    def _add_output(self, name: str, reads: List[str], func: Callable, depends: Optional[List[str]] = None) -> 'Pipeline':
+        if name in self.outputs:
+            raise ValueError(f"Output '{name}' is already defined")
+        self.outputs[name] = {'reads': set(reads), 'func': func, 'depends': list(depends or [])}
+        return self
+
+    # Row stages
+
+    def clean_states(self, state_mapping: dict, column: str = 'state', cleaned_column: str = 'state_cleaned',
+                     resolver=None) -> 'Pipeline':
+        """Record clean_name on the state column (with an optional NameResolver for unmapped spellings)."""
+        return self._add_stage(
+            'clean_states', [column], [cleaned_column],
+            lambda df: clean_name(df, column, state_mapping, cleaned_column, resolver)
+        )
+
+    def apply_rules(self, rules, name: str = 'quality') -> 'Pipeline':
+        """
+        Record a filter dropping rows that violate any of `rules` (a DataQualityRules).
+
+        The rule counts and quarantined rows of all shards are output `name`
+        (DataQualityRules.merge result).
+        """
+        checked = []
+
+        def _apply(df):
+            df, result = rules.split(df)
+            checked.append(result)
+            return df
+        self._add_stage('apply_rules', rules.columns, [], _apply, is_filter=True, reset=checked.clear)
+        return self._add_output(name, [], lambda df, results: rules.merge(checked))
+
+    def filter_state(self, state_name: str, state_column: str = 'state_cleaned') -> 'Pipeline':
+        """Record a filter keeping only the rows of `state_name`."""
+        return self._add_stage(
+            f"filter_state[{state_name}]", [state_column], [],
+            lambda df: df.take(np.flatnonzero((df[state_column] == state_name).to_numpy())),
+            is_filter=True
+        )
+
+    def clean_districts(self, district_mapping: dict, district_fixes: Optional[dict] = None, column: str = 'district',
+                        cleaned_column: str = 'district_cleaned', resolver=None) -> 'Pipeline':
+        """Record clean_name on the district column (with an optional NameResolver), followed by any exact fixes."""
+        def _clean(df):
+            df = clean_name(df, column, district_mapping, cleaned_column, resolver)
+            return replace_names(df, cleaned_column, district_fixes) if district_fixes else df
+        return self._add_stage('clean_districts', [column], [cleaned_column], _clean)
+
+    def format_dates(self, date_column: str = 'enrolment_date', source_column: str = 'date', new_format: Optional[str] = '%Y%m%d') -> 'Pipeline':
+        """Record date_format_change (int yyyymmdd dates by default)."""
+        return self._add_stage(
+            'format_dates', [source_column], [date_column],
+            lambda df: date_format_change(df, date_column, new_format, source_column)
+        )
+
+    def add_date_parts(self, date_column: str = 'enrolment_date', year_column: Optional[str] = 'year', month_column: Optional[str] = 'month',
+                       week_column: Optional[str] = 'week', year_month_column: Optional[str] = None) -> 'Pipeline':
+        """Record extract_date_parts; pass None to skip a part."""
+        writes = [c for c in [year_column, month_column, week_column, year_month_column] if c]
+        return self._add_stage(
+            'add_date_parts', [date_column], writes,
+            lambda df: extract_date_parts(df, date_column, year_column, month_column, week_column, year_month_column)
+        )
+
+    def add_total(self, columns: List[str], total_column: str = 'total_enroll') -> 'Pipeline':
+        """Record a row-wise sum of `columns` into `total_column`."""
+        def _total(df):
+            df[total_column] = df[columns].sum(axis=1)
+            return df
+        return self._add_stage('add_total', columns, [total_column], _total)
+
+    # Outputs
+
+    def validate(self, age_columns: List[str], name: str = 'integrity', pincode_column: str = 'pincode',
+                 district_column: str = 'district_cleaned') -> 'Pipeline':
+        """Record a PincodeDistrictIntegrity index over the final rows as output `name`."""
+        return self._add_output(
+            name, age_columns + [pincode_column, district_column],
+            lambda df, results: PincodeDistrictIntegrity(df, age_columns, pincode_column, district_column)
+        )
+
+    def aggregate(self, name: str, by: List[str], value_columns: List[str], sort_by: Optional[str] = None, ascending: bool = False) -> 'Pipeline':
+        """Record a groupby-sum of `value_columns` by `by` as output `name`, optionally sorted."""
+        def _aggregate(df, results):
+            result = df.groupby(by, observed=True)[value_columns].sum()
+            return result.sort_values(sort_by, ascending=ascending) if sort_by else result
+        return self._add_output(name, by + value_columns, _aggregate)
+
+    def export(self, name: str, source: str, path: str) -> 'Pipeline':
+        """
+        Record writing output `source` to `path` as output `name`.
+
+        The format follows the extension: .parquet, .csv or .jsonl.gz (see write_table),
+        or .xlsx for a summary sheet of a small aggregate. The output's value is the
+        written path.
+        """
+        def _export(df, results):
+            if path.lower().endswith('.xlsx'):
+                return export_excel_summary({name: results[source]}, path)
+            write_table(results[source], path)
+            return path
+        return self._add_output(name, [], _export, depends=[source])
+
+    # Planning and execution
+
+    def _resolve_outputs(self, outputs: Optional[List[str]]) -> List[str]:
+        wanted = list(self.outputs) if outputs is None else list(outputs)
+        ordered = []
+        def _visit(name):
+            if name not in self.outputs:
+                raise ValueError(f"Unknown output '{name}'")
+            for dependency in self.outputs[name]['depends']:
+                _visit(dependency)
+            if name not in ordered:
+                ordered.append(name)
+        for name in wanted:
+            _visit(name)
+        return ordered
+
+    def plan(self, outputs: Optional[List[str]] = None) -> dict:
+        """
+        Work out what run(outputs) will execute.
+
+        Parameters:
+        outputs (list, optional): Output names to compute. Defaults to every recorded output.
+
+        Returns:
+        dict: 'outputs' (in execution order, dependencies included), 'stages' (live row
+        stages in order) and 'columns' (source columns to read).
+        """
+        names = self._resolve_outputs(outputs)
+        required = set()
+        for name in names:
+            required |= self.outputs[name]['reads']
+
+        live = []
+        for stage in reversed(self.stages):
+            if stage['filter'] or stage['writes'] & required:
+                live.append(stage)
+                required = (required - stage['writes']) | stage['reads']
+        live.reverse()
+
+        if self.schema:
+            missing = required - set(self.schema)
+            if missing:
+                raise ValueError(f"Columns not in schema or produced by any stage: {sorted(missing)}")
+            columns = [c for c in self.schema if c in required]
+        else:
+            columns = sorted(required)
+        return {'outputs': names, 'stages': live, 'columns': columns}
+
+    def explain(self, outputs: Optional[List[str]] = None) -> str:
+        """Return a readable description of the plan for `outputs`."""
+        plan = self.plan(outputs)
+        skipped = [s['name'] for s in self.stages if s not in plan['stages']]
+        lines = [f"load {len(self.file_paths)} shard(s), columns {plan['columns']}"]
+        lines += [f"  per shard: {s['name']}" for s in plan['stages']]
+        lines += [f"output: {name}" for name in plan['outputs']]
+        if skipped:
+            lines.append(f"skipped: {skipped}")
+        return "\n".join(lines)
+
+    def run(self, outputs: Optional[List[str]] = None) -> dict:
+        """
+        Execute the stages needed for `outputs`.
+
+        Parameters:
+        outputs (list, optional): Output names to compute. Defaults to every recorded output.
+
+        Returns:
+        dict: Output name -> result (only the requested outputs).
+        """
+        plan = self.plan(outputs)
+        stages = plan['stages']
+        for stage in stages:
+            if stage['reset'] is not None:
+                stage['reset']()
+
+        def _apply_stages(df):
+            for stage in stages:
+                df = stage['func'](df)
+            return df
+
+        df = load_data(
+            self.file_paths,
+            self.schema,
+            self.max_workers,
+            cache_dir=self.cache_dir,
+            cache_version=self.cache_version,
+            columns=plan['columns'],
+            shard_transform=_apply_stages if stages else None
+        )
+
+        results = {}
+        for name in plan['outputs']:
+            results[name] = self.outputs[name]['func'](df, results)
+
+        wanted = plan['outputs'] if outputs is None else outputs
+        return {name: results[name] for name in wanted}
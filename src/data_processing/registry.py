@@ -0,0 +1,211 @@
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from src.data_processing.cleaning import clean_name, normalize_names, replace_names
+from src.data_processing.geometry import load_district_geometry
+from src.data_processing.resolver import NameResolver
+from src.data_processing.spatial import SpatialDistrictResolver
+
+def state_slug(state_name: str) -> str:
+    """Return a file-name friendly slug for a state, e.g. 'West Bengal' -> 'west_bengal'."""
+    return re.sub(r'[^a-z0-9]+', '_', state_name.lower()).strip('_')
+
+def get_state_config(state_name: str, state_configs: Dict[str, dict], raw_data_dir: str) -> dict:
+    """
+    Resolve the pipeline configuration for a state, filling in defaults.
+
+    Parameters:
+    state_name (str): Cleaned state name.
+    state_configs (dict): Per-state overrides (config.STATE_CONFIGS).
+    raw_data_dir (str): Directory searched for '<slug>_districts.geojson' when no path is configured.
+
+    Returns:
+    dict: Config with 'slug', 'district_mapping', 'district_fixes' and 'geojson_path'.
+    """
+    state_config = dict(state_configs.get(state_name, {}))
+    slug = state_slug(state_name)
+    state_config.setdefault('slug', slug)
+    state_config.setdefault('district_mapping', {})
+    state_config.setdefault('district_fixes', {})
+    state_config.setdefault('geojson_path', os.path.join(raw_data_dir, f"{slug}_districts.geojson"))
+    return state_config
+
+class StateRegistry:
+    """
+    Lazily loaded, memoized per-state reference data: config, canonical districts,
+    alias mapping, district resolver, boundary geometry and its spatial index.
+
+    Each piece is built on first use and kept for the state until it is evicted;
+    at most `max_states` states are held, least recently used first out (their
+    resolver alias caches are saved on eviction). Cleaning and plotting both pull
+    from the same registry, so a boundary file is parsed and a state's names are
+    normalized once per process instead of once per call.
+
+    Canonical districts come from the state's 'canonical_districts' config, else
+    the values of its 'district_mapping', else the names in its boundary file.
+    Boundary names are mapped onto the canonical names too, so the heatmap merge
+    matches e.g. 'Koch Bihar' in the GeoJSON to 'Cooch Behar' in the data.
+
+    Parameters:
+    state_configs (dict): Per-state configuration (config.STATE_CONFIGS).
+    raw_data_dir (str): Directory searched for '<slug>_districts.geojson' when no path is configured.
+    alias_dir (str, optional): Directory of the resolver alias caches (config.ALIAS_CACHE_DIR).
+    geometry_cache_dir (str, optional): Directory for pickled geometries (config.GEOMETRY_CACHE_DIR).
+    simplify_tolerance (float, optional): Simplify district polygons when loading.
+    max_states (int): Number of states kept in memory. Default is 8.
+    resolver_options (dict, optional): threshold / min_margin passed to NameResolver.
+    """
+
+    def __init__(self, state_configs: Dict[str, dict], raw_data_dir: str, alias_dir: Optional[str] = None,
+                 geometry_cache_dir: Optional[str] = None, simplify_tolerance: Optional[float] = None, max_states: int = 8,
+                 resolver_options: Optional[dict] = None):
+        self.state_configs = state_configs
+        self.raw_data_dir = raw_data_dir
+        self.alias_dir = alias_dir
+        self.geometry_cache_dir = geometry_cache_dir
+        self.simplify_tolerance = simplify_tolerance
+        self.max_states = max_states
+        self.resolver_options = resolver_options or {}
+        self._entries = OrderedDict()
+
+    def _entry(self, state_name: str) -> dict:
+        entry = self._entries.get(state_name)
+        if entry is None:
+            entry = {'config': get_state_config(state_name, self.state_configs, self.raw_data_dir)}
+            self._entries[state_name] = entry
+            while len(self._entries) > self.max_states:
+                _, evicted = self._entries.popitem(last=False)
+                if evicted.get('resolver') is not None:
+                    evicted['resolver'].save()
+        else:
+            self._entries.move_to_end(state_name)
+        return entry
+
+    def config(self, state_name: str) -> dict:
+        """Resolved config of a state (see get_state_config)."""
+        return self._entry(state_name)['config']
+
+    def _raw_geometry(self, state_name: str):
+        entry = self._entry(state_name)
+        if 'raw_geometry' not in entry:
+            path = entry['config']['geojson_path']
+            entry['raw_geometry'] = None
+            if os.path.exists(path):
+                try:
+                    entry['raw_geometry'] = load_district_geometry(path, self.geometry_cache_dir, self.simplify_tolerance, memoize=False)
+                except ValueError as e:
+                    print(e)
+        return entry['raw_geometry']
+
+    def canonical_districts(self, state_name: str) -> List[str]:
+        """Canonical district names of a state (empty when nothing is configured or on disk)."""
+        entry = self._entry(state_name)
+        if 'canonical' not in entry:
+            config = entry['config']
+            canonical = config.get('canonical_districts') or sorted(set(config['district_mapping'].values()))
+            if not canonical:
+                gdf = self._raw_geometry(state_name)
+                canonical = sorted(gdf['district_normalized'].unique()) if gdf is not None else []
+            entry['canonical'] = list(canonical)
+        return entry['canonical']
+
+    def resolver(self, state_name: str) -> Optional[NameResolver]:
+        """The state's district resolver (with its alias cache), or None without canonical names."""
+        entry = self._entry(state_name)
+        if 'resolver' not in entry:
+            canonical = self.canonical_districts(state_name)
+            cache_path = os.path.join(self.alias_dir, f"{entry['config']['slug']}_districts.json") if self.alias_dir else None
+            entry['resolver'] = NameResolver(canonical, entry['config']['district_mapping'], cache_path, **self.resolver_options) if canonical else None
+        return entry['resolver']
+
+    def district_mapping(self, state_name: str) -> dict:
+        """Configured mapping plus the aliases the resolver has accepted so far."""
+        mapping = dict(self.config(state_name)['district_mapping'])
+        resolver = self.resolver(state_name)
+        if resolver is not None:
+            for alias, canonical in resolver.aliases.items():
+                mapping.setdefault(alias, canonical)
+        return mapping
+
+    def geometry(self, state_name: str):
+        """
+        District boundaries of a state with 'district_normalized' set to canonical names.
+
+        Returns:
+        gpd.GeoDataFrame or None: None when the state has no (readable) boundary file.
+        """
+        entry = self._entry(state_name)
+        if 'geometry' not in entry:
+            gdf = self._raw_geometry(state_name)
+            if gdf is not None and self.resolver(state_name) is not None:
+                names = gdf['district_normalized']
+                canonical = set(self.canonical_districts(state_name))
+                normalized = normalize_names(names)
+                mapped = normalized.map(self.district_mapping(state_name))
+                unmapped = mapped.isna() & ~names.isin(canonical) & normalized.notna()
+                if unmapped.any():
+                    mapped = mapped.fillna(normalized.map(self.resolver(state_name).resolve(normalized[unmapped].unique())))
+                gdf = gdf.assign(district_normalized=mapped.where(~names.isin(canonical)).fillna(names))
+            entry['geometry'] = gdf
+        return entry['geometry']
+
+    def spatial_resolver(self, state_name: str) -> Optional[SpatialDistrictResolver]:
+        """STRtree index over the state's canonical district boundaries, or None without a boundary file."""
+        entry = self._entry(state_name)
+        if 'spatial' not in entry:
+            gdf = self.geometry(state_name)
+            entry['spatial'] = SpatialDistrictResolver(gdf) if gdf is not None and len(gdf) else None
+        return entry['spatial']
+
+    def clean_districts(self, df: pd.DataFrame, state_name: str, district_column: str = 'district',
+                        cleaned_column_name: str = 'district_cleaned') -> pd.DataFrame:
+        """clean_name on a state's rows with the state's mapping and resolver, followed by its 'district_fixes'."""
+        config = self.config(state_name)
+        df = clean_name(df, district_column, config['district_mapping'], cleaned_column_name, self.resolver(state_name))
+        if config['district_fixes']:
+            df = replace_names(df, cleaned_column_name, config['district_fixes'])
+        return df
+
+    def resolvers(self, state_names: Optional[List[str]] = None) -> Dict[str, NameResolver]:
+        """State name -> resolver for `state_names` (default: every configured state) that have one."""
+        resolvers = {}
+        for state_name in state_names or list(self.state_configs):
+            resolver = self.resolver(state_name)
+            if resolver is not None:
+                resolvers[state_name] = resolver
+        return resolvers
+
+    def save(self) -> None:
+        """Persist the alias caches of the loaded resolvers."""
+        for entry in self._entries.values():
+            if entry.get('resolver') is not None:
+                entry['resolver'].save()
+
+_REGISTRY: Optional[StateRegistry] = None
+_REGISTRY_ARGS: Optional[tuple] = None
+
+def get_registry(state_configs: Dict[str, dict], raw_data_dir: str, **options) -> StateRegistry:
+    """
+    The process-wide registry, created on first use.
+
+    Later calls return the same instance, so every caller in the process shares one
+    cache. They have to pass the same arguments: a registry built for other state
+    configs or options would hand out the wrong mappings and boundaries.
+
+    Raises:
+    ValueError: When the arguments differ from those the registry was created with.
+    """
+    global _REGISTRY, _REGISTRY_ARGS
+    args = (state_configs, raw_data_dir, options)
+    if _REGISTRY is None:
+        _REGISTRY = StateRegistry(state_configs, raw_data_dir, **options)
+        _REGISTRY_ARGS = args
+    elif args != _REGISTRY_ARGS:
+        changed = [name for name, old, new in zip(['state_configs', 'raw_data_dir'], _REGISTRY_ARGS[:2], args[:2]) if old != new]
+        changed += sorted(key for key in set(options) | set(_REGISTRY_ARGS[2]) if options.get(key) != _REGISTRY_ARGS[2].get(key))
+        raise ValueError(f"get_registry called with other arguments than the existing registry: {changed}")
+    return _REGISTRY
@@ -0,0 +1,172 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional
+
+from src.data_processing.cleaning import normalize_names
+
+def name_keys(names: pd.Series) -> pd.Series:
+    """Normalized names with their words sorted, so '24 parganas north' and 'north 24 parganas' share a key."""
+    return normalize_names(names).map(lambda name: ' '.join(sorted(name.split())), na_action='ignore')
+
+def trigrams(key: str) -> set:
+    """Character trigrams of a key, padded so word starts and ends count."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NameResolver:
+    """
+    Match unmapped names to a canonical name list through a trigram index.
+
+    Every known spelling (the canonical names plus the keys of an existing mapping)
+    is reduced to a word-sorted key and indexed by its character trigrams. A query
+    only scores the spellings that share a trigram with it, via the inverted index,
+    so resolving a name never compares it against the whole list. The score is the
+    Dice coefficient of the trigram sets; a match is accepted when it reaches
+    `threshold` and beats the best other canonical name by `min_margin`, so names
+    like 'dinajpur' that fit two districts equally stay unresolved.
+
+    Accepted matches are stored in an alias cache (JSON, normalized name -> canonical
+    name) that is consulted before the index and can be reviewed or edited by hand.
+
+    Parameters:
+    canonical_names (iterable): Correct names, e.g. the districts of one state.
+    known_aliases (dict, optional): Existing mapping of normalized spellings to canonical names.
+    cache_path (str, optional): JSON alias cache, loaded if present and written by save().
+    threshold (float): Minimum similarity (0-1) to accept a match. Default is 0.7.
+    min_margin (float): Minimum lead over the second best canonical name. Default is 0.05.
+    """
+
+    def __init__(self, canonical_names: Iterable[str], known_aliases: Optional[Dict[str, str]] = None, cache_path: Optional[str] = None,
+                 threshold: float = 0.7, min_margin: float = 0.05):
+        self.canonical = sorted(set(canonical_names))
+        self.threshold = threshold
+        self.min_margin = min_margin
+        self.cache_path = cache_path
+        self.aliases = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self.aliases = json.load(f)
+        self._dirty = False
+
+        canonical_ids = {name: i for i, name in enumerate(self.canonical)}
+        spellings = {name: canonical_ids[name] for name in self.canonical}
+        for alias, target in (known_aliases or {}).items():
+            if target in canonical_ids:
+                spellings.setdefault(alias, canonical_ids[target])
+
+        keys = name_keys(pd.Series(list(spellings), dtype=object))
+        entries = [(key, target) for key, target in zip(keys, spellings.values()) if isinstance(key, str)]
+        entries = list(dict.fromkeys(entries))
+        self._entry_targets = np.array([target for _, target in entries], dtype='int64')
+        self._entry_sizes = np.array([len(trigrams(key)) for key, _ in entries], dtype='float64')
+
+        postings = {}
+        for entry_id, (key, _) in enumerate(entries):
+            for gram in trigrams(key):
+                postings.setdefault(gram, []).append(entry_id)
+        self._index = {gram: np.array(ids, dtype='int64') for gram, ids in postings.items()}
+
+    def match(self, key: str):
+        """
+        Best canonical name for one word-sorted key.
+
+        Returns:
+        tuple: (canonical name or None, score of the best candidate).
+        """
+        grams = trigrams(key)
+        hits = [self._index[gram] for gram in grams if gram in self._index]
+        if not hits:
+            return None, 0.0
+        shared = np.bincount(np.concatenate(hits), minlength=len(self._entry_sizes))
+        candidates = np.flatnonzero(shared)
+        scores = 2 * shared[candidates] / (len(grams) + self._entry_sizes[candidates])
+
+        best = np.zeros(len(self.canonical))
+        np.maximum.at(best, self._entry_targets[candidates], scores)
+        order = np.argsort(best)[::-1]
+        top = best[order[0]]
+        runner_up = best[order[1]] if len(order) > 1 else 0.0
+        if top >= self.threshold and top - runner_up >= self.min_margin:
+            return self.canonical[order[0]], float(top)
+        return None, float(top)
+
+    def resolve(self, names: Iterable[str]) -> Dict[str, str]:
+        """
+        Resolve unique normalized names (see normalize_names) to canonical names.
+
+        Parameters:
+        names (iterable): Normalized names without a mapping. Pass unique values only.
+
+        Returns:
+        dict: name -> canonical name, for the names that were resolved.
+        """
+        resolved = {}
+        misses = []
+        for name in names:
+            if name in self.aliases:
+                resolved[name] = self.aliases[name]
+            else:
+                misses.append(name)
+        if not misses:
+            return resolved
+
+        keys = name_keys(pd.Series(misses, dtype=object))
+        for name, key in zip(misses, keys):
+            if not isinstance(key, str):
+                continue
+            canonical, _ = self.match(key)
+            if canonical is not None:
+                resolved[name] = canonical
+                self.aliases[name] = canonical
+                self._dirty = True
+        return resolved
+
+    def save(self) -> None:
+        """Write new aliases to the cache file (atomically); a no-op when nothing changed."""
+        if not self.cache_path or not self._dirty:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path + '.tmp', 'w') as f:
+            json.dump(dict(sorted(self.aliases.items())), f, indent=1)
+        os.replace(self.cache_path + '.tmp', self.cache_path)
+        self._dirty = False
+
+def build_state_resolver(state_mapping: dict, alias_dir: Optional[str] = None, **options) -> NameResolver:
+    """Resolver for state names, seeded with config.STATE_MAPPING."""
+    cache_path = os.path.join(alias_dir, 'states.json') if alias_dir else None
+    return NameResolver(state_mapping.values(), state_mapping, cache_path, **options)
+
+def build_district_resolvers(state_configs: dict, alias_dir: Optional[str] = None, **options) -> Dict[str, NameResolver]:
+    """
+    One district resolver per configured state.
+
+    The canonical list is the state's 'canonical_districts' if configured, otherwise
+    the values of its 'district_mapping'. States with neither get no resolver.
+
+    Parameters:
+    state_configs (dict): Per-state configuration (config.STATE_CONFIGS).
+    alias_dir (str, optional): Directory of the alias caches ('<slug>_districts.json' per state).
+    **options: threshold / min_margin passed to NameResolver.
+
+    Returns:
+    dict: State name -> NameResolver.
+    """
+    resolvers = {}
+    for state_name, state_config in state_configs.items():
+        mapping = state_config.get('district_mapping', {})
+        canonical: List[str] = state_config.get('canonical_districts') or sorted(set(mapping.values()))
+        if not canonical:
+            continue
+        slug = state_config.get('slug', state_name.lower().replace(' ', '_'))
+        cache_path = os.path.join(alias_dir, f"{slug}_districts.json") if alias_dir else None
+        resolvers[state_name] = NameResolver(canonical, mapping, cache_path, **options)
+    return resolvers
+
+def save_resolvers(resolvers: Iterable[NameResolver]) -> None:
+    """Persist the alias caches of several resolvers."""
+    for resolver in resolvers:
+        resolver.save()
@@ -0,0 +1,124 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+# Column names used for pincodes and coordinates in the pincode directories we have seen
+POSSIBLE_PINCODE_COLUMNS = ['pincode', 'Pincode', 'PINCODE', 'pin', 'PIN']
+POSSIBLE_LATITUDE_COLUMNS = ['latitude', 'Latitude', 'LATITUDE', 'lat', 'Lat']
+POSSIBLE_LONGITUDE_COLUMNS = ['longitude', 'Longitude', 'LONGITUDE', 'lon', 'lng', 'Long']
+
+# Parsed centroid files for this process, keyed by (path, size, mtime)
+_CENTROID_MEMO = {}
+
+def _find_column(columns, candidates, path: str, kind: str) -> str:
+    for col in candidates:
+        if col in columns:
+            return col
+    raise ValueError(f"Could not identify {kind} column in {path}. Available columns: {list(columns)}")
+
+def load_pincode_centroids(path: str) -> pd.DataFrame:
+    """
+    Load one (longitude, latitude) point per pincode from a local CSV.
+
+    Post office directories list every office of a pincode, so coordinates are
+    averaged per pincode; rows with missing, zero or out-of-range coordinates are
+    dropped. The file is parsed at most once per process.
+
+    Parameters:
+    path (str): CSV with pincode, latitude and longitude columns (WGS84 degrees).
+
+    Returns:
+    pd.DataFrame: 'pincode', 'longitude' and 'latitude', one row per pincode, sorted by pincode.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _CENTROID_MEMO:
+        return _CENTROID_MEMO[memo_key]
+
+    columns = pd.read_csv(path, nrows=0).columns
+    pin_col = _find_column(columns, POSSIBLE_PINCODE_COLUMNS, path, 'pincode')
+    lat_col = _find_column(columns, POSSIBLE_LATITUDE_COLUMNS, path, 'latitude')
+    lon_col = _find_column(columns, POSSIBLE_LONGITUDE_COLUMNS, path, 'longitude')
+    df = pd.read_csv(path, usecols=[pin_col, lat_col, lon_col])
+
+    points = pd.DataFrame({
+        'pincode': pd.to_numeric(df[pin_col], errors='coerce'),
+        'longitude': pd.to_numeric(df[lon_col], errors='coerce'),
+        'latitude': pd.to_numeric(df[lat_col], errors='coerce')
+    })
+    valid = (
+        points['pincode'].notna()
+        & points['latitude'].between(-90, 90) & points['longitude'].between(-180, 180)
+        & ((points['latitude'] != 0) | (points['longitude'] != 0))
+    )
+    points = points[valid].astype({'pincode': 'int64'})
+    centroids = points.groupby('pincode', sort=True)[['longitude', 'latitude']].mean().reset_index()
+
+    _CENTROID_MEMO[memo_key] = centroids
+    return centroids
+
+class SpatialDistrictResolver:
+    """
+    Assign pincode centroids to district polygons through an STRtree index.
+
+    The polygons are indexed once; `assign` then answers every point of a table in
+    one bulk, vectorized query (bounding-box lookup in the tree followed by the
+    exact point-in-polygon test), instead of scanning the polygons per pincode. A
+    point on a shared border goes to the first matching district; points outside
+    every polygon can optionally fall back to the nearest one within `max_distance`.
+
+    Parameters:
+    geometry (gpd.GeoDataFrame): District boundaries, e.g. StateRegistry.geometry(state).
+        Reprojected to WGS84 when it has another CRS.
+    district_column (str): Column with the district names. Default is 'district_normalized'.
+    """
+
+    def __init__(self, geometry, district_column: str = 'district_normalized'):
+        # shapely is only imported by the spatial checks (see benchmarks/startup.py)
+        import shapely
+
+        if geometry.crs is not None and geometry.crs.to_epsg() != 4326:
+            geometry = geometry.to_crs(4326)
+        keep = geometry.geometry.notna() & ~geometry.geometry.is_empty
+        self.districts = geometry.loc[keep, district_column].to_numpy()
+        self.polygons = geometry.geometry[keep].to_numpy()
+        self.tree = shapely.STRtree(self.polygons)
+
+    def assign(self, centroids: pd.DataFrame, max_distance: Optional[float] = None) -> pd.DataFrame:
+        """
+        District of every pincode centroid.
+
+        Parameters:
+        centroids (pd.DataFrame): 'pincode', 'longitude' and 'latitude' (see load_pincode_centroids).
+        max_distance (float, optional): Assign points outside all polygons to the nearest district
+            within this distance (degrees). Default is None (no fallback).
+
+        Returns:
+        pd.DataFrame: 'pincode', 'district' and 'match' ('within' or 'nearest') for the pincodes
+        that could be placed; the others are left out.
+        """
+        import shapely
+
+        points = shapely.points(centroids['longitude'].to_numpy(), centroids['latitude'].to_numpy())
+        district_index = np.full(len(points), -1, dtype='int64')
+
+        # (point, polygon) index pairs; 'intersects' keeps points lying exactly on a border
+        point_index, polygon_index = self.tree.query(points, predicate='intersects')
+        first = np.unique(point_index, return_index=True)[1]
+        district_index[point_index[first]] = polygon_index[first]
+        match = np.where(district_index >= 0, 'within', None).astype(object)
+
+        if max_distance is not None:
+            outside = np.flatnonzero(district_index < 0)
+            if len(outside):
+                near_point, near_polygon = self.tree.query_nearest(points[outside], max_distance=max_distance, all_matches=False)
+                district_index[outside[near_point]] = near_polygon
+                match[outside[near_point]] = 'nearest'
+
+        placed = district_index >= 0
+        return pd.DataFrame({
+            'pincode': centroids['pincode'].to_numpy()[placed],
+            'district': self.districts[district_index[placed]],
+            'match': match[placed]
+        })
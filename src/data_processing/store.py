@@ -0,0 +1,243 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from src.data_processing.cache import file_fingerprint
+from src.data_processing.export import export_partitioned
+from src.data_processing.loading import combine_shards
+from src.utils.instrumentation import instrument
+
+# Partition statistics of a dataset, next to its partition directories
+INDEX_NAME = '_index.json'
+
+def index_path(store_dir: str, dataset: str) -> str:
+    """Path of a dataset's partition index."""
+    return os.path.join(store_dir, dataset, INDEX_NAME)
+
+def _json_default(value):
+    # Sets (e.g. known states) hash in sorted order; anything else not JSON-native by its str()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+def settings_hash(settings: dict) -> str:
+    """
+    Digest of the settings that shape a store's rows (mappings, alias caches, data-quality rules).
+
+    Parameters:
+    settings (dict): JSON-like values; sets are hashed in sorted order, other objects by str().
+
+    Returns:
+    str: Hex SHA-1 of the canonical JSON form.
+    """
+    text = json.dumps(settings, sort_keys=True, default=_json_default)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def _month_keys(dates: pd.Series) -> np.ndarray:
+    # yyyymm of int yyyymmdd (date_format_change) or datetime64 dates
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return (dates.dt.year * 100 + dates.dt.month).to_numpy(dtype='int64', na_value=0)
+    return dates.to_numpy(dtype='int64', na_value=0) // 100
+
+@instrument
+def build_store(df: pd.DataFrame, store_dir: str, dataset: str, date_column: str = 'enrolment_date', state_column: str = 'state_cleaned',
+                pincode_column: str = 'pincode', source_paths: Optional[List[str]] = None, schema: Optional[Dict[str, str]] = None,
+                schema_version: int = 1, max_workers: Optional[int] = None, chunk_rows: int = 100_000,
+                settings: Optional[str] = None) -> pd.DataFrame:
+    """
+    Write cleaned rows as one Parquet file per state and month, plus a statistics index.
+
+    The index (`<store_dir>/<dataset>/_index.json`) lists every partition with its
+    row count, bytes, min/max date and min/max pincode, so load_store can pick
+    the partitions a query needs without opening any other file. Fingerprints of
+    the source files and a settings_hash of the cleaning configuration are recorded
+    too, so callers can tell a stale store (store_is_current). Partitions of an
+    earlier build are removed before the new ones are written.
+
+    Parameters:
+    df (pd.DataFrame): Cleaned rows (e.g. load_clean_dataset) with state, date and pincode columns.
+    store_dir (str): Root of the store (config.STORE_DIR).
+    dataset (str): Dataset name, e.g. 'enrolment'.
+    date_column (str): Date column (int yyyymmdd or datetime64). Default is 'enrolment_date'.
+    state_column (str): Cleaned state column. Default is 'state_cleaned'.
+    pincode_column (str): Pincode column. Default is 'pincode'.
+    source_paths (list, optional): Raw files the rows came from, fingerprinted into the index.
+    schema (dict, optional): Schema the raw files are read with (part of the fingerprint).
+    schema_version (int): config.CACHE_SCHEMA_VERSION.
+    max_workers (int, optional): Writer threads.
+    chunk_rows (int): Rows per Parquet row group.
+    settings (str, optional): settings_hash of the configuration the rows were cleaned with.
+
+    Returns:
+    pd.DataFrame: The index, one row per partition.
+    """
+    dataset_dir = os.path.join(store_dir, dataset)
+    frame = df.reset_index(drop=True)
+    frame['month'] = _month_keys(frame[date_column])
+
+    # Statistics in one grouped pass; the files are written from the same frame
+    grouped = frame.groupby([state_column, 'month'], observed=True, sort=True)
+    stats = grouped.agg(
+        rows=(pincode_column, 'size'),
+        min_date=(date_column, 'min'),
+        max_date=(date_column, 'max'),
+        min_pincode=(pincode_column, 'min'),
+        max_pincode=(pincode_column, 'max')
+    ).reset_index()
+    files = export_partitioned(frame, dataset_dir, [state_column, 'month'], 'parquet', max_workers, chunk_rows)
+
+    index = stats.merge(files[[state_column, 'month', 'path']], on=[state_column, 'month'], how='left')
+    index['bytes'] = [os.path.getsize(path) for path in index['path']]
+    index['path'] = [os.path.relpath(path, dataset_dir) for path in index['path']]
+    for column in ['min_date', 'max_date']:
+        if pd.api.types.is_datetime64_any_dtype(index[column]):
+            index[column] = (index[column].dt.year * 10000 + index[column].dt.month * 100 + index[column].dt.day)
+    index = index.rename(columns={state_column: 'state'}).astype({'state': str})
+
+    document = {
+        'dataset': dataset,
+        'state_column': state_column,
+        'date_column': date_column,
+        'pincode_column': pincode_column,
+        'sources': {path: file_fingerprint(path, schema, schema_version) for path in source_paths or []},
+        'settings': settings,
+        'partitions': json.loads(index.to_json(orient='records'))
+    }
+    path = index_path(store_dir, dataset)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(document, f, indent=1)
+    os.replace(path + '.tmp', path)
+    return index
+
+def read_store_index(store_dir: str, dataset: str) -> dict:
+    """
+    The index document of a dataset, with 'partitions' as a DataFrame.
+
+    Raises:
+    FileNotFoundError: When the dataset has no store (build it with build_store).
+    """
+    with open(index_path(store_dir, dataset)) as f:
+        document = json.load(f)
+    document['partitions'] = pd.DataFrame(document['partitions'],
+                                          columns=['state', 'month', 'rows', 'min_date', 'max_date', 'min_pincode', 'max_pincode', 'path', 'bytes'])
+    return document
+
+def store_is_current(store_dir: str, dataset: str, source_paths: List[str], schema: Optional[Dict[str, str]] = None,
+                     schema_version: int = 1, settings: Optional[str] = None) -> bool:
+    """
+    True when the dataset's store exists and was built from exactly these, unchanged, source
+    files with the same cleaning settings (the settings_hash passed to build_store).
+    """
+    try:
+        document = read_store_index(store_dir, dataset)
+    except FileNotFoundError:
+        return False
+    if document.get('settings') != settings or set(document['sources']) != set(source_paths):
+        return False
+    return all(os.path.exists(path) and document['sources'][path] == file_fingerprint(path, schema, schema_version) for path in source_paths)
+
+def select_partitions(partitions: pd.DataFrame, states: Optional[List[str]] = None, date_range: Optional[Tuple[int, int]] = None,
+                      pincode_range: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+    """
+    Partitions whose statistics can contain matching rows.
+
+    Parameters:
+    partitions (pd.DataFrame): The 'partitions' of read_store_index.
+    states (list, optional): Cleaned state names.
+    date_range (tuple, optional): Inclusive (first, last) yyyymmdd dates; either may be None.
+    pincode_range (tuple, optional): Inclusive (lowest, highest) pincodes; either may be None.
+
+    Returns:
+    pd.DataFrame: The selected index rows.
+    """
+    keep = pd.Series(True, index=partitions.index)
+    if states is not None:
+        keep &= partitions['state'].isin(states)
+    for (low, high), (min_column, max_column) in [(date_range or (None, None), ('min_date', 'max_date')),
+                                                   (pincode_range or (None, None), ('min_pincode', 'max_pincode'))]:
+        if low is not None:
+            keep &= partitions[max_column] >= low
+        if high is not None:
+            keep &= partitions[min_column] <= high
+    return partitions[keep]
+
+def _empty_frame(dataset_dir: str, partitions: pd.DataFrame, state_column: str, state_categories: List[str],
+                 read_columns: Optional[List[str]], columns: Optional[List[str]]) -> pd.DataFrame:
+    # No partition matched: take the columns and dtypes from any partition's Parquet schema
+    import pyarrow.parquet as pq
+
+    if len(partitions):
+        schema = pq.read_schema(os.path.join(dataset_dir, partitions['path'].iloc[0]))
+        df = schema.empty_table().to_pandas()
+        if read_columns is not None:
+            df = df[[c for c in read_columns if c in df.columns]]
+    else:
+        df = pd.DataFrame()
+    df[state_column] = pd.Categorical([], categories=state_categories)
+    df['month'] = np.array([], dtype='int32')
+    return df[columns] if columns is not None else df
+
+@instrument
+def load_store(store_dir: str, dataset: str, states: Optional[List[str]] = None, date_range: Optional[Tuple[int, int]] = None,
+               pincode_range: Optional[Tuple[int, int]] = None, columns: Optional[List[str]] = None,
+               max_workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Load the rows of a dataset matching a state / date / pincode predicate from the store.
+
+    Only the partitions whose index statistics overlap the predicate are opened
+    (in parallel); rows of partly matching partitions are then filtered exactly.
+    The state and 'month' (yyyymm) partition columns are restored as columns.
+
+    Parameters:
+    store_dir (str): Root of the store (config.STORE_DIR).
+    dataset (str): Dataset name.
+    states (list, optional): Cleaned state names to load (default: all).
+    date_range (tuple, optional): Inclusive (first, last) yyyymmdd dates.
+    pincode_range (tuple, optional): Inclusive (lowest, highest) pincodes.
+    columns (list, optional): Columns to read from the files (default: all).
+    max_workers (int, optional): Reader threads.
+
+    Returns:
+    pd.DataFrame: Matching rows with a fresh RangeIndex; without matches, an empty frame
+    with the stored columns and dtypes.
+    """
+    document = read_store_index(store_dir, dataset)
+    partitions = document['partitions']
+    selected = select_partitions(partitions, states, date_range, pincode_range)
+    total_bytes = int(partitions['bytes'].sum())
+    print(f"Store {dataset}: reading {len(selected)} of {len(partitions)} partitions "
+          f"({int(selected['bytes'].sum()):,} of {total_bytes:,} bytes, {selected['bytes'].sum() / max(total_bytes, 1):.1%})")
+
+    state_column, date_column, pincode_column = document['state_column'], document['date_column'], document['pincode_column']
+    read_columns = None
+    if columns is not None:
+        filter_columns = ([date_column] if date_range else []) + ([pincode_column] if pincode_range else [])
+        read_columns = list(dict.fromkeys(c for c in columns + filter_columns if c not in (state_column, 'month')))
+    state_categories = sorted(partitions['state'].unique())
+    dataset_dir = os.path.join(store_dir, dataset)
+
+    def _read(partition):
+        part = pd.read_parquet(os.path.join(dataset_dir, partition.path), columns=read_columns)
+        part[state_column] = pd.Categorical([partition.state] * len(part), categories=state_categories)
+        part['month'] = np.full(len(part), partition.month, dtype='int32')
+        return part
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        parts = list(executor.map(_read, selected.itertuples(index=False)))
+    if not parts:
+        return _empty_frame(dataset_dir, partitions, state_column, state_categories, read_columns, columns)
+    df = combine_shards(parts)
+
+    keep = np.ones(len(df), dtype=bool)
+    for column, (low, high) in [(date_column, date_range or (None, None)), (pincode_column, pincode_range or (None, None))]:
+        if low is not None:
+            keep &= (df[column] >= low).to_numpy()
+        if high is not None:
+            keep &= (df[column] <= high).to_numpy()
+    if not keep.all():
+        df = df[keep].reset_index(drop=True)
+    return df[columns] if columns is not None else df
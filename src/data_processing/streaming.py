@@ -0,0 +1,129 @@
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+
+from src.data_processing.cleaning import clean_name
+from src.data_processing.transformation import date_format_change, extract_month_from_date, filter_by_state
+
+def iter_chunks(file_paths: List[str], schema: Optional[Dict[str, str]] = None, chunksize: int = 250_000):
+    """
+    Yield the rows of several CSV shards as DataFrame chunks of at most `chunksize` rows.
+
+    Parameters:
+    file_paths (list): Paths to the CSV shards.
+    schema (dict, optional): Column -> dtype mapping; only these columns are read.
+    chunksize (int): Maximum number of rows per chunk.
+    """
+    read_kwargs = {'usecols': list(schema), 'dtype': schema} if schema else {}
+    for file_path in file_paths:
+        print(f"Streaming file: {file_path}...")
+        with pd.read_csv(file_path, chunksize=chunksize, **read_kwargs) as reader:
+            for chunk in reader:
+                yield chunk
+
+def aggregate_chunk(chunk: pd.DataFrame, state_name: str, state_mapping: dict, group_by: List[str], value_columns: List[str],
+                    district_mapping: Optional[dict] = None, chunk_transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                    district_resolver=None, quality_rules=None, state_resolver=None,
+                    quality_results: Optional[list] = None) -> pd.DataFrame:
+    """
+    Clean, filter and partially aggregate one chunk.
+
+    Parameters:
+    chunk (pd.DataFrame): Raw rows (date, state, district, pincode, count columns).
+    state_name (str): Cleaned state name to keep (e.g. 'West Bengal').
+    state_mapping (dict): Mapping used to clean the 'state' column.
+    group_by (list): Columns to group by. 'month' is derived from 'date' when requested.
+    value_columns (list): Count columns to sum.
+    district_mapping (dict, optional): Mapping used to clean the 'district' column into 'district_cleaned'.
+    chunk_transform (callable, optional): Extra step applied to the filtered, cleaned chunk.
+    district_resolver (NameResolver, optional): Fallback for districts the mapping misses.
+    quality_rules (DataQualityRules, optional): Rows violating any rule are left out (after state cleaning).
+    state_resolver (NameResolver, optional): Fallback for state spellings the mapping misses.
+    quality_results (list, optional): The chunk's rule counts and quarantined rows are appended here
+        (DataQualityRules.split results; combine them with DataQualityRules.merge).
+
+    Returns:
+    pd.DataFrame: Partial sums of `value_columns` per `group_by` key.
+    """
+    chunk = clean_name(chunk, 'state', state_mapping, 'state_cleaned', state_resolver)
+    if quality_rules is not None:
+        chunk, checked = quality_rules.split(chunk)
+        if quality_results is not None:
+            quality_results.append(checked)
+    chunk = filter_by_state(chunk, state_name).copy()
+    if chunk.empty:
+        return chunk.reindex(columns=group_by + value_columns)
+
+    if district_mapping is not None:
+        chunk = clean_name(chunk, 'district', district_mapping, 'district_cleaned', district_resolver)
+    if 'month' in group_by:
+        chunk = date_format_change(chunk, 'formatted_date')
+        chunk = extract_month_from_date(chunk, 'formatted_date', 'month')
+    if chunk_transform is not None:
+        chunk = chunk_transform(chunk)
+
+    return chunk.groupby(group_by, observed=True)[value_columns].sum().reset_index()
+
+def merge_partial_aggregates(partials: List[pd.DataFrame], group_by: List[str], value_columns: List[str]) -> pd.DataFrame:
+    """
+    Merge partial aggregates produced per chunk into the final aggregate.
+
+    Parameters:
+    partials (list): Partial aggregates with `group_by` and `value_columns` columns.
+    group_by (list): Key columns.
+    value_columns (list): Count columns to sum.
+
+    Returns:
+    pd.DataFrame: Aggregate indexed by `group_by`.
+    """
+    partials = [p for p in partials if not p.empty]
+    if not partials:
+        return pd.DataFrame(columns=group_by + value_columns).set_index(group_by)
+
+    combined = pd.concat(partials, ignore_index=True)
+    for column in group_by:
+        # Chunks carry their own categories; compare the plain values when merging
+        if isinstance(combined[column].dtype, pd.CategoricalDtype):
+            combined[column] = combined[column].astype(combined[column].cat.categories.dtype)
+    return combined.groupby(group_by)[value_columns].sum()
+
+def stream_state_aggregate(file_paths: List[str], state_name: str, state_mapping: dict, group_by: List[str], value_columns: List[str],
+                           schema: Optional[Dict[str, str]] = None, district_mapping: Optional[dict] = None, chunksize: int = 250_000,
+                           chunk_transform: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None, total_column: Optional[str] = 'total_enroll',
+                           district_resolver=None, quality_rules=None, state_resolver=None,
+                           quality_results: Optional[list] = None) -> pd.DataFrame:
+    """
+    Aggregate one state's rows from CSV shards without loading the full dataset.
+
+    Shards are read in chunks; each chunk is cleaned, filtered to `state_name` and
+    reduced to partial group sums before the next one is read, so peak memory is
+    bounded by `chunksize` rather than by the size of the dataset.
+
+    Parameters:
+    file_paths (list): Paths to the CSV shards.
+    state_name (str): Cleaned state name to keep (e.g. 'West Bengal').
+    state_mapping (dict): Mapping used to clean the 'state' column.
+    group_by (list): Columns to group by (e.g. ['district_cleaned'] or ['district_cleaned', 'month']).
+    value_columns (list): Count columns to sum (e.g. ['age_0_5', 'age_5_17', 'age_18_greater']).
+    schema (dict, optional): Column -> dtype mapping used to read the shards.
+    district_mapping (dict, optional): Mapping used to clean the 'district' column.
+    chunksize (int): Rows per chunk.
+    chunk_transform (callable, optional): Extra step applied to each filtered, cleaned chunk.
+    total_column (str, optional): Name of a column holding the sum of `value_columns`. None to skip.
+    district_resolver (NameResolver, optional): Fallback for districts the mapping misses.
+    quality_rules (DataQualityRules, optional): Data-quality rules applied to every chunk.
+    state_resolver (NameResolver, optional): Fallback for state spellings the mapping misses; names it
+        resolves in one chunk are cached for the next ones.
+    quality_results (list, optional): Collects every chunk's rule counts and quarantined rows.
+
+    Returns:
+    pd.DataFrame: Aggregate indexed by `group_by`.
+    """
+    partials = [
+        aggregate_chunk(chunk, state_name, state_mapping, group_by, value_columns, district_mapping, chunk_transform, district_resolver,
+                        quality_rules, state_resolver, quality_results)
+        for chunk in iter_chunks(file_paths, schema, chunksize)
+    ]
+    result = merge_partial_aggregates(partials, group_by, value_columns)
+    if total_column:
+        result[total_column] = result[value_columns].sum(axis=1)
+    return result
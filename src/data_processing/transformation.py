@@ -1,40 +1,128 @@
+import numpy as np
 import pandas as pd
-import geopandas as gpd
-import matplotlib.pyplot as plt
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
 import os
 
-def date_format_change(df: pd.DataFrame, date_column: str, new_format: str = '%Y%m%d') -> pd.DataFrame:
+from src.data_processing.cleaning import clean_name
+from src.data_processing.geometry import load_district_geometry
+from src.utils.instrumentation import instrument
+
+def unique_dates(values: pd.Series, source_format: str = '%d-%m-%Y'):
+    """
+    Factorize a date column and parse each distinct value once.
+
+    Accepts int yyyymmdd values, datetime64 values or strings in `source_format`
+    (strings in '%Y%m%d' form, as produced by older versions of date_format_change,
+    are recognised as well).
+
+    Returns:
+    tuple: (codes, dates) where codes are per-row positions into the DatetimeIndex
+    `dates` and -1 marks missing values.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), pd.Series(values.cat.categories)
+    else:
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Series(uniques)
+
+    if pd.api.types.is_datetime64_any_dtype(uniques):
+        return codes, pd.DatetimeIndex(uniques)
+    if pd.api.types.is_integer_dtype(uniques):
+        return codes, pd.DatetimeIndex(pd.to_datetime(uniques.astype(str), format='%Y%m%d'))
+
+    uniques = uniques.astype(str)
+    if uniques.str.fullmatch(r'\d{8}').all():
+        source_format = '%Y%m%d'
+    return codes, pd.DatetimeIndex(pd.to_datetime(uniques, format=source_format))
+
+def _take(unique_values: np.ndarray, codes: np.ndarray):
+    """Broadcast per-unique values back to rows; rows with code -1 become missing."""
+    if (codes < 0).any():
+        return pd.array(unique_values).take(codes, allow_fill=True)
+    return unique_values[codes]
+
+@instrument
+def date_format_change(df: pd.DataFrame, date_column: str, new_format: Optional[str] = '%Y%m%d',
+                       source_column: str = 'date', source_format: str = '%d-%m-%Y') -> pd.DataFrame:
     """
-    Change the format of a date column in a DataFrame.
+    Parse the raw date column into a compact, sortable date column.
+
+    Each distinct date string is parsed once (exports only contain a few hundred
+    distinct days) and the result is broadcast back through integer codes.
 
     Parameters:
     df (pd.DataFrame): The input DataFrame.
-    date_column (str): The name of the date column to be reformatted.
-    new_format (str): The desired date format. Default is '%Y%m%d'.
+    date_column (str): The name of the new date column.
+    new_format (str, optional): '%Y%m%d' (default) stores an int32 yyyymmdd column; None stores
+        datetime64 values; any other strftime format stores categorical strings.
+    source_column (str): Column holding the raw dates. Default is 'date'.
+    source_format (str): Format of the raw dates. Default is '%d-%m-%Y'.
 
     Returns:
-    pd.DataFrame: DataFrame with reformatted date column.
+    pd.DataFrame: DataFrame with the new date column.
     """
-    df[date_column] = pd.to_datetime(df['date'], format='%d-%m-%Y').dt.strftime(new_format)
+    codes, dates = unique_dates(df[source_column], source_format)
+
+    if new_format is None:
+        df[date_column] = _take(dates.to_numpy(), codes)
+    elif new_format == '%Y%m%d':
+        yyyymmdd = (dates.year * 10000 + dates.month * 100 + dates.day).to_numpy().astype('int32')
+        df[date_column] = _take(yyyymmdd, codes)
+    else:
+        # Several dates can share a label (e.g. '%Y-%m'), so re-factorize the labels
+        label_codes, labels = pd.factorize(dates.strftime(new_format), sort=True)
+        df[date_column] = pd.Categorical.from_codes(np.append(label_codes, -1)[codes], labels)
     return df
 
+@instrument
+def extract_date_parts(df: pd.DataFrame, date_column: str = 'enrolment_date', year_column: Optional[str] = 'year',
+                       month_column: Optional[str] = 'month', week_column: Optional[str] = 'week',
+                       year_month_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    Add integer year, month and ISO week columns derived from a date column.
+
+    Works on the int yyyymmdd column produced by date_format_change as well as on
+    datetime64 or raw date strings; parts are computed per distinct date.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame containing the date column.
+    date_column (str): Name of the date column. Default is 'enrolment_date'.
+    year_column (str, optional): Name of the year column, None to skip.
+    month_column (str, optional): Name of the month column, None to skip.
+    week_column (str, optional): Name of the ISO week column, None to skip.
+    year_month_column (str, optional): Name of an int32 yyyymm column, None (default) to skip.
+
+    Returns:
+    pd.DataFrame: DataFrame with the requested columns added.
+    """
+    codes, dates = unique_dates(df[date_column])
+    parts = {
+        year_column: dates.year.to_numpy().astype('int16'),
+        month_column: dates.month.to_numpy().astype('int8'),
+        week_column: dates.isocalendar().week.to_numpy().astype('int8'),
+        year_month_column: (dates.year * 100 + dates.month).to_numpy().astype('int32')
+    }
+    for column, values in parts.items():
+        if column:
+            df[column] = _take(values, codes)
+    return df
 
 def extract_month_from_date(df, date_column='enrolment_date', month_column='month'):
     """
-    Extract month from a date column and add it as a new column.
-    
+    Extract month from a date column and add it as a new integer column.
+
     Args:
-        df: DataFrame containing the date column
+        df: DataFrame containing the date column (int yyyymmdd, datetime64 or date strings)
         date_column: Name of the column containing the date (default: 'enrolment_date')
         month_column: Name of the new column to store the month (default: 'month')
-    
+
     Returns:
         DataFrame with the new month column added
     """
-    df[month_column] = df[date_column].astype(str).str[4:6]
-    return df
+    return extract_date_parts(df, date_column, year_column=None, month_column=month_column, week_column=None)
 
+@instrument
 def filter_by_state(df: pd.DataFrame, state_name: str, state_column: str = 'state_cleaned') -> pd.DataFrame:
     """
     Filter the DataFrame for a specific state.
@@ -50,6 +138,7 @@ def filter_by_state(df: pd.DataFrame, state_name: str, state_column: str = 'stat
     filtered_df = df[df[state_column] == state_name]
     return filtered_df
 
+@instrument
 def filter_df_by_level(df: pd.DataFrame, filter_by: str, filter_label: List[str]) -> pd.DataFrame:
     """
     Aggregate and filter DataFrame by a specified grouping column.
@@ -65,102 +154,176 @@ def filter_df_by_level(df: pd.DataFrame, filter_by: str, filter_label: List[str]
     Returns:
     pd.DataFrame: Aggregated DataFrame sorted by 'total_enroll' in descending order
     """
-    return df.groupby(filter_by)[filter_label].sum().sort_values(by='total_enroll', ascending=False).reset_index()
+    return df.groupby(filter_by, observed=True)[filter_label].sum().sort_values(by='total_enroll', ascending=False).reset_index()
 
 # Generic Function to Plot Enrolment Heatmap for Any State
-def plot_state_enrolment_heatmap(enrolment_df, state_name, geojson_path, output_path, district_mapping=None):
+@instrument
+def plot_state_enrolment_heatmap(enrolment_df, state_name, geojson_path=None, output_path=None, district_mapping=None,
+                                 value_column='total_enroll', title=None, dpi=300, geometry_cache_dir=None, simplify_tolerance=None,
+                                 registry=None):
     """
     Generates and saves an enrolment heatmap for a specific state.
     
+    District names come from the frame's 'district_cleaned' column when it has one
+    (the pipeline has already cleaned them). Otherwise the 'district' column is
+    cleaned with the registry's mapping and resolver for the state, or with
+    `district_mapping` through clean_name.
+
     Args:
-        enrolment_df (pd.DataFrame): The raw enrolment dataframe containing 'state', 'district', 'total_enroll'.
+        enrolment_df (pd.DataFrame): Enrolment dataframe with 'state_cleaned', `value_column` and 'district_cleaned' or 'district'.
         state_name (str): Name of the state to filter and plot (e.g., 'West Bengal').
-        geojson_path (str): Path to the state's district GeoJSON file.
+        geojson_path (str, optional): Path to the state's district GeoJSON file; not needed with a registry.
         output_path (str): Path where the resulting PNG plot will be saved.
-        district_mapping (dict, optional): Dictionary to map/correct district names before merging.
+        district_mapping (dict, optional): Dictionary to map/correct district names when the frame has no 'district_cleaned'.
+        value_column (str, optional): Column to sum per district (default: 'total_enroll').
+        title (str, optional): Plot title (default: '<state_name> Enrolment Heatmap').
+        dpi (int, optional): Resolution of the saved PNG (default: 300).
+        geometry_cache_dir (str, optional): Directory for the pickled geometry cache.
+        simplify_tolerance (float, optional): Simplify district polygons before plotting.
+        registry (StateRegistry, optional): Shared per-state districts and boundaries (see src/data_processing/registry.py).
     """
+    if output_path is None:
+        raise ValueError("output_path is required")
     print(f"Processing data for {state_name}...")
     
     # 1. Filter Data for State
-    # Ensure state filtering is case-insensitive if needed, or rely on exact match if data is clean
-    state_df = enrolment_df[enrolment_df['state_cleaned'] == state_name].copy()
+    name_column = 'district_cleaned' if 'district_cleaned' in enrolment_df.columns else 'district'
+    state_df = enrolment_df.loc[enrolment_df['state_cleaned'] == state_name, [name_column, value_column]].copy()
     
     if state_df.empty:
         print(f"No records found for state: {state_name}")
         return
         
-    # 2. Clean District Names
-    # Basic cleaning: lowercase and strip
-    state_df['district_cleaned'] = state_df['district'].astype(str).str.lower().str.strip()
-    
-    # 3. Apply Mapping if provided
-    if district_mapping:
-        print("Applying district mapping...")
-        state_df['district_cleaned'] = state_df['district_cleaned'].map(district_mapping).fillna(state_df['district_cleaned'])
-        
-        # Capitalize for better matching if no mapping found (heuristic)
-        # But if mapping maps to Title Case, we are good. 
-        # Let's ensure the mapping values are Title Case if that's what GeoJSON has.
-    
-    # 4. Group by District
-    dist_df = state_df.groupby('district_cleaned')['total_enroll'].sum().reset_index()
-    
-    # 5. Load GeoJSON
-    if not os.path.exists(geojson_path):
-        print(f"GeoJSON file not found at: {geojson_path}")
-        return
-        
-    gdf = gpd.read_file(geojson_path)
+    # 2. Clean District Names (only when the pipeline has not done it already)
+    if name_column == 'district':
+        if registry is not None:
+            state_df = registry.clean_districts(state_df, state_name)
+        else:
+            state_df = clean_name(state_df, 'district', district_mapping or {}, 'district_cleaned')
     
-    # Find district column in GeoJSON
-    dist_col = None
-    possible_cols = ['district', 'DISTRICT', 'dtname', 'DTNAME', 'district_name', 'Name', 'NAME', 'District']
-    for col in possible_cols:
-        if col in gdf.columns:
-            dist_col = col
-            break
-            
-    if not dist_col:
-        print("Could not identify district column in GeoJSON. Available columns:", gdf.columns)
-        return
-        
-    # Normalize GeoJSON district names for merging
-    # We create a normalized column for merging, keeping original for geometry
-    gdf['district_normalized'] = gdf[dist_col].astype(str).str.strip()
-    # Note: We rely on the mapping to match this normalized name. 
-    # If mapping outputs 'Paschim Medinipur', GeoJSON must have 'Paschim Medinipur'.
+    # 3. Group by District
+    dist_df = state_df.groupby('district_cleaned', observed=True)[value_column].sum().reset_index()
+
+    # 4. Boundaries from the registry (names mapped to canonical districts) or the raw file
+    geometry = None
+    if registry is not None:
+        geometry = registry.geometry(state_name)
+        if geometry is None:
+            print(f"No district boundaries found for {state_name}")
+            return
+
+    render_district_heatmap(
+        dist_df,
+        geojson_path,
+        output_path,
+        title or f'{state_name} Enrolment Heatmap',
+        value_column=value_column,
+        dpi=dpi,
+        geometry_cache_dir=geometry_cache_dir,
+        simplify_tolerance=simplify_tolerance,
+        geometry=geometry
+    )
+
+def render_district_heatmap(dist_df, geojson_path, output_path, title, value_column='total_enroll', legend_label=None,
+                            dpi=300, geometry_cache_dir=None, simplify_tolerance=None, geometry=None):
+    """
+    Render a choropleth of per-district values onto the state's district boundaries.
+
+    Args:
+        dist_df (pd.DataFrame): One row per district with 'district_cleaned' and `value_column`.
+        geojson_path (str): Path to the state's district GeoJSON file (ignored when `geometry` is given).
+        output_path (str): Path where the resulting PNG plot will be saved.
+        title (str): Plot title.
+        value_column (str, optional): Column to colour districts by (default: 'total_enroll').
+        legend_label (str, optional): Colour bar label (default: 'Total Enrolment by District').
+        dpi (int, optional): Resolution of the saved PNG (default: 300).
+        geometry_cache_dir (str, optional): Directory for the pickled geometry cache.
+        simplify_tolerance (float, optional): Simplify district polygons before plotting.
+        geometry (gpd.GeoDataFrame, optional): Already loaded boundaries, e.g. StateRegistry.geometry().
+    """
+    # 5. Load GeoJSON (parsed once per process, optionally from the pickled cache)
+    gdf = geometry
+    if gdf is None:
+        if not geojson_path or not os.path.exists(geojson_path):
+            print(f"GeoJSON file not found at: {geojson_path}")
+            return
+
+        try:
+            gdf = load_district_geometry(geojson_path, geometry_cache_dir, simplify_tolerance)
+        except ValueError as e:
+            print(e)
+            return
     
     # 6. Merge
     # We merge on the cleaned/mapped name from DF and the normalized name from GeoJSON
     merged = gdf.merge(dist_df, left_on='district_normalized', right_on='district_cleaned', how='left')
     
     # Check for unmatched
-    unmatched_count = merged['total_enroll'].isna().sum()
+    unmatched_count = merged[value_column].isna().sum()
     if unmatched_count > 0:
         print(f"Warning: {unmatched_count} districts in GeoJSON have no matching enrolment data.")
-        unmatched_districts = merged[merged['total_enroll'].isna()]['district_normalized'].tolist()
+        unmatched_districts = merged[merged[value_column].isna()]['district_normalized'].tolist()
         print("Unmatched districts:", unmatched_districts)
     
-    # 7. Plot
+    # 7. Plot (pyplot is imported here so the data functions of this module load without it)
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(1, 1, figsize=(12, 12))
     
     # Plot all districts with base color (grey for missing data)
-    merged.plot(column='total_enroll', ax=ax, legend=True,
-                legend_kwds={'label': "Total Enrolment by District",
+    merged.plot(column=value_column, ax=ax, legend=True,
+                legend_kwds={'label': legend_label or "Total Enrolment by District",
                              'orientation': "horizontal"},
                 missing_kwds={'color': 'lightgrey', 'label': 'Missing values'},
                 cmap='YlOrRd',
                 edgecolor='black')
                 
-    plt.title(f'{state_name} Enrolment Heatmap', fontsize=16)
-    plt.axis('off')
+    ax.set_title(title, fontsize=16)
+    ax.axis('off')
     
     # Save
     output_dir = os.path.dirname(output_path)
     if output_dir and not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+        os.makedirs(output_dir, exist_ok=True)
         
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    fig.savefig(output_path, dpi=dpi, bbox_inches='tight')
     print(f"Plot saved to {output_path}")
-    plt.close()
-    
\ No newline at end of file
+    plt.close(fig)
+
+def use_agg_backend():
+    """Switch matplotlib to the non-interactive Agg backend (used by worker processes)."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+def _render_job(job):
+    render_district_heatmap(**job)
+    return job['output_path']
+
+@instrument
+def render_heatmaps(jobs: List[dict], max_workers: Optional[int] = None) -> List[str]:
+    """
+    Render many district heatmaps in a process pool.
+
+    Each job is a dict of render_district_heatmap keyword arguments, e.g. one per month
+    or age band. Every distinct boundary file is parsed once here and the loaded
+    geometry is handed to its jobs, so workers neither re-parse the GeoJSON nor
+    depend on a geometry cache directory.
+
+    Args:
+        jobs (list): render_district_heatmap keyword arguments, one dict per map.
+        max_workers (int, optional): Number of worker processes.
+
+    Returns:
+        list: Output paths, in job order.
+    """
+    loaded = {}
+    prepared = []
+    for job in jobs:
+        if job.get('geometry') is None and os.path.exists(job.get('geojson_path') or ''):
+            key = (job['geojson_path'], job.get('geometry_cache_dir'), job.get('simplify_tolerance'))
+            if key not in loaded:
+                loaded[key] = load_district_geometry(*key)
+            job = {**job, 'geometry': loaded[key]}
+        prepared.append(job)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=use_agg_backend) as executor:
+        return list(executor.map(_render_job, prepared))
@@ -1,9 +1,14 @@
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+from src.utils.instrumentation import instrument
+
+@instrument
 def unique_pincode_count(df):
-    return df.groupby('district_cleaned')['pincode'].nunique().reset_index(name='unique_pincode_count')
+    return df.groupby('district_cleaned', observed=True)['pincode'].nunique().reset_index(name='unique_pincode_count')
 
+@instrument
 def get_pin_district_count(df):
     return (
         df.groupby('pincode')['district_cleaned']
@@ -11,6 +16,7 @@ def get_pin_district_count(df):
           .reset_index(name='district_count')
     )
 
+@instrument
 def flag_problematic_enrolments(df, problem_pins_df):
     """
     Merge enrolment data with problematic pincodes to flag records.
@@ -28,6 +34,7 @@ def flag_problematic_enrolments(df, problem_pins_df):
         how='inner'
     )
 
+@instrument
 def aggregate_enrolments_by_district_pincode(df, age_columns: List[str]):
     """
     Aggregate enrolment counts by district and pincode.
@@ -39,8 +46,9 @@ def aggregate_enrolments_by_district_pincode(df, age_columns: List[str]):
     Returns:
     pd.DataFrame: Aggregated DataFrame with sums for each district-pincode combination
     """
-    return df.groupby(['district_cleaned', 'pincode'])[age_columns].sum().reset_index()
+    return df.groupby(['district_cleaned', 'pincode'], observed=True)[age_columns].sum().reset_index()
 
+@instrument
 def get_dominant_district_per_pincode(df, age_columns: List[str]):
     """
     Identify the dominant district for each pincode based on total enrollment.
@@ -67,6 +75,7 @@ def get_dominant_district_per_pincode(df, age_columns: List[str]):
     
     return df_filtered
 
+@instrument
 def flag_multi_district_pincodes(df, pincode_column='pincode', district_column='district_cleaned', flag_column='pin_multi_district_flag'):
     """
     Flag records where a pincode appears in multiple districts.
@@ -87,4 +96,456 @@ def flag_multi_district_pincodes(df, pincode_column='pincode', district_column='
         df.groupby(pincode_column)[district_column]
           .transform('nunique') > 1
     )
-    return df
\ No newline at end of file
+    return df
+
+def integrity_table(df: pd.DataFrame, age_columns: List[str], pincode_column: str = 'pincode', district_column: str = 'district_cleaned') -> pd.DataFrame:
+    """
+    The (district, pincode) contingency table behind PincodeDistrictIntegrity.
+
+    Tables of disjoint row sets can be concatenated and re-summed, so partitions of a
+    dataset can be reduced independently (see src/data_processing/partitioned.py).
+
+    Parameters:
+    df (pd.DataFrame): The enrolment DataFrame.
+    age_columns (list): Count columns to sum.
+    pincode_column (str): Name of the pincode column. Default is 'pincode'.
+    district_column (str): Name of the district column. Default is 'district_cleaned'.
+
+    Returns:
+    pd.DataFrame: district, pincode, summed `age_columns` and 'row_count'.
+    """
+    grouped = df.groupby([district_column, pincode_column], observed=True)
+    table = grouped[list(age_columns)].sum()
+    table['row_count'] = grouped.size()
+    return table.reset_index()
+
+class PincodeDistrictIntegrity:
+    """
+    Pincode x district integrity checks answered from a single aggregate.
+
+    The frame is grouped by (district, pincode) once; pincode counts, multi-district
+    pincodes, dominant districts and per-row flags are all derived from that small
+    contingency table instead of re-grouping the row-level data for each check.
+
+    Parameters:
+    df (pd.DataFrame): The enrolment DataFrame.
+    age_columns (list): Count columns to sum, e.g. ['age_0_5', 'age_5_17', 'age_18_greater'].
+    pincode_column (str): Name of the pincode column. Default is 'pincode'.
+    district_column (str): Name of the district column. Default is 'district_cleaned'.
+    """
+
+    @instrument(name='validation.PincodeDistrictIntegrity')
+    def __init__(self, df: pd.DataFrame, age_columns: List[str], pincode_column: str = 'pincode', district_column: str = 'district_cleaned'):
+        self._set_table(integrity_table(df, age_columns, pincode_column, district_column), age_columns, pincode_column, district_column)
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, age_columns: List[str], pincode_column: str = 'pincode',
+                   district_column: str = 'district_cleaned') -> 'PincodeDistrictIntegrity':
+        """Build the checks from an existing integrity_table (e.g. merged partition tables)."""
+        integrity = cls.__new__(cls)
+        integrity._set_table(table, age_columns, pincode_column, district_column)
+        return integrity
+
+    def _set_table(self, table: pd.DataFrame, age_columns: List[str], pincode_column: str, district_column: str):
+        self.age_columns = list(age_columns)
+        self.pincode_column = pincode_column
+        self.district_column = district_column
+        self.table = table
+
+        self._district_counts = table.groupby(pincode_column).size()
+        self._multi_district_pins = self._district_counts.index[self._district_counts.to_numpy() > 1]
+
+    def unique_pincode_count(self) -> pd.DataFrame:
+        """Number of distinct pincodes per district (same output as unique_pincode_count)."""
+        return (
+            self.table.groupby(self.district_column, observed=True)
+                .size()
+                .reset_index(name='unique_pincode_count')
+        )
+
+    def pin_district_count(self) -> pd.DataFrame:
+        """Number of distinct districts per pincode (same output as get_pin_district_count)."""
+        return self._district_counts.reset_index(name='district_count')
+
+    def problem_pins(self) -> pd.DataFrame:
+        """Pincodes that appear in more than one district, with their district count."""
+        counts = self.pin_district_count()
+        return counts[counts['district_count'] > 1].reset_index(drop=True)
+
+    def problematic_aggregate(self) -> pd.DataFrame:
+        """
+        Age-column sums per district and pincode for multi-district pincodes.
+
+        Equivalent to aggregate_enrolments_by_district_pincode(flag_problematic_enrolments(df, problem_pins), age_columns).
+        """
+        mask = self.table[self.pincode_column].isin(self._multi_district_pins)
+        columns = [self.district_column, self.pincode_column] + self.age_columns
+        return self.table.loc[mask, columns].reset_index(drop=True)
+
+    def dominant_districts(self) -> pd.DataFrame:
+        """Dominant district (highest total enrolment) for each multi-district pincode."""
+        return get_dominant_district_per_pincode(self.problematic_aggregate(), self.age_columns)
+
+    def multi_district_mask(self, df: pd.DataFrame) -> pd.Series:
+        """Boolean Series marking rows of `df` whose pincode appears in several districts."""
+        return df[self.pincode_column].isin(self._multi_district_pins)
+
+    def problematic_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows of `df` with a multi-district pincode (a lookup instead of flag_problematic_enrolments' merge)."""
+        return df[self.multi_district_mask(df)]
+
+    def reference_districts(self, reference: pd.DataFrame, reference_column: str = 'district') -> pd.DataFrame:
+        """
+        Settle multi-district pincodes with an authoritative pincode -> district table.
+
+        `reference` (e.g. SpatialDistrictResolver.assign) is joined by a hash lookup on
+        the pincode; pincodes it does not cover keep their enrolment-dominant district.
+
+        Parameters:
+        reference (pd.DataFrame): One row per pincode with the pincode column and `reference_column`.
+        reference_column (str): District column of `reference`. Default is 'district'.
+
+        Returns:
+        pd.DataFrame: One row per multi-district pincode with 'dominant_district', 'reference_district',
+        'resolved_district', 'source' ('reference' or 'enrolment') and 'agrees' (both districts equal).
+        """
+        dominant = self.dominant_districts()
+        result = pd.DataFrame({
+            self.pincode_column: dominant[self.pincode_column].to_numpy(),
+            'dominant_district': dominant[self.district_column].astype(object).to_numpy()
+        })
+        lookup = reference.drop_duplicates(self.pincode_column).set_index(self.pincode_column)[reference_column]
+        result['reference_district'] = result[self.pincode_column].map(lookup).astype(object)
+        has_reference = result['reference_district'].notna()
+        result['resolved_district'] = result['reference_district'].where(has_reference, result['dominant_district'])
+        result['source'] = has_reference.map({True: 'reference', False: 'enrolment'})
+        result['agrees'] = has_reference & (result['reference_district'] == result['dominant_district'])
+        return result
+
+    @instrument
+    def flag_rows(self, df: pd.DataFrame, flag_column: str = 'pin_multi_district_flag') -> pd.DataFrame:
+        """Add the multi-district flag column to `df` (same result as flag_multi_district_pincodes)."""
+        df[flag_column] = self.multi_district_mask(df)
+        return df
+
+def _per_value(values: pd.Series, check: Callable[[pd.Series], pd.Series], missing: bool = False) -> np.ndarray:
+    """
+    Evaluate `check` on the distinct values of a column and broadcast it to the rows.
+
+    Categorical columns (names, raw dates) are checked once per category; other
+    columns are checked directly. Missing values get `missing`.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        result = np.asarray(check(pd.Series(values.cat.categories)), dtype=bool)
+        return np.append(result, missing)[values.cat.codes.to_numpy()]
+    result = np.asarray(check(values), dtype=bool)
+    return np.where(values.isna().to_numpy(), missing, result)
+
+class Rule:
+    """
+    One declarative data-quality rule: a vectorized check over a whole frame.
+
+    Rules are normally built with schema_rule, range_rule, domain_rule, pattern_rule,
+    pincode_region_rule or cross_field_rule and run together by DataQualityRules.
+    The built-in rules are plain objects (no closures), so a rule set can be sent
+    to worker processes (run_partitioned).
+
+    Parameters:
+    name (str): Unique name, used in the counts and the quarantine 'violations' column.
+    kind (str): 'schema', 'range', 'domain' or 'cross_field'.
+    columns (list): Columns the rule reads.
+    check (callable, optional): frame -> boolean array, True for rows that violate the rule
+        (subclasses implement violations() instead).
+    description (str): What the rule requires.
+    """
+
+    KINDS = ('schema', 'range', 'domain', 'cross_field')
+
+    def __init__(self, name: str, kind: str, columns: List[str], check: Optional[Callable[[pd.DataFrame], np.ndarray]] = None,
+                 description: str = ''):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown rule kind '{kind}'. Choose from {list(self.KINDS)}")
+        self.name = name
+        self.kind = kind
+        self.columns = list(columns)
+        self.check = check
+        self.description = description
+
+    def violations(self, df: pd.DataFrame) -> np.ndarray:
+        """Boolean array, True for rows of `df` that violate the rule."""
+        return np.asarray(self.check(df), dtype=bool)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r}, {self.kind!r})"
+
+class _SchemaRule(Rule):
+    def __init__(self, column: str, dtype: str, date_format: Optional[str] = None):
+        if dtype not in ('string', 'integer', 'number', 'date'):
+            raise ValueError(f"Unsupported schema dtype '{dtype}'")
+        super().__init__(f"{column}_{dtype}", 'schema', [column], description=f"{column} is a present {dtype}")
+        self.column, self.dtype, self.date_format = column, dtype, date_format
+
+    def _invalid(self, values: pd.Series) -> pd.Series:
+        if self.dtype == 'string':
+            return values.astype(str).str.strip() == ''
+        if self.dtype == 'date':
+            if pd.api.types.is_datetime64_any_dtype(values):
+                return values.isna()
+            if pd.api.types.is_integer_dtype(values):  # yyyymmdd (date_format_change)
+                return pd.to_datetime(values.astype(str), format='%Y%m%d', errors='coerce').isna()
+            return pd.to_datetime(values, format=self.date_format, errors='coerce').isna()
+        numbers = values if pd.api.types.is_numeric_dtype(values) else pd.to_numeric(values, errors='coerce')
+        invalid = numbers.isna()
+        if self.dtype == 'integer' and pd.api.types.is_float_dtype(numbers):
+            invalid |= numbers != np.floor(numbers)
+        return invalid
+
+    def violations(self, df: pd.DataFrame) -> np.ndarray:
+        return _per_value(df[self.column], self._invalid, missing=True)
+
+class _RangeRule(Rule):
+    def __init__(self, column: str, min_value=None, max_value=None):
+        super().__init__(f"{column}_range", 'range', [column], description=f"{column} within [{min_value}, {max_value}]")
+        self.column, self.min_value, self.max_value = column, min_value, max_value
+
+    def violations(self, df: pd.DataFrame) -> np.ndarray:
+        values = df[self.column]
+        invalid = np.zeros(len(values), dtype=bool)
+        if self.min_value is not None:
+            invalid |= (values < self.min_value).to_numpy(dtype=bool, na_value=False)
+        if self.max_value is not None:
+            invalid |= (values > self.max_value).to_numpy(dtype=bool, na_value=False)
+        return invalid
+
+class _DomainRule(Rule):
+    def __init__(self, column: str, allowed: Iterable, name: Optional[str] = None):
+        self.allowed = list(allowed)
+        super().__init__(name or f"{column}_domain", 'domain', [column], description=f"{column} in {len(self.allowed)} known values")
+        self.column = column
+
+    def _invalid(self, values: pd.Series) -> pd.Series:
+        return ~values.isin(self.allowed)
+
+    def violations(self, df: pd.DataFrame) -> np.ndarray:
+        return _per_value(df[self.column], self._invalid)
+
+class _PatternRule(Rule):
+    def __init__(self, column: str, pattern: str, name: Optional[str] = None, forbid: bool = True):
+        super().__init__(name or f"{column}_pattern", 'domain', [column],
+                         description=f"{column} {'does not match' if forbid else 'matches'} {pattern}")
+        self.column, self.pattern, self.forbid = column, pattern, forbid
+
+    def _invalid(self, values: pd.Series) -> pd.Series:
+        matches = values.astype(str).str.strip().str.fullmatch(self.pattern)
+        return matches if self.forbid else ~matches
+
+    def violations(self, df: pd.DataFrame) -> np.ndarray:
+        return _per_value(df[self.column], self._invalid)
+
+class _PincodeRegionRule(Rule):
+    def __init__(self, regions: Dict[str, List[int]], state_column: str = 'state_cleaned', pincode_column: str = 'pincode'):
+        super().__init__('pincode_region', 'cross_field', [state_column, pincode_column],
+                         description=f"first digit of {pincode_column} is a postal region of {state_column}")
+        self.regions, self.state_column, self.pincode_column = regions, state_column, pincode_column
+
+    def violations(self, df: pd.DataFrame) -> np.ndarray:
+        state_codes, states = pd.factorize(df[self.state_column])
+        allowed = np.ones((len(states) + 1, 10), dtype=bool)  # last row: missing state
+        for i, state in enumerate(states):
+            if state in self.regions:
+                allowed[i] = False
+                allowed[i, self.regions[state]] = True
+        pincodes = pd.to_numeric(df[self.pincode_column], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        present = ~np.isnan(pincodes)
+        digits = np.clip(np.nan_to_num(pincodes) // 100000, 0, 9).astype('int64')
+        return present & ~allowed[state_codes, digits]
+
+def schema_rule(column: str, dtype: str, date_format: Optional[str] = None) -> Rule:
+    """
+    Values of `column` must be present and of `dtype`.
+
+    Parameters:
+    column (str): Column to check.
+    dtype (str): 'string' (non-empty), 'integer', 'number' or 'date'.
+    date_format (str, optional): Format of string dates, e.g. '%d-%m-%Y' (dtype 'date').
+    """
+    return _SchemaRule(column, dtype, date_format)
+
+def range_rule(column: str, min_value=None, max_value=None) -> Rule:
+    """Present values of `column` must lie within [min_value, max_value] (either bound may be None)."""
+    return _RangeRule(column, min_value, max_value)
+
+def domain_rule(column: str, allowed: Iterable, name: Optional[str] = None) -> Rule:
+    """Present values of `column` must be one of `allowed` (e.g. the canonical state names)."""
+    return _DomainRule(column, allowed, name)
+
+def pattern_rule(column: str, pattern: str, name: Optional[str] = None, forbid: bool = True) -> Rule:
+    """Present values of `column` must not fully match the regex `pattern` (or must, with forbid=False)."""
+    return _PatternRule(column, pattern, name, forbid)
+
+def pincode_region_rule(regions: Dict[str, List[int]], state_column: str = 'state_cleaned', pincode_column: str = 'pincode') -> Rule:
+    """
+    The first pincode digit (postal region) must belong to the row's state.
+
+    Rows of states missing from `regions` and rows without a pincode pass; the
+    domain and schema rules report those.
+
+    Parameters:
+    regions (dict): State -> allowed first digits (config.PINCODE_REGIONS).
+    state_column (str): Column with cleaned state names. Default is 'state_cleaned'.
+    pincode_column (str): Pincode column. Default is 'pincode'.
+    """
+    return _PincodeRegionRule(regions, state_column, pincode_column)
+
+def cross_field_rule(name: str, columns: List[str], check: Callable[[pd.DataFrame], np.ndarray], description: str = '') -> Rule:
+    """A rule over several columns; `check` returns True for violating rows (use a module-level function to run it in worker processes)."""
+    return Rule(name, 'cross_field', columns, check, description)
+
+class DataQualityRules:
+    """
+    A set of declared rules evaluated together, with per-rule counts and a quarantine.
+
+    Every rule runs once per chunk of rows as an array operation; the violations of
+    a row are packed into one bit mask, so a row breaking several rules is counted
+    under each of them but quarantined once. Nothing is dropped silently: rows with
+    any violation go to the quarantine frame with the names of the broken rules.
+
+    Parameters:
+    rules (list): Rule objects (at most 64, unique names).
+    """
+
+    def __init__(self, rules: List[Rule]):
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate rule names: {sorted({n for n in names if names.count(n) > 1})}")
+        if len(rules) > 64:
+            raise ValueError("At most 64 rules can be evaluated together")
+        self.rules = list(rules)
+
+    @property
+    def columns(self) -> List[str]:
+        """Columns read by any rule."""
+        return list(dict.fromkeys(c for rule in self.rules for c in rule.columns))
+
+    def violation_bits(self, df: pd.DataFrame) -> np.ndarray:
+        """uint64 per row with bit i set when the row violates rule i."""
+        bits = np.zeros(len(df), dtype='uint64')
+        for i, rule in enumerate(self.rules):
+            bits |= rule.violations(df).astype('uint64') << np.uint64(i)
+        return bits
+
+    def _labels(self, bits: np.ndarray) -> pd.Categorical:
+        # 'rule_a, rule_b' per row, built once per distinct combination
+        codes, combinations = pd.factorize(bits)
+        labels = [', '.join(rule.name for i, rule in enumerate(self.rules) if int(combination) >> i & 1) for combination in combinations]
+        return pd.Categorical.from_codes(codes, labels)
+
+    def filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows of `df` without violations (one pass, no counts or quarantine frame)."""
+        return df.take(np.flatnonzero(self.violation_bits(df) == 0))
+
+    def split(self, df: pd.DataFrame, chunk_rows: int = 1_000_000) -> Tuple[pd.DataFrame, dict]:
+        """
+        validate() for paths that check one chunk or shard at a time.
+
+        Returns:
+        tuple: The valid rows, and the rest of the validate() result ('quarantine',
+        'counts', 'rows') to be combined with merge().
+        """
+        result = self.validate(df, chunk_rows)
+        return result.pop('valid'), result
+
+    @instrument(name='validation.DataQualityRules.validate')
+    def validate(self, df: pd.DataFrame, chunk_rows: int = 1_000_000) -> dict:
+        """
+        Check every row of `df` against all rules.
+
+        Parameters:
+        df (pd.DataFrame): Rows to check; every column a rule reads must exist.
+        chunk_rows (int): Rows evaluated per pass, bounding temporary memory. Default is 1,000,000.
+
+        Returns:
+        dict: 'valid' (rows without violations), 'quarantine' (the other rows plus a 'violations'
+        column naming the broken rules), 'counts' (one row per rule: rule, kind, violations,
+        share, description) and 'rows' (rows checked).
+        """
+        missing = [c for c in self.columns if c not in df.columns]
+        if missing:
+            raise KeyError(f"Columns required by the rules are missing: {missing}")
+
+        bits = np.concatenate([self.violation_bits(df.iloc[start:start + chunk_rows]) for start in range(0, len(df), chunk_rows)] or
+                              [np.zeros(0, dtype='uint64')])
+        counts = [int(np.count_nonzero(bits >> np.uint64(i) & np.uint64(1))) for i in range(len(self.rules))]
+        bad = bits != 0
+
+        quarantine = df[bad].copy()
+        quarantine['violations'] = self._labels(bits[bad])
+        return {'valid': df[~bad], 'quarantine': quarantine, 'counts': self._counts(counts, len(df)), 'rows': len(df)}
+
+    def merge(self, results: List[dict]) -> dict:
+        """
+        Combine the validate() results of several chunks or shards.
+
+        Parameters:
+        results (list): validate() or split() results of these rules; 'valid' is not used.
+
+        Returns:
+        dict: 'quarantine' (all quarantined rows), 'counts' (summed per rule, share of all
+        rows) and 'rows' (rows checked).
+        """
+        rows = sum(result['rows'] for result in results)
+        counts = [sum(int(result['counts']['violations'].iat[i]) for result in results) for i in range(len(self.rules))]
+        quarantines = [result['quarantine'] for result in results if len(result['quarantine'])]
+        if quarantines:
+            quarantine = pd.concat(quarantines)
+            quarantine['violations'] = quarantine['violations'].astype('category')
+        else:
+            quarantine = results[0]['quarantine'] if results else pd.DataFrame({'violations': pd.Categorical([])})
+        return {'quarantine': quarantine, 'counts': self._counts(counts, rows), 'rows': rows}
+
+    def _counts(self, counts: List[int], rows: int) -> pd.DataFrame:
+        return pd.DataFrame({
+            'rule': [rule.name for rule in self.rules],
+            'kind': [rule.kind for rule in self.rules],
+            'violations': counts,
+            'share': [count / rows if rows else 0.0 for count in counts],
+            'description': [rule.description for rule in self.rules]
+        })
+
+def default_rules(value_columns: List[str], known_states: Iterable[str], pincode_regions: Optional[Dict[str, List[int]]] = None,
+                  pincode_range: Tuple[int, int] = (110000, 999999), date_format: str = '%d-%m-%Y',
+                  state_column: str = 'state_cleaned') -> DataQualityRules:
+    """
+    The checks applied to every UIDAI dataset after state cleaning.
+
+    Schema: raw date, state, district, pincode and counts present and typed.
+    Range: six-digit pincodes in `pincode_range`, non-negative counts.
+    Domain: cleaned states among `known_states` (catches junk like '100000' and
+    unmapped names), districts not purely numeric.
+    Cross-field: the pincode's postal region belongs to the state (`pincode_regions`).
+
+    Parameters:
+    value_columns (list): Count columns of the dataset (config.DATASET_VALUE_COLUMNS).
+    known_states (iterable): Canonical state names (values of config.STATE_MAPPING).
+    pincode_regions (dict, optional): State -> first pincode digits (config.PINCODE_REGIONS).
+    pincode_range (tuple): Smallest and largest valid pincode.
+    date_format (str): Format of the raw 'date' column. Default is '%d-%m-%Y'.
+    state_column (str): Column with cleaned state names. Default is 'state_cleaned'.
+
+    Returns:
+    DataQualityRules: The rule set.
+    """
+    rules = [
+        schema_rule('date', 'date', date_format),
+        schema_rule('state', 'string'),
+        schema_rule('district', 'string'),
+        schema_rule('pincode', 'integer')
+    ]
+    rules += [schema_rule(column, 'integer') for column in value_columns]
+    rules.append(range_rule('pincode', *pincode_range))
+    rules += [range_rule(column, min_value=0) for column in value_columns]
+    rules.append(domain_rule(state_column, known_states, name='state_known'))
+    rules.append(pattern_rule('district', r'\d+', name='district_not_numeric'))
+    if pincode_regions:
+        rules.append(pincode_region_rule(pincode_regions, state_column))
+    return DataQualityRules(rules)
@@ -0,0 +1,230 @@
+import json
+import time
+import asyncio
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from src.data_processing.cube import CUBE_DIMENSIONS, query_cube
+from src.data_processing.validation import PincodeDistrictIntegrity
+
+# Largest request head (request line + headers) accepted; longer ones close the connection
+MAX_HEADER_BYTES = 16 * 1024
+
+class BadRequest(ValueError):
+    """Invalid query parameters (answered with 400)."""
+
+class NotFound(LookupError):
+    """Unknown endpoint (answered with 404)."""
+
+class QueryService:
+    """
+    Aggregate and validation queries over a loaded rollup cube, with an LRU response cache.
+
+    The cube (see src/data_processing/cube.py) is split by dataset and state once,
+    so a state-level question only touches that state's rows. Responses are cached
+    as encoded JSON keyed by path and query parameters; identical requests that
+    arrive while the first one is still being computed wait for it instead of
+    computing again.
+
+    Endpoints (GET, JSON):
+    /health                                      datasets, rows and cache statistics
+    /states, /districts, /pincodes, /months      cube aggregates at that level
+    /validation/multi-district-pincodes          pincodes reported under several districts
+    /validation/dominant-districts               dominant district of each such pincode
+
+    Query parameters: dataset, state, district, pincode, month (yyyymm) or from/to
+    (inclusive yyyymm range), sort (a measure; default 'total'), top (row limit).
+    The validation endpoints require a state.
+
+    Parameters:
+    cube (pd.DataFrame): Output of load_cube.
+    value_columns (dict): Dataset -> count columns (config.DATASET_VALUE_COLUMNS).
+    cache_size (int): Number of cached responses. Default is 512.
+    max_workers (int, optional): Threads computing uncached responses.
+    """
+
+    LEVELS = {'/states': ['state'], '/districts': ['state', 'district'], '/pincodes': ['state', 'district', 'pincode'], '/months': ['month']}
+
+    def __init__(self, cube: pd.DataFrame, value_columns: Dict[str, List[str]], cache_size: int = 512, max_workers: Optional[int] = None):
+        self.value_columns = value_columns
+        self.cache_size = cache_size
+        self.datasets = sorted(str(d) for d in cube['dataset'].unique()) if len(cube) else []
+        self.rows = len(cube)
+        self._by_dataset, self._by_state = {}, {}
+        for dataset, part in cube.groupby('dataset', observed=True):
+            measures = [c for c in part.columns if c not in CUBE_DIMENSIONS and part[c].notna().any()]
+            part = part[CUBE_DIMENSIONS + measures].reset_index(drop=True)
+            self._by_dataset[dataset] = part
+            for state, state_part in part.groupby('state', observed=True):
+                self._by_state[(dataset, state)] = state_part.reset_index(drop=True)
+        self._integrity = {}
+        self._cache = OrderedDict()
+        self._pending = {}
+        self.hits = self.misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    # Queries
+
+    def _params(self, query: Dict[str, str]) -> dict:
+        dataset = query.get('dataset') or (self.datasets[0] if self.datasets else None)
+        if dataset not in self._by_dataset:
+            raise BadRequest(f"Unknown dataset '{dataset}'. Available: {self.datasets}")
+        filters = {}
+        if query.get('district'):
+            filters['district'] = query['district']
+        try:
+            if query.get('pincode'):
+                filters['pincode'] = int(query['pincode'])
+            if query.get('month'):
+                filters['month'] = int(query['month'])
+            elif query.get('from') or query.get('to'):
+                filters['month'] = (int(query.get('from') or 0), int(query.get('to') or 999999))
+            top = int(query['top']) if query.get('top') else None
+        except ValueError:
+            raise BadRequest("month, from, to, pincode and top must be integers")
+        return {'dataset': dataset, 'state': query.get('state'), 'filters': filters, 'top': top, 'sort': query.get('sort', 'total')}
+
+    def _cube(self, dataset: str, state: Optional[str]) -> pd.DataFrame:
+        if state is None:
+            return self._by_dataset[dataset]
+        return self._by_state.get((dataset, state), self._by_dataset[dataset].iloc[0:0])
+
+    def aggregate(self, path: str, query: Dict[str, str]) -> pd.DataFrame:
+        """Answer /states, /districts, /pincodes or /months."""
+        params = self._params(query)
+        cube = self._cube(params['dataset'], params['state'])
+        by = self.LEVELS[path]
+        measures = [c for c in cube.columns if c not in CUBE_DIMENSIONS]
+        if params['sort'] not in measures and params['sort'] not in by:
+            raise BadRequest(f"Cannot sort by '{params['sort']}'. Choose from {by + measures}")
+        ascending = path == '/months' and 'sort' not in query
+        return query_cube(cube, by, measures, params['filters'], sort_by='month' if ascending else params['sort'],
+                          ascending=ascending, top=params['top'])
+
+    def integrity(self, dataset: str, state: str) -> PincodeDistrictIntegrity:
+        """District x pincode integrity checks of one state, built from the cube once and kept."""
+        key = (dataset, state)
+        if key not in self._integrity:
+            cube = self._cube(dataset, state)
+            age_columns = [c for c in self.value_columns.get(dataset, []) if c in cube.columns]
+            table = cube.groupby(['district', 'pincode'], observed=True)[age_columns + ['row_count']].sum().reset_index()
+            self._integrity[key] = PincodeDistrictIntegrity.from_table(table, age_columns, 'pincode', 'district')
+        return self._integrity[key]
+
+    def validation(self, path: str, query: Dict[str, str]) -> pd.DataFrame:
+        """Answer /validation/multi-district-pincodes or /validation/dominant-districts."""
+        params = self._params(query)
+        if not params['state']:
+            raise BadRequest("The validation endpoints need a state parameter")
+        integrity = self.integrity(params['dataset'], params['state'])
+        if path == '/validation/multi-district-pincodes':
+            result = integrity.problem_pins()
+        else:
+            result = integrity.dominant_districts()
+        return result.head(params['top']) if params['top'] else result
+
+    def health(self) -> dict:
+        return {'status': 'ok', 'datasets': self.datasets, 'rows': self.rows, 'cached': len(self._cache),
+                'hits': self.hits, 'misses': self.misses}
+
+    def compute(self, path: str, query: Dict[str, str]) -> bytes:
+        """Encoded JSON body for one request (raises BadRequest, or NotFound for unknown paths)."""
+        if path in self.LEVELS:
+            result = self.aggregate(path, query)
+        elif path in ('/validation/multi-district-pincodes', '/validation/dominant-districts'):
+            result = self.validation(path, query)
+        else:
+            raise NotFound(path)
+        return ('{"count": %d, "rows": %s}' % (len(result), result.to_json(orient='records'))).encode()
+
+    # Cache
+
+    async def respond(self, path: str, query: Dict[str, str]) -> bytes:
+        """Body for a request: from the LRU cache, from an identical request in flight, or computed in a worker thread."""
+        if path == '/health':
+            return json.dumps(self.health()).encode()
+        key = (path, tuple(sorted(query.items())))
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        if key in self._pending:
+            self.hits += 1
+            return await asyncio.shield(self._pending[key])
+
+        self.misses += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self.compute, path, query)
+        self._pending[key] = future
+        try:
+            body = await future
+        finally:
+            del self._pending[key]
+        self._cache[key] = body
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return body
+
+    # HTTP
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 GET requests on one connection (keep-alive) until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break  # closed by the client, or a request head beyond the stream limit
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split()
+                headers = dict(line.split(':', 1) for line in lines[1:] if ':' in line)
+                headers = {k.strip().lower(): v.strip() for k, v in headers.items()}
+                keep_alive = len(parts) == 3 and parts[2] == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                start = time.perf_counter()
+                status, body = await self._dispatch(parts)
+                await self._send(writer, status, body, keep_alive, time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _dispatch(self, parts: List[str]):
+        if len(parts) != 3:
+            return 400, b'{"error": "malformed request line"}'
+        if parts[0] != 'GET':
+            return 405, b'{"error": "only GET is supported"}'
+        url = urlsplit(parts[1])
+        try:
+            return 200, await self.respond(url.path.rstrip('/') or '/', dict(parse_qsl(url.query)))
+        except NotFound:
+            return 404, json.dumps({'error': f"unknown endpoint {url.path}"}).encode()
+        except BadRequest as e:
+            return 400, json.dumps({'error': str(e)}).encode()
+        except Exception as e:
+            print(f"Error answering {parts[1]}: {e}")
+            return 500, b'{"error": "internal error"}'
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, body: bytes, keep_alive: bool, seconds: float = 0.0) -> None:
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+        head = (
+            f"HTTP/1.1 {status} {reasons[status]}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"Server-Timing: total;dur={seconds * 1000:.2f}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+async def serve(service: QueryService, host: str = '127.0.0.1', port: int = 8050) -> None:
+    """Run the HTTP service until cancelled (Ctrl+C). Binds to localhost by default; no network access is needed."""
+    server = await asyncio.start_server(service.handle, host, port, limit=MAX_HEADER_BYTES)
+    print(f"Serving {service.rows} cube rows ({', '.join(service.datasets)}) on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional
+
+import pandas as pd
+
+def _read_status_kb(field: str):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter (Linux only). Returns False where unsupported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size in MB since start or since the last reset_peak_rss().
+
+    Uses /proc on Linux and the `resource` module on other Unix systems; returns 0.0
+    where neither exists (Windows), so reports still work without memory figures.
+    """
+    kb = _read_status_kb('VmHWM')
+    if kb is None:
+        try:
+            import resource  # Unix only
+        except ImportError:
+            return 0.0
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':  # bytes on macOS
+            kb /= 1024
+    return kb / 1024
+
+def current_rss_mb() -> float:
+    """Current resident set size in MB (falls back to the peak where /proc is unavailable)."""
+    kb = _read_status_kb('VmRSS')
+    return kb / 1024 if kb is not None else peak_rss_mb()
+
+def _row_count(value) -> Optional[int]:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+class RunReport:
+    """
+    Per-stage wall time, CPU time, rows in/out and peak memory of one run.
+
+    Stages nest: a stage started while another is open becomes its child, so a
+    report of main() shows e.g. 'validation' with the instrumented functions it
+    called underneath. Nesting is tracked per thread, so stages recorded from
+    pool threads (e.g. load_store readers) never close or adopt another thread's
+    stages; each record names its 'thread'. Peak memory is the process' peak RSS
+    while the stage was open (including its children and concurrent threads).
+
+    Parameters:
+    name (str): Name of the run (e.g. 'main').
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.stages = []
+        self._open = []  # open stages of every thread, for the shared peak counter
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    def _stack(self) -> list:
+        # Open stages of the calling thread
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _track_peak(self):
+        # The kernel keeps a single peak counter; fold it into every open stage before it is reset (call with the lock held)
+        peak = peak_rss_mb()
+        for record in self._open:
+            record['peak_rss_mb'] = max(record['peak_rss_mb'], peak)
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        """Record the enclosed block as a stage. The yielded dict accepts 'rows_out' (and other fields)."""
+        stack = self._stack()
+        record = {
+            'name': name,
+            'depth': len(stack),
+            'parent': stack[-1]['name'] if stack else None,
+            'thread': threading.current_thread().name,
+            'rows_in': rows_in,
+            'rows_out': None,
+            'rss_before_mb': round(current_rss_mb(), 1),
+            'peak_rss_mb': 0.0
+        }
+        with self._lock:
+            self._track_peak()
+            reset_peak_rss()
+            self._open.append(record)
+            self.stages.append(record)
+        stack.append(record)
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - start, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu_start, 6)
+            stack.pop()
+            with self._lock:
+                self._track_peak()
+                self._open = [r for r in self._open if r is not record]
+            record['peak_rss_mb'] = round(record['peak_rss_mb'], 1)
+            record['rss_after_mb'] = round(current_rss_mb(), 1)
+
+    def summary(self) -> pd.DataFrame:
+        """Stages aggregated by name (calls, total wall/CPU time, rows, max peak), slowest first."""
+        with self._lock:
+            stages = list(self.stages)
+        if not stages:
+            return pd.DataFrame()
+        stages = pd.DataFrame(stages)
+        summary = stages.groupby('name', sort=False).agg(
+            calls=('name', 'size'),
+            wall_seconds=('wall_seconds', 'sum'),
+            cpu_seconds=('cpu_seconds', 'sum'),
+            rows_in=('rows_in', lambda rows: rows.sum(min_count=1)),
+            rows_out=('rows_out', lambda rows: rows.sum(min_count=1)),
+            peak_rss_mb=('peak_rss_mb', 'max')
+        )
+        return summary.sort_values('wall_seconds', ascending=False).reset_index()
+
+    def to_dict(self) -> dict:
+        return {
+            'run': self.name,
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self._start, 6),
+            'cpu_seconds': round(time.process_time() - self._cpu_start, 6),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'stages': self.stages
+        }
+
+    def save(self, report_dir: str) -> str:
+        """Write the report as JSON to `report_dir/<run>_<timestamp>.json` and return the path."""
+        os.makedirs(report_dir, exist_ok=True)
+        stamp = self.started_at.replace(':', '').replace('-', '')
+        path = os.path.join(report_dir, f"{self.name}_{stamp}.json")
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(path + '.tmp', path)
+        return path
+
+_ACTIVE_REPORT: Optional[RunReport] = None
+
+def start_run(name: str) -> RunReport:
+    """Start collecting a report; instrumented functions record into it until end_run()."""
+    global _ACTIVE_REPORT
+    _ACTIVE_REPORT = RunReport(name)
+    return _ACTIVE_REPORT
+
+def end_run() -> Optional[RunReport]:
+    """Stop collecting and return the finished report."""
+    global _ACTIVE_REPORT
+    report, _ACTIVE_REPORT = _ACTIVE_REPORT, None
+    return report
+
+@contextmanager
+def stage(name: str, rows_in: Optional[int] = None):
+    """
+    Record the enclosed block as a stage of the active run (no-op without one).
+
+    Example:
+    >>> with stage('load') as record:
+    ...     df = load_data(paths)
+    ...     record['rows_out'] = len(df)
+    """
+    if _ACTIVE_REPORT is None:
+        yield {}
+        return
+    with _ACTIVE_REPORT.stage(name, rows_in) as record:
+        yield record
+
+def instrument(func=None, *, name: Optional[str] = None):
+    """
+    Decorator recording every call of a function as a stage of the active run.
+
+    Rows in is the length of the first DataFrame/Series argument, rows out the
+    length of a DataFrame/Series result. Without an active run the function is
+    called directly, so the decorator costs one global lookup.
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+    stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _ACTIVE_REPORT is None:
+            return func(*args, **kwargs)
+        rows_in = next((n for n in map(_row_count, list(args) + list(kwargs.values())) if n is not None), None)
+        with _ACTIVE_REPORT.stage(stage_name, rows_in) as record:
+            result = func(*args, **kwargs)
+            record['rows_out'] = _row_count(result)
+        return result
+    return wrapper
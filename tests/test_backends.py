@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.cleaning import clean_name
+from src.data_processing.loading import load_data
+from src.data_processing.partitioned import run_partitioned
+from src.data_processing.resolver import build_state_resolver
+from src.data_processing.streaming import stream_state_aggregate
+from src.data_processing.transformation import filter_by_state
+from src.data_processing.validation import default_rules
+
+AGE_COLUMNS = ['age_0_5', 'age_5_17', 'age_18_greater']
+SCHEMA = {'date': 'category', 'state': 'category', 'district': 'category', 'pincode': 'int32',
+          'age_0_5': 'int32', 'age_5_17': 'int32', 'age_18_greater': 'int32'}
+STATE_MAPPING = {'west bengal': 'West Bengal', 'bihar': 'Bihar', 'karnataka': 'Karnataka'}
+DISTRICT_MAPPING = {'howrah': 'Howrah', 'malda': 'Malda', 'hooghly': 'Hooghly'}
+
+@pytest.fixture
+def shards(tmp_path):
+    # Every fifth West Bengal row carries a misspelt state the mapping does not know
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(2):
+        n = 500
+        states = rng.choice(['West Bengal', 'Bihar', 'Karnataka'], n)
+        states = np.where((states == 'West Bengal') & (np.arange(n) % 5 == 0), 'West Bengall', states)
+        df = pd.DataFrame({
+            'date': '01-03-2025',
+            'state': states,
+            'district': rng.choice(['Howrah', 'Malda', 'Hooghly'], n),
+            'pincode': rng.choice([711101, 732101, 712101], n),
+            'age_0_5': rng.integers(0, 10, n),
+            'age_5_17': rng.integers(0, 10, n),
+            'age_18_greater': rng.integers(0, 10, n)
+        })
+        path = tmp_path / f"shard_{i}.csv"
+        df.to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
+
+def _in_memory(paths, resolver):
+    # The main() path: load everything, clean states with the resolver, filter, aggregate
+    df = load_data(paths, SCHEMA)
+    df = clean_name(df, 'state', STATE_MAPPING, 'state_cleaned', resolver)
+    df = filter_by_state(df, 'West Bengal').copy()
+    df = clean_name(df, 'district', DISTRICT_MAPPING, 'district_cleaned')
+    df['total_enroll'] = df[AGE_COLUMNS].sum(axis=1)
+    level = df.groupby('district_cleaned', observed=True)[AGE_COLUMNS + ['total_enroll']].sum()
+    return level.sort_index()
+
+def test_partitioned_matches_in_memory_on_misspelt_states(shards):
+    expected = _in_memory(shards, build_state_resolver(STATE_MAPPING))
+    result = run_partitioned(shards, STATE_MAPPING, AGE_COLUMNS, schema=SCHEMA, state_name='West Bengal',
+                             district_mapping=DISTRICT_MAPPING, max_workers=2, chunksize=300,
+                             state_resolver=build_state_resolver(STATE_MAPPING))
+    level = result['level'].set_index('district_cleaned').sort_index()
+    level.index = level.index.astype(str)
+    expected.index = expected.index.astype(str)
+    pd.testing.assert_frame_equal(level.astype('int64'), expected.astype('int64'), check_names=False)
+
+    # Without the resolver the misspelt rows are lost, which is what the test guards against
+    unresolved = run_partitioned(shards, STATE_MAPPING, AGE_COLUMNS, schema=SCHEMA, state_name='West Bengal',
+                                 district_mapping=DISTRICT_MAPPING, max_workers=2, chunksize=300)
+    assert unresolved['rows'] < result['rows']
+
+def test_streaming_matches_in_memory_on_misspelt_states(shards):
+    expected = _in_memory(shards, build_state_resolver(STATE_MAPPING))
+    level = stream_state_aggregate(shards, 'West Bengal', STATE_MAPPING, ['district_cleaned'], AGE_COLUMNS, schema=SCHEMA,
+                                   district_mapping=DISTRICT_MAPPING, chunksize=300,
+                                   state_resolver=build_state_resolver(STATE_MAPPING))
+    level = level.sort_index()
+    level.index = level.index.astype(str)
+    expected.index = expected.index.astype(str)
+    pd.testing.assert_frame_equal(level.astype('int64'), expected.astype('int64'), check_names=False)
+
+def test_partitioned_reports_rule_counts_and_quarantine(shards):
+    rules = default_rules(AGE_COLUMNS, STATE_MAPPING.values())
+    df = clean_name(load_data(shards, SCHEMA), 'state', STATE_MAPPING, 'state_cleaned')
+    expected = rules.validate(df)
+    result = run_partitioned(shards, STATE_MAPPING, AGE_COLUMNS, schema=SCHEMA, state_name='West Bengal',
+                             district_mapping=DISTRICT_MAPPING, max_workers=2, chunksize=300, quality_rules=rules)
+    quality = result['quality']
+    assert quality['rows'] == len(df)
+    pd.testing.assert_frame_equal(quality['counts'], expected['counts'])
+    assert len(quality['quarantine']) == len(expected['quarantine']) > 0
@@ -0,0 +1,77 @@
+import gzip
+import os
+
+import pandas as pd
+import pytest
+
+from src.data_processing.export import export_aggregate, export_partitioned, write_table
+
+def _frame():
+    return pd.DataFrame({
+        'state_cleaned': pd.Categorical(['Bihar', 'Bihar', 'West Bengal']),
+        'month': [202503, 202504, 202503],
+        'pincode': [800001, 800001, 711101],
+        'total': [5, 7, 11]
+    })
+
+def _read(path):
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_json(path, lines=True, compression='gzip')
+
+@pytest.mark.parametrize('extension', ['.parquet', '.csv', '.jsonl.gz'])
+def test_write_table_round_trip(tmp_path, extension):
+    path = str(tmp_path / f"out{extension}")
+    df = _frame()
+    assert write_table(df, path, chunk_rows=2) == 3
+    back = _read(path)
+    assert back.columns.tolist() == df.columns.tolist()
+    assert back['total'].tolist() == [5, 7, 11]
+    assert back['state_cleaned'].astype(str).tolist() == ['Bihar', 'Bihar', 'West Bengal']
+    assert not os.path.exists(path + '.tmp')
+
+def test_write_table_streams_frames_and_index(tmp_path):
+    path = str(tmp_path / 'out.parquet')
+    parts = (part.set_index('pincode') for part in [_frame().iloc[:2], _frame().iloc[2:]])
+    assert write_table(parts, path) == 3
+    assert pd.read_parquet(path)['pincode'].tolist() == [800001, 800001, 711101]
+
+def test_empty_frames_keep_their_columns(tmp_path):
+    empty = _frame().iloc[:0]
+    assert write_table(empty, str(tmp_path / 'e.parquet')) == 0
+    assert pd.read_parquet(tmp_path / 'e.parquet').columns.tolist() == empty.columns.tolist()
+    assert write_table(empty, str(tmp_path / 'e.csv')) == 0
+    assert (tmp_path / 'e.csv').read_text().strip() == 'state_cleaned,month,pincode,total'
+    assert write_table(empty, str(tmp_path / 'e.jsonl.gz')) == 0
+    with gzip.open(tmp_path / 'e.jsonl.gz', 'rt') as f:
+        assert f.read() == ''
+
+def test_partitioned_round_trip(tmp_path):
+    files = export_partitioned(_frame(), str(tmp_path / 'ds'), ['state_cleaned', 'month'])
+    assert files['rows'].tolist() == [1, 1, 1]
+    back = pd.read_parquet(tmp_path / 'ds')
+    assert sorted(back['total'].tolist()) == [5, 7, 11]
+    assert sorted(back['month'].astype(int).tolist()) == [202503, 202503, 202504]
+
+def test_reexport_removes_stale_partitions(tmp_path):
+    root = str(tmp_path / 'ds')
+    export_partitioned(_frame(), root, ['state_cleaned', 'month'])
+    export_partitioned(_frame().iloc[:1], root, ['state_cleaned', 'month'])
+    assert not os.path.exists(os.path.join(root, 'state_cleaned=West Bengal'))
+    assert not os.path.exists(os.path.join(root, 'state_cleaned=Bihar', 'month=202504'))
+    assert pd.read_parquet(root)['total'].tolist() == [5]
+
+def test_replace_within_keeps_other_states(tmp_path):
+    root = str(tmp_path / 'ds')
+    export_partitioned(_frame(), root, ['state_cleaned', 'month'])
+    export_partitioned(_frame().iloc[:1], root, ['state_cleaned', 'month'], replace_within=['state_cleaned'])
+    assert os.path.exists(os.path.join(root, 'state_cleaned=West Bengal', 'month=202503', 'part-0.parquet'))
+    assert not os.path.exists(os.path.join(root, 'state_cleaned=Bihar', 'month=202504'))
+
+def test_export_aggregate_single_file(tmp_path):
+    result = export_aggregate(_frame().set_index('pincode'), str(tmp_path), 'agg', 'csv')
+    assert result['path'] == str(tmp_path / 'agg.csv')
+    assert result['rows'] == 3 and result['files'] is None
+    assert pd.read_csv(result['path']).columns[0] == 'pincode'
@@ -0,0 +1,22 @@
+import pandas as pd
+
+from src.data_processing.registry import StateRegistry
+
+STATE_CONFIGS = {
+    'West Bengal': {
+        'district_mapping': {'howrah': 'Howrah', 'haora': 'Howrah', 'malda': 'Malda'},
+        'district_fixes': {'Malda': 'Maldah'}
+    }
+}
+
+def test_clean_districts_applies_the_configured_fixes(tmp_path):
+    registry = StateRegistry(STATE_CONFIGS, str(tmp_path))
+    df = pd.DataFrame({'district': pd.Categorical(['Haora', 'Malda', 'Howrah'])})
+    cleaned = registry.clean_districts(df, 'West Bengal')
+    assert cleaned['district_cleaned'].astype(str).tolist() == ['Howrah', 'Maldah', 'Howrah']
+
+def test_clean_districts_without_fixes(tmp_path):
+    configs = {'West Bengal': {'district_mapping': STATE_CONFIGS['West Bengal']['district_mapping']}}
+    df = pd.DataFrame({'district': pd.Categorical(['Haora', 'Malda'])})
+    cleaned = StateRegistry(configs, str(tmp_path)).clean_districts(df, 'West Bengal')
+    assert cleaned['district_cleaned'].astype(str).tolist() == ['Howrah', 'Malda']
@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.store import (
+    build_store, load_store, read_store_index, select_partitions, settings_hash, store_is_current
+)
+
+def _rows():
+    return pd.DataFrame({
+        'state_cleaned': pd.Categorical(['Bihar', 'Bihar', 'West Bengal', 'West Bengal', 'West Bengal']),
+        'district_cleaned': pd.Categorical(['Patna', 'Gaya', 'Howrah', 'Malda', 'Howrah']),
+        'enrolment_date': np.array([20250301, 20250415, 20250302, 20250310, 20250420], dtype='int32'),
+        'pincode': np.array([800001, 823001, 711101, 732101, 711102], dtype='int32'),
+        'age_0_5': np.array([1, 2, 3, 4, 5], dtype='int32')
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    source = tmp_path / 'enrolment.csv'
+    source.write_text('date,state\n')
+    store_dir = str(tmp_path / 'store')
+    build_store(_rows(), store_dir, 'enrolment', source_paths=[str(source)], settings='a')
+    return store_dir, str(source)
+
+def test_index_lists_partition_statistics(store):
+    partitions = read_store_index(store[0], 'enrolment')['partitions']
+    assert partitions[['state', 'month', 'rows']].values.tolist() == [
+        ['Bihar', 202503, 1], ['Bihar', 202504, 1], ['West Bengal', 202503, 2], ['West Bengal', 202504, 1]
+    ]
+    wb_march = partitions.iloc[2]
+    assert (wb_march['min_date'], wb_march['max_date']) == (20250302, 20250310)
+    assert (wb_march['min_pincode'], wb_march['max_pincode']) == (711101, 732101)
+
+def test_select_partitions_prunes_on_statistics(store):
+    partitions = read_store_index(store[0], 'enrolment')['partitions']
+    assert len(select_partitions(partitions, states=['West Bengal'])) == 2
+    assert len(select_partitions(partitions, date_range=(20250401, None))) == 2
+    assert len(select_partitions(partitions, states=['West Bengal'], pincode_range=(720000, 740000))) == 1
+    assert len(select_partitions(partitions, date_range=(20250305, 20250309))) == 1
+
+def test_load_store_reads_only_matching_rows(store, capsys):
+    df = load_store(store[0], 'enrolment', states=['West Bengal'], date_range=(20250301, 20250331))
+    assert 'reading 1 of 4 partitions' in capsys.readouterr().out
+    assert df['pincode'].tolist() == [711101, 732101]
+    assert df['state_cleaned'].astype(str).unique().tolist() == ['West Bengal']
+    assert df['month'].unique().tolist() == [202503]
+
+def test_load_store_without_matches_keeps_the_schema(store):
+    df = load_store(store[0], 'enrolment', states=['Goa'])
+    assert df.empty
+    assert {'district_cleaned', 'enrolment_date', 'pincode', 'age_0_5', 'state_cleaned', 'month'} <= set(df.columns)
+    assert df['pincode'].dtype == 'int32'
+    assert load_store(store[0], 'enrolment', states=['Goa'], columns=['pincode', 'age_0_5']).columns.tolist() == ['pincode', 'age_0_5']
+
+def test_rebuild_removes_old_partitions(store):
+    build_store(_rows().iloc[:2], store[0], 'enrolment', source_paths=[store[1]], settings='a')
+    assert not os.path.exists(os.path.join(store[0], 'enrolment', 'state_cleaned=West Bengal'))
+    assert load_store(store[0], 'enrolment')['pincode'].tolist() == [800001, 823001]
+
+def test_store_is_current_tracks_sources_and_settings(store):
+    store_dir, source = store
+    assert store_is_current(store_dir, 'enrolment', [source], settings='a')
+    assert not store_is_current(store_dir, 'enrolment', [source], settings='b')
+    assert not store_is_current(store_dir, 'other', [source], settings='a')
+    with open(source, 'a') as f:
+        f.write('01-03-2025,Bihar\n')
+    assert not store_is_current(store_dir, 'enrolment', [source], settings='a')
+
+def test_settings_hash_is_order_independent():
+    assert settings_hash({'a': {1, 2, 3}, 'b': 1}) == settings_hash({'b': 1, 'a': {3, 2, 1}})
+    assert settings_hash({'a': 1}) != settings_hash({'a': 2})
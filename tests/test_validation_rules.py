@@ -0,0 +1,120 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config.settings import ENROLMENT_SCHEMA
+from src.data_processing.loading import load_data
+from src.data_processing.validation import (
+    DataQualityRules, _per_value, default_rules, domain_rule, pattern_rule, pincode_region_rule, range_rule, schema_rule
+)
+
+REGIONS = {'West Bengal': [7], 'Bihar': [8, 9]}
+
+def _rows():
+    return pd.DataFrame({
+        'date': pd.Categorical(['01-03-2025', '02-03-2025', '31-02-2025', '03-03-2025', '04-03-2025']),
+        'state': pd.Categorical(['West Bengal', 'Bihar', 'West Bengal', '100000', 'Bihar']),
+        'state_cleaned': pd.Categorical(['West Bengal', 'Bihar', 'West Bengal', '100000', 'Bihar']),
+        'district': pd.Categorical(['Howrah', 'Patna', 'Howrah', '12345', 'Gaya']),
+        'pincode': np.array([711101, 800001, 711101, 800001, 711101], dtype='int32'),
+        'age_0_5': np.array([1, 2, -1, 0, 3], dtype='int32')
+    })
+
+def _rules():
+    return default_rules(['age_0_5'], ['West Bengal', 'Bihar'], REGIONS)
+
+def test_counts_match_violation_bits():
+    rules = _rules()
+    result = rules.validate(_rows())
+    bits = rules.violation_bits(_rows())
+    expected = [int(np.count_nonzero(bits >> np.uint64(i) & np.uint64(1))) for i in range(len(rules.rules))]
+    assert result['counts']['violations'].tolist() == expected
+    counts = result['counts'].set_index('rule')['violations']
+    assert counts['date_date'] == 1             # 31-02 is not a date
+    assert counts['age_0_5_range'] == 1
+    assert counts['state_known'] == 1
+    assert counts['district_not_numeric'] == 1
+    assert counts['pincode_region'] == 1        # a 7xxxxx pincode in Bihar
+    assert result['rows'] == 5
+
+def test_quarantine_labels_name_every_broken_rule():
+    result = _rules().validate(_rows(), chunk_rows=2)
+    quarantine = result['quarantine']
+    assert len(result['valid']) + len(quarantine) == 5
+    assert result['valid'].index.tolist() == [0, 1]
+    labels = dict(zip(quarantine.index, quarantine['violations'].astype(str)))
+    assert labels[2] == 'date_date, age_0_5_range'
+    assert labels[3] == 'state_known, district_not_numeric'
+    assert labels[4] == 'pincode_region'
+
+def test_filter_keeps_the_valid_rows():
+    rules = _rules()
+    pd.testing.assert_frame_equal(rules.filter(_rows()), rules.validate(_rows())['valid'])
+
+def test_merge_of_chunks_matches_one_pass():
+    rules = _rules()
+    whole = rules.validate(_rows())
+    parts = [rules.split(_rows().iloc[:2]), rules.split(_rows().iloc[2:])]
+    assert [len(valid) for valid, _ in parts] == [2, 0]
+    merged = rules.merge([checked for _, checked in parts])
+    pd.testing.assert_frame_equal(merged['counts'], whole['counts'])
+    assert merged['rows'] == 5
+    assert merged['quarantine'].index.tolist() == [2, 3, 4]
+    assert merged['quarantine']['violations'].astype(str).tolist() == whole['quarantine']['violations'].astype(str).tolist()
+    assert rules.merge([])['counts']['violations'].sum() == 0
+
+def test_per_value_checks_categories_once():
+    calls = []
+
+    def check(values):
+        calls.append(len(values))
+        return values.str.startswith('b')
+
+    values = pd.Series(pd.Categorical(['a', 'b', None, 'b', 'a'] * 100))
+    result = _per_value(values, check, missing=True)
+    assert calls == [2]
+    assert result.tolist() == [False, True, True, True, False] * 100
+
+def test_per_value_plain_columns():
+    values = pd.Series(['a', 'b', None])
+    assert _per_value(values, lambda v: v == 'b').tolist() == [False, True, False]
+
+def test_pincode_region_rule():
+    rule = pincode_region_rule(REGIONS)
+    df = pd.DataFrame({
+        'state_cleaned': pd.Categorical(['West Bengal', 'West Bengal', 'Bihar', 'Bihar', 'Goa', None, 'Bihar']),
+        'pincode': pd.array([711101, 800001, 900001, 711101, 403001, 711101, None], dtype='Int64')
+    })
+    # Unknown states, missing states and missing pincodes are left to the other rules
+    assert rule.violations(df).tolist() == [False, True, False, True, False, False, False]
+
+def test_single_column_rules():
+    df = pd.DataFrame({'pincode': [110001, 99, 1000000], 'district': ['Howrah', ' ', '42']})
+    assert range_rule('pincode', 110000, 999999).violations(df).tolist() == [False, True, True]
+    assert schema_rule('district', 'string').violations(df).tolist() == [False, True, False]
+    assert pattern_rule('district', r'\d+').violations(df).tolist() == [False, False, True]
+    assert domain_rule('district', ['Howrah']).violations(df).tolist() == [False, True, True]
+
+def test_blank_cells_load_and_are_quarantined(tmp_path):
+    path = tmp_path / 'shard.csv'
+    path.write_text('date,state,district,pincode,age_0_5,age_5_17,age_18_greater\n'
+                    '01-03-2025,West Bengal,Howrah,711101,1,2,3\n'
+                    '01-03-2025,West Bengal,Howrah,,1,2,3\n'
+                    '01-03-2025,Bihar,Patna,800001,,2,3\n')
+    df = load_data([str(path)], ENROLMENT_SCHEMA)
+    df['state_cleaned'] = df['state']
+    rules = default_rules(['age_0_5', 'age_5_17', 'age_18_greater'], ['West Bengal', 'Bihar'], REGIONS)
+    result = rules.validate(df)
+    counts = result['counts'].set_index('rule')['violations']
+    assert (counts['pincode_integer'], counts['age_0_5_integer']) == (1, 1)
+    assert result['valid']['pincode'].tolist() == [711101]
+
+def test_rules_pickle_for_worker_processes():
+    rules = pickle.loads(pickle.dumps(_rules()))
+    assert rules.validate(_rows())['valid'].index.tolist() == [0, 1]
+
+def test_duplicate_rule_names_are_rejected():
+    with pytest.raises(ValueError):
+        DataQualityRules([range_rule('pincode', 0), range_rule('pincode', 1)])